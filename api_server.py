@@ -0,0 +1,485 @@
+import asyncio
+import concurrent.futures
+import http.client
+import itertools
+import json
+import queue
+import threading
+import traceback
+from collections import deque
+from urllib.parse import parse_qs, quote, unquote, urlencode, urlsplit
+
+API_HOST = "127.0.0.1"
+DEFAULT_API_PORT = 8765
+API_POLL_MS = 15
+API_IDLE_POLL_MS = 200
+API_BACKLOG = 512
+CHANGE_LOG_SIZE = 1000
+LONG_POLL_SECONDS = 25
+MAX_LONG_POLL_SECONDS = 60
+SSE_HEARTBEAT_SECONDS = 15
+MAX_HEADER_BYTES = 16 * 1024
+MAX_BODY_BYTES = 1024 * 1024
+DEFAULT_PAGE_SIZE = 500
+MAX_PAGE_SIZE = 5000
+MAX_BATCH_IDS = 10000
+
+STATUS_TEXT = {
+    200: "OK",
+    201: "Created",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+    503: "Service Unavailable",
+}
+
+
+class ServiceUnavailable(Exception):
+    """The planner can't take requests yet, e.g. while its tasks load."""
+
+
+class HttpError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class MainThreadDispatcher:
+    """Runs calls from the server thread on the thread that owns the store.
+
+    ``schedule`` is Tk's ``after``. Queued calls are drained together every
+    ``interval_ms``, so a burst of requests costs one Tk callback, and the
+    edits it makes share one debounced save. While no calls arrive the
+    wait doubles up to ``idle_ms``, so an idle planner barely wakes up.
+    """
+
+    def __init__(self, schedule, interval_ms=API_POLL_MS, idle_ms=API_IDLE_POLL_MS):
+        self.schedule = schedule
+        self.interval_ms = interval_ms
+        self.idle_ms = idle_ms
+        self._delay_ms = interval_ms
+        self._calls = queue.SimpleQueue()
+        self._closed = False
+        self.schedule(self._delay_ms, self._poll)
+
+    def submit(self, func, *args):
+        future = concurrent.futures.Future()
+        self._calls.put((future, func, args))
+        return future
+
+    def close(self):
+        self._closed = True
+        self._drain(ServiceUnavailable("The planner is closing."))
+
+    def _poll(self):
+        if self._closed:
+            return
+        if self._drain():
+            self._delay_ms = self.interval_ms
+        else:
+            self._delay_ms = min(self._delay_ms * 2, self.idle_ms)
+        self.schedule(self._delay_ms, self._poll)
+
+    def _drain(self, error=None):
+        """Run or fail every queued call and return how many there were."""
+        count = 0
+        while True:
+            try:
+                future, func, args = self._calls.get_nowait()
+            except queue.Empty:
+                return count
+            count += 1
+            if not future.set_running_or_notify_cancel():
+                continue
+            if error is not None:
+                future.set_exception(error)
+                continue
+            try:
+                future.set_result(func(*args))
+            except Exception as exception:
+                future.set_exception(exception)
+
+
+class ChangeFeed:
+    """Numbered log of recent store changes that clients can wait on.
+
+    Lives on the server's event loop. Every waiter shares one future that is
+    resolved on the next change, so hundreds of idle long-polls cost almost
+    nothing.
+    """
+
+    def __init__(self, size=CHANGE_LOG_SIZE):
+        self.version = 0
+        self._log = deque(maxlen=size)
+        self._changed = None
+
+    def add(self, changes):
+        for op, task_id in changes:
+            self.version += 1
+            self._log.append({"version": self.version, "op": op, "id": task_id})
+        if changes and self._changed is not None:
+            self._changed.set_result(None)
+            self._changed = None
+
+    def since(self, version):
+        """Changes after ``version``, or None if some were already dropped."""
+        if version == self.version:
+            return []
+        if version > self.version or not self._log or self._log[0]["version"] > version + 1:
+            return None
+        return list(itertools.islice(self._log, version + 1 - self._log[0]["version"], None))
+
+    async def wait(self, version, timeout):
+        if version != self.version:
+            return
+        if self._changed is None:
+            self._changed = asyncio.get_running_loop().create_future()
+        try:
+            await asyncio.wait_for(asyncio.shield(self._changed), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+
+class ApiServer:
+    """Local HTTP/JSON API over the planner, served from its own thread.
+
+    Routes::
+
+        GET    /tasks?filter=&category=&q=&offset=&limit=
+        POST   /tasks                  create from {name, due, remind, category, repeat}
+        GET    /tasks/<id>
+        PATCH  /tasks/<id>             change any of those fields
+        DELETE /tasks/<id>
+        POST   /tasks/done             {"ids": [...]}
+        POST   /tasks/delete           {"ids": [...]}
+        GET    /changes?since=&timeout=   long-poll for changes after a version
+        GET    /events                 the same changes as server-sent events
+
+    ``service`` provides ``page_tasks``, ``get_task``, ``create_task``,
+    ``change_task``, ``finish_tasks`` and ``remove_tasks``. Each call goes
+    through ``submit(func, *args)``, which returns a concurrent Future, so
+    the service runs on its own thread. Without ``submit`` it is called
+    inline on the server thread. ``publish`` is safe to call from any thread.
+    """
+
+    def __init__(self, service, submit=None, port=DEFAULT_API_PORT, host=API_HOST):
+        self.service = service
+        self.submit = submit
+        self.host = host
+        self.port = port
+        self.feed = ChangeFeed()
+        self.error = None
+        self._loop = None
+        self._thread = None
+        self._ready = threading.Event()
+        self._pending = []
+        self._pending_lock = threading.Lock()
+
+    def start(self):
+        """Start serving and return the bound port; raises OSError if taken."""
+        self._thread = threading.Thread(target=self._run, name="api-server", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        if self.error is not None:
+            raise self.error
+        return self.port
+
+    def stop(self):
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(loop.stop)
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def publish(self, op, task_id):
+        # Changes are handed to the loop in batches, not one wakeup each.
+        with self._pending_lock:
+            first = not self._pending
+            self._pending.append((op, task_id))
+        if first and self._loop is not None:
+            try:
+                self._loop.call_soon_threadsafe(self._flush_changes)
+            except RuntimeError:
+                pass
+
+    def _flush_changes(self):
+        with self._pending_lock:
+            changes, self._pending = self._pending, []
+        self.feed.add(changes)
+
+    def _run(self):
+        loop = asyncio.new_event_loop()
+        try:
+            server = loop.run_until_complete(
+                asyncio.start_server(
+                    self._handle_client,
+                    self.host,
+                    self.port,
+                    limit=MAX_HEADER_BYTES,
+                    backlog=API_BACKLOG,
+                )
+            )
+        except OSError as error:
+            self.error = error
+            loop.close()
+            self._ready.set()
+            return
+        self.port = server.sockets[0].getsockname()[1]
+        self._loop = loop
+        self._ready.set()
+        try:
+            loop.run_forever()
+        finally:
+            server.close()
+            # Open long-polls and event streams would keep wait_closed()
+            # waiting, so cancel them instead.
+            tasks = asyncio.all_tasks(loop)
+            for task in tasks:
+                task.cancel()
+            if tasks:
+                loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+            loop.close()
+
+    async def _handle_client(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                except HttpError as error:
+                    await self._respond(writer, error.status, {"error": error.message}, False)
+                    break
+                if request is None:
+                    break
+                method, path, params, headers, body = request
+                if path == "/events" and method == "GET":
+                    await self._stream_events(writer, params, headers)
+                    break
+                status, payload = await self._dispatch(method, path, params, body)
+                keep_alive = headers.get("connection", "").lower() != "close"
+                await self._respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except asyncio.CancelledError:
+            # Only happens when the server stops; end quietly so the
+            # stream protocol does not log the cancelled handler.
+            pass
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader):
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+        except asyncio.IncompleteReadError as error:
+            if error.partial.strip():
+                raise HttpError(400, "Incomplete request.") from None
+            return None
+        except asyncio.LimitOverrunError:
+            raise HttpError(413, "Request headers are too large.") from None
+        lines = head.decode("latin-1").split("\r\n")
+        try:
+            method, target, _ = lines[0].split(" ", 2)
+        except ValueError:
+            raise HttpError(400, "Malformed request line.") from None
+        headers = {}
+        for line in lines[1:]:
+            name, separator, value = line.partition(":")
+            if separator:
+                headers[name.strip().lower()] = value.strip()
+        try:
+            length = int(headers.get("content-length") or 0)
+        except ValueError:
+            raise HttpError(400, "Bad Content-Length.") from None
+        if length > MAX_BODY_BYTES:
+            raise HttpError(413, "Request body is too large.")
+        body = await reader.readexactly(length) if length > 0 else b""
+        url = urlsplit(target)
+        path = "/" + unquote(url.path).strip("/")
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        return method.upper(), path, params, headers, body
+
+    async def _respond(self, writer, status, payload, keep_alive):
+        data = json.dumps(payload).encode("utf-8")
+        head = (
+            f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(data)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode("latin-1") + data)
+        await writer.drain()
+
+    async def _call(self, func, *args):
+        if self.submit is None:
+            return func(*args)
+        return await asyncio.wrap_future(self.submit(func, *args))
+
+    async def _dispatch(self, method, path, params, body):
+        try:
+            return await self._route(method, path, params, body)
+        except HttpError as error:
+            return error.status, {"error": error.message}
+        except ServiceUnavailable as error:
+            return 503, {"error": str(error)}
+        except KeyError as error:
+            return 404, {"error": f"No task with id {error.args[0]!r}." if error.args else "Not found."}
+        except ValueError as error:
+            return 400, {"error": error.args[-1] if error.args else "Bad request."}
+        except Exception:
+            traceback.print_exc()
+            return 500, {"error": "Internal error."}
+
+    async def _route(self, method, path, params, body):
+        parts = path.strip("/").split("/")
+        service = self.service
+        if parts == ["changes"]:
+            self._allow(method, "GET")
+            return 200, await self._changes(params)
+        if parts[0] != "tasks" or len(parts) > 2:
+            raise HttpError(404, f"No route for {path}.")
+        if len(parts) == 1:
+            if method == "GET":
+                offset = self._int_param(params, "offset", 0, 0, None)
+                limit = self._int_param(params, "limit", DEFAULT_PAGE_SIZE, 1, MAX_PAGE_SIZE)
+                version = self.feed.version
+                result = await self._call(
+                    service.page_tasks,
+                    params.get("filter", "All"),
+                    params.get("category", "All"),
+                    params.get("q", ""),
+                    offset,
+                    limit,
+                )
+                return 200, dict(result, version=version)
+            self._allow(method, "POST")
+            return 201, await self._call(service.create_task, self._json_object(body))
+        task_id = parts[1]
+        if task_id in ("done", "delete") and method == "POST":
+            task_ids = self._id_list(self._json_object(body))
+            action = service.finish_tasks if task_id == "done" else service.remove_tasks
+            return 200, {"ids": await self._call(action, task_ids)}
+        if method == "GET":
+            return 200, await self._call(service.get_task, task_id)
+        if method == "PATCH":
+            return 200, await self._call(service.change_task, task_id, self._json_object(body))
+        self._allow(method, "DELETE")
+        return 200, {"ids": await self._call(service.remove_tasks, [task_id])}
+
+    async def _changes(self, params):
+        since = self._int_param(params, "since", 0, 0, None)
+        timeout = self._int_param(params, "timeout", LONG_POLL_SECONDS, 0, MAX_LONG_POLL_SECONDS)
+        changes = self.feed.since(since)
+        if changes == [] and timeout:
+            await self.feed.wait(since, timeout)
+            changes = self.feed.since(since)
+        if changes is None:
+            # Too far behind (or from an earlier run): refetch the list.
+            return {"version": self.feed.version, "reset": True, "changes": []}
+        return {"version": self.feed.version, "changes": changes}
+
+    async def _stream_events(self, writer, params, headers):
+        writer.write(
+            b"HTTP/1.1 200 OK\r\n"
+            b"Content-Type: text/event-stream\r\n"
+            b"Cache-Control: no-cache\r\n"
+            b"Connection: keep-alive\r\n\r\n"
+        )
+        try:
+            version = int(headers.get("last-event-id") or params.get("since") or self.feed.version)
+        except ValueError:
+            version = self.feed.version
+        while not writer.is_closing():
+            changes = self.feed.since(version)
+            if changes is None:
+                version = self.feed.version
+                writer.write(f"event: reset\ndata: {json.dumps({'version': version})}\n\n".encode())
+            elif changes:
+                for change in changes:
+                    writer.write(f"id: {change['version']}\ndata: {json.dumps(change)}\n\n".encode())
+                version = changes[-1]["version"]
+            else:
+                await self.feed.wait(version, SSE_HEARTBEAT_SECONDS)
+                if self.feed.version == version:
+                    writer.write(b": keep-alive\n\n")
+            await writer.drain()
+
+    @staticmethod
+    def _allow(method, allowed):
+        if method != allowed:
+            raise HttpError(405, f"Use {allowed} here.")
+
+    @staticmethod
+    def _int_param(params, name, default, low, high):
+        try:
+            value = int(params.get(name, default))
+        except ValueError:
+            raise HttpError(400, f"{name} must be a whole number.") from None
+        if value < low or (high is not None and value > high):
+            raise HttpError(400, f"{name} is out of range.")
+        return value
+
+    @staticmethod
+    def _json_object(body):
+        try:
+            data = json.loads(body or b"{}")
+        except ValueError:
+            raise HttpError(400, "The body must be JSON.") from None
+        if not isinstance(data, dict):
+            raise HttpError(400, "The body must be a JSON object.")
+        return data
+
+    @staticmethod
+    def _id_list(data):
+        task_ids = data.get("ids")
+        if (
+            not isinstance(task_ids, list)
+            or not task_ids
+            or len(task_ids) > MAX_BATCH_IDS
+            or not all(isinstance(task_id, str) for task_id in task_ids)
+        ):
+            raise HttpError(400, "ids must be a non-empty list of task ids.")
+        return list(dict.fromkeys(task_ids))
+
+
+class ApiClient:
+    """Small blocking client for scripts and tests that talk to ``ApiServer``."""
+
+    def __init__(self, port=DEFAULT_API_PORT, host=API_HOST, timeout=MAX_LONG_POLL_SECONDS + 5):
+        self.connection = http.client.HTTPConnection(host, port, timeout=timeout)
+
+    def request(self, method, path, body=None, **params):
+        if params:
+            path = f"{path}?{urlencode(params)}"
+        data = None if body is None else json.dumps(body)
+        headers = {"Content-Type": "application/json"} if data is not None else {}
+        self.connection.request(method, path, body=data, headers=headers)
+        response = self.connection.getresponse()
+        return response.status, json.loads(response.read() or b"null")
+
+    def list_tasks(self, **params):
+        return self.request("GET", "/tasks", **params)
+
+    def get_task(self, task_id):
+        return self.request("GET", f"/tasks/{quote(task_id, safe='')}")
+
+    def create_task(self, fields):
+        return self.request("POST", "/tasks", fields)
+
+    def change_task(self, task_id, fields):
+        return self.request("PATCH", f"/tasks/{quote(task_id, safe='')}", fields)
+
+    def finish_tasks(self, task_ids):
+        return self.request("POST", "/tasks/done", {"ids": list(task_ids)})
+
+    def remove_tasks(self, task_ids):
+        return self.request("POST", "/tasks/delete", {"ids": list(task_ids)})
+
+    def changes(self, since, timeout=LONG_POLL_SECONDS):
+        return self.request("GET", "/changes", since=since, timeout=timeout)
+
+    def close(self):
+        self.connection.close()
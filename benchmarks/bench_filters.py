@@ -0,0 +1,72 @@
+"""Compare list-filter latency for the JSON (in-memory) and SQLite backends.
+
+Usage: python3 benchmarks/bench_filters.py [--sizes 10000 100000 1000000]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import make_tasks  # noqa: E402
+from storage import JsonStorage, SqliteStorage  # noqa: E402
+from task_store import FILTERS, TaskStore  # noqa: E402
+
+
+def median_ms(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def run(size, repeat):
+    now = datetime.now()
+    tasks = make_tasks(size, now=now)
+    with tempfile.TemporaryDirectory() as directory:
+        json_path = os.path.join(directory, "tasks.json")
+        JsonStorage(json_path).save(tasks)
+
+        start = time.perf_counter()
+        store = TaskStore(JsonStorage(json_path).load())
+        json_load = (time.perf_counter() - start) * 1000
+
+        sqlite = SqliteStorage(json_path)
+        start = time.perf_counter()
+        sqlite.load()
+        sqlite_load = (time.perf_counter() - start) * 1000
+
+        print(f"\n{size:,} tasks  (load: json {json_load:.0f} ms, sqlite migrate+load {sqlite_load:.0f} ms)")
+        print(f"{'query':<22}{'json ms':>12}{'sqlite ms':>12}{'rows':>10}")
+        queries = [(name, "All") for name in FILTERS] + [
+            ("All", "Home"),
+            ("This Week", "Activities"),
+            ("Today", "School"),
+        ]
+        for active_filter, category in queries:
+            json_ms = median_ms(lambda: store.filter_tasks(active_filter, category, now), repeat)
+            sqlite_ms = median_ms(lambda: sqlite.filter_ids(active_filter, category, now), repeat)
+            rows = len(store.filter_tasks(active_filter, category, now))
+            label = f"{active_filter}/{category}"
+            print(f"{label:<22}{json_ms:>12.2f}{sqlite_ms:>12.2f}{rows:>10,}")
+        sqlite.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    for size in args.sizes:
+        run(size, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""Memory footprint of loaded tasks: plain dicts vs. Task records.
+
+Usage: python3 benchmarks/bench_memory.py [--sizes 10000 100000 1000000]
+"""
+
+import argparse
+import gc
+import json
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import make_tasks  # noqa: E402
+from task_store import Task, TaskStore  # noqa: E402
+
+
+def traced(build):
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+
+    print(f"{'tasks':>10}{'dicts':>12}{'records':>12}{'saving':>9}{'store total':>14}{'per task':>10}")
+    for size in args.sizes:
+        encoded = json.dumps(make_tasks(size))
+        dicts = traced(lambda: json.loads(encoded))
+        records = traced(lambda: [Task(task) for task in json.loads(encoded)])
+        store = traced(lambda: TaskStore(json.loads(encoded)))
+        print(
+            f"{size:>10,}{dicts / 2**20:>10.1f}MB{records / 2**20:>10.1f}MB"
+            f"{1 - records / dicts:>8.0%}{store / 2**20:>12.1f}MB{store / size:>9.0f}B"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Per-refresh due-date parse cost: original strptime paths vs. cached due times.
+
+Usage: python3 benchmarks/bench_parse.py [--sizes 1000 10000 100000]
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import make_tasks  # noqa: E402
+from reminders import ReminderQueue  # noqa: E402
+from task_store import DATE_FORMAT, TaskStore, _parse_due, parse_datetime  # noqa: E402
+
+
+def strptime_or_none(value):
+    try:
+        return datetime.strptime(value, DATE_FORMAT)
+    except ValueError:
+        return None
+
+
+def legacy_refresh(tasks, now):
+    """One refresh as the planner did it before due times were cached."""
+    today = now.date()
+    filtered = [
+        task
+        for task in tasks
+        if task["status"] != "Done"
+        and (strptime_or_none(task["due"]) or datetime.max).date() == today
+    ]
+    filtered.sort(key=lambda task: strptime_or_none(task["due"]) or datetime.max)
+    top = [
+        task
+        for task in tasks
+        if task["status"] == "Open"
+        and (strptime_or_none(task["due"]) or datetime.max).date() == today
+    ]
+    top.sort(key=lambda task: strptime_or_none(task["due"]) or datetime.max)
+    for task in tasks:
+        if task["status"] != "Open" or task["notified"]:
+            continue
+        due = strptime_or_none(task["due"])
+        if due and now >= due - timedelta(minutes=int(task["remind"])):
+            pass
+    return filtered, top[:3]
+
+
+def cached_refresh(store, reminders, now):
+    filtered = store.filter_tasks("Today", "All", now)
+    top = store.top_today(now)
+    reminders.next_time()
+    return filtered, top
+
+
+def timed(func, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    args = parser.parse_args()
+
+    print(f"{'tasks':>9}{'strptime all':>15}{'parse cold':>13}{'parse warm':>13}"
+          f"{'legacy refresh':>17}{'cached refresh':>17}")
+    for size in args.sizes:
+        now = datetime.now()
+        tasks = make_tasks(size, now=now)
+        dues = [task["due"] for task in tasks]
+
+        strptime_ms = timed(lambda: [strptime_or_none(due) for due in dues])
+        _parse_due.cache_clear()
+        cold_ms = timed(lambda: [parse_datetime(due) for due in dues], repeat=1)
+        warm_ms = timed(lambda: [parse_datetime(due) for due in dues])
+
+        store = TaskStore(tasks)
+        reminders = ReminderQueue(store)
+        legacy_ms = timed(lambda: legacy_refresh(tasks, now))
+        cached_ms = timed(lambda: cached_refresh(store, reminders, now))
+        print(f"{size:>9,}{strptime_ms:>13.1f}ms{cold_ms:>11.1f}ms{warm_ms:>11.1f}ms"
+              f"{legacy_ms:>15.1f}ms{cached_ms:>15.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
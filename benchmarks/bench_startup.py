@@ -0,0 +1,69 @@
+"""Time-to-first-frame and time-to-interactive for the planner window.
+
+Each size runs in a fresh process against a synthetic tasks.json. Needs a
+display (or Xvfb).
+
+Usage: python3 benchmarks/bench_startup.py [--sizes 1000 10000 100000]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def measure(directory):
+    os.chdir(directory)
+    import tkinter as tk
+
+    import planner
+
+    start = time.perf_counter()
+    root = tk.Tk()
+    app = planner.PlannerApp(root)
+    root.update()
+    first_frame = time.perf_counter() - start
+    while app.loading:
+        root.update()
+        time.sleep(0.001)
+    root.update()
+    interactive = time.perf_counter() - start
+    root.destroy()
+    return {"first_frame_ms": first_frame * 1000, "interactive_ms": interactive * 1000}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--child", metavar="DIR", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure(args.child)))
+        return
+
+    from benchmarks.synthetic import make_tasks
+    from storage import JsonStorage
+
+    print(f"{'tasks':>9}{'first frame':>14}{'interactive':>14}")
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as directory:
+            JsonStorage(os.path.join(directory, "tasks.json")).save(make_tasks(size))
+            output = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--child", directory],
+                check=True,
+                capture_output=True,
+                text=True,
+            ).stdout
+        result = json.loads(output.splitlines()[-1])
+        print(f"{size:>9,}{result['first_frame_ms']:>12.0f}ms{result['interactive_ms']:>12.0f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,265 @@
+"""Benchmark the planner hot paths on synthetic data and compare to a baseline.
+
+Times load_tasks, save_tasks, get_filtered_tasks (per filter), name search,
+get_top_today_tasks, check_reminders, refresh_task_list, the month and
+agenda views and importing an .ics export of the same tasks. With a display
+the real PlannerApp runs on a withdrawn Tk root; without one the same paths
+run against TaskStore directly and refresh_task_list covers only the data
+side of a refresh.
+
+Timings depend on the machine, so no baseline ships with the repository.
+Record one on the machine that will run the comparison, then compare later
+runs against it; the run exits with status 1 on a regression.
+
+Usage:
+    python3 benchmarks/bench_suite.py --sizes 1000 10000 100000 --output baseline.json
+    python3 benchmarks/bench_suite.py --sizes 1000 10000 100000 --baseline baseline.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.synthetic import make_tasks  # noqa: E402
+from interchange import export_tasks, import_tasks  # noqa: E402
+from storage import JsonStorage  # noqa: E402
+from task_store import FILTERS  # noqa: E402
+
+NOISE_FLOOR_MS = 1.0
+SEARCH_QUERIES = ["math", "read 12", "zzz"]
+
+
+def time_call(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return {"median_ms": statistics.median(timings), "min_ms": min(timings)}
+
+
+def open_tk_root():
+    try:
+        import tkinter as tk
+
+        root = tk.Tk()
+    except Exception:
+        return None
+    root.withdraw()
+    return root
+
+
+def app_operations(root):
+    import planner
+
+    app = planner.PlannerApp(root)
+
+    def load_tasks():
+        # The path a start or profile switch takes: read on the loader
+        # thread, then finish_loading on the Tk thread.
+        if not app.loading:
+            app.start_loading()
+        while app.loading:
+            root.update()
+            time.sleep(0.001)
+
+    load_tasks()
+
+    def filtered(name):
+        def run():
+            app.active_filter = name
+            return app.get_filtered_tasks()
+
+        return run
+
+    def searched(query):
+        def run():
+            app.active_filter = "All"
+            app.search_var.set(query)
+            try:
+                return app.get_filtered_tasks()
+            finally:
+                app.search_var.set("")
+
+        return run
+
+    def save_tasks():
+        app.saver.mark_dirty()
+        app.saver.flush()
+
+    operations = {"load_tasks": load_tasks, "save_tasks": save_tasks}
+    for name in FILTERS:
+        operations[f"get_filtered_tasks[{name}]"] = filtered(name)
+    for query in SEARCH_QUERIES:
+        operations[f"search[{query}]"] = searched(query)
+    operations["get_top_today_tasks"] = app.get_top_today_tasks
+    operations["check_reminders"] = app.check_reminders
+    operations["refresh_task_list"] = app.refresh_task_list
+    operations["month_view"] = app.month_view.draw
+    operations["agenda_view"] = app.agenda_view.draw
+    return operations, app.on_close
+
+
+def store_operations(path):
+    from reminders import ReminderQueue
+    from search_index import SearchIndex
+    from task_store import TaskStore, with_defaults
+
+    storage = JsonStorage(path)
+    state = {}
+
+    def load_tasks():
+        state["store"] = TaskStore(with_defaults(task) for task in storage.load())
+        state["reminders"] = ReminderQueue(state["store"])
+        state["search"] = SearchIndex(state["store"])
+
+    def check_reminders():
+        store = state["store"]
+        due_tasks = state["reminders"].pop_due(datetime.now())
+        for task in due_tasks:
+            store.update(task["id"], {"notified": True})
+        if due_tasks:
+            storage.commit(store)
+        state["reminders"].next_time()
+
+    def refresh_task_list():
+        state["store"].top_today()
+        state["store"].filter_tasks("Today", "All")
+
+    def agenda_view():
+        # About one screen of agenda rows, each with a short preview.
+        store = state["store"]
+        today = datetime.now().date()
+        store.category_counts_by_day(today, 10)
+        for offset in range(10):
+            list(zip(range(3), store.iter_open_by_day(today + timedelta(days=offset))))
+
+    load_tasks()
+    operations = {
+        "load_tasks": load_tasks,
+        "save_tasks": lambda: storage.commit(state["store"]),
+    }
+    for name in FILTERS:
+        operations[f"get_filtered_tasks[{name}]"] = (
+            lambda name=name: state["store"].filter_tasks(name, "All")
+        )
+    for query in SEARCH_QUERIES:
+        operations[f"search[{query}]"] = (
+            lambda query=query: state["search"].filter_tasks(query, "All", "All")
+        )
+    operations["get_top_today_tasks"] = lambda: state["store"].top_today()
+    operations["check_reminders"] = check_reminders
+    operations["refresh_task_list"] = refresh_task_list
+    operations["month_view"] = lambda: state["store"].category_counts_by_day(
+        datetime.now().date().replace(day=1), 31
+    )
+    operations["agenda_view"] = agenda_view
+    return operations, lambda: None
+
+
+def run_size(size, repeat, root):
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "tasks.json")
+        tasks = make_tasks(size)
+        JsonStorage(path).save(tasks)
+        ics_path = os.path.join(directory, "tasks.ics")
+        export_tasks(ics_path, tasks)
+        del tasks
+        os.chdir(directory)
+        try:
+            if root is not None:
+                operations, close = app_operations(root)
+            else:
+                operations, close = store_operations(path)
+            operations["import_ics"] = lambda: import_tasks(ics_path)
+            results = {}
+            for name, func in operations.items():
+                heavy = name in ("load_tasks", "save_tasks", "import_ics")
+                results[name] = time_call(func, max(1, repeat // 3) if heavy else repeat)
+            close()
+        finally:
+            os.chdir(cwd)
+    return results
+
+
+def compare(current, baseline, threshold):
+    regressions = []
+    print(f"\n{'size':>9}  {'operation':<30}{'baseline':>11}{'current':>11}{'ratio':>8}")
+    for size, operations in current["results"].items():
+        for name, stats in operations.items():
+            before = baseline.get("results", {}).get(size, {}).get(name)
+            if before is None:
+                continue
+            ratio = stats["median_ms"] / max(before["median_ms"], 1e-6)
+            slower = stats["median_ms"] - before["median_ms"] > NOISE_FLOOR_MS
+            flag = "  REGRESSION" if ratio > threshold and slower else ""
+            if flag:
+                regressions.append((size, name, ratio))
+            print(
+                f"{int(size):>9,}  {name:<30}{before['median_ms']:>9.2f}ms"
+                f"{stats['median_ms']:>9.2f}ms{ratio:>7.2f}x{flag}"
+            )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__.split("\n\nUsage:")[0],
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument(
+        "--baseline",
+        help="results file to compare against, written earlier by --output on this machine",
+    )
+    parser.add_argument("--threshold", type=float, default=1.25)
+    parser.add_argument("--no-tk", action="store_true", help="skip the Tk app even if a display exists")
+    args = parser.parse_args()
+
+    root = None if args.no_tk else open_tk_root()
+    current = {
+        "meta": {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "mode": "tk" if root is not None else "store",
+        },
+        "results": {},
+    }
+    for size in args.sizes:
+        current["results"][str(size)] = run_size(size, args.repeat, root)
+        print(f"{size:>9,} tasks")
+        for name, stats in current["results"][str(size)].items():
+            print(f"           {name:<30}{stats['median_ms']:>10.2f}ms")
+    if root is not None:
+        root.destroy()
+
+    with open(args.output, "w", encoding="utf-8") as file:
+        json.dump(current, file, indent=2)
+    print(f"\nWrote {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as file:
+            baseline = json.load(file)
+        if baseline.get("meta", {}).get("mode") != current["meta"]["mode"]:
+            print("Warning: baseline was recorded in a different mode.")
+        regressions = compare(current, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) over {args.threshold:.2f}x")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+import random
+import uuid
+from datetime import datetime, timedelta
+
+from task_store import DATE_FORMAT
+
+CATEGORY_WEIGHTS = {"School": 60, "Home": 25, "Activities": 15}
+REMIND_CHOICES = [0, 5, 10, 15, 30, 60]
+NAMES = [
+    "Math worksheet",
+    "Read chapter",
+    "Spelling practice",
+    "Science project",
+    "Piano practice",
+    "Soccer training",
+    "Tidy room",
+    "Feed the cat",
+    "History essay",
+    "Art homework",
+]
+
+
+def make_tasks(count, now=None, seed=0):
+    """Return ``count`` task dicts spread from 30 days ago to 60 days ahead.
+
+    About a fifth are Done and past-due open tasks are mostly notified, which
+    roughly matches a long-lived planner file.
+    """
+    rng = random.Random(seed)
+    now = (now or datetime.now()).replace(second=0, microsecond=0)
+    start = now.replace(hour=0, minute=0) - timedelta(days=30)
+    categories = list(CATEGORY_WEIGHTS)
+    weights = list(CATEGORY_WEIGHTS.values())
+    tasks = []
+    for _ in range(count):
+        due = start + timedelta(
+            days=rng.randrange(90), minutes=7 * 60 + 5 * rng.randrange(168)
+        )
+        status = "Done" if rng.random() < 0.2 else "Open"
+        tasks.append(
+            {
+                "id": str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+                "name": f"{rng.choice(NAMES)} {rng.randrange(1000)}",
+                "due": due.strftime(DATE_FORMAT),
+                "remind": rng.choice(REMIND_CHOICES),
+                "category": rng.choices(categories, weights)[0],
+                "status": status,
+                "notified": status == "Open" and due < now and rng.random() < 0.9,
+            }
+        )
+    return tasks
@@ -0,0 +1,64 @@
+from collections import deque
+
+UNDO_LIMIT = 100
+
+
+class UndoHistory:
+    """Bounded undo/redo built from inverse change batches.
+
+    Every change goes through ``TaskStore.apply_batch``, the same path the
+    storage listeners persist, and the inverse batch it returns is kept
+    instead of a copy of the task list. Memory therefore grows with the
+    size of recent edits, capped at ``limit`` batches, not with the data.
+    """
+
+    def __init__(self, store, limit=UNDO_LIMIT):
+        self.store = store
+        self._undo = deque(maxlen=limit)
+        self._redo = deque(maxlen=limit)
+
+    def can_undo(self):
+        return bool(self._undo)
+
+    def can_redo(self):
+        return bool(self._redo)
+
+    def apply(self, changes):
+        inverse = self.store.apply_batch(changes)
+        if inverse:
+            self._undo.append(inverse)
+            self._redo.clear()
+        return inverse
+
+    def undo(self):
+        """Revert the latest batch and return the task ids it touched."""
+        return self._replay(self._undo, self._redo)
+
+    def redo(self):
+        return self._replay(self._redo, self._undo)
+
+    def forget(self, task_ids):
+        """Drop entries touching tasks another program has since changed."""
+        task_ids = set(task_ids)
+        for entries in (self._undo, self._redo):
+            kept = [
+                changes
+                for changes in entries
+                if not any(task_id in task_ids for _, task_id, _ in changes)
+            ]
+            entries.clear()
+            entries.extend(kept)
+
+    def _replay(self, source, target):
+        if not source:
+            return []
+        changes = source.pop()
+        try:
+            inverse = self.store.apply_batch(changes)
+        except KeyError:
+            # Another process changed these tasks since; the entry no longer
+            # applies, and neither do the older ones built on top of it.
+            source.clear()
+            raise
+        target.append(inverse)
+        return [task_id for _, task_id, _ in changes]
@@ -0,0 +1,623 @@
+"""Import tasks from, and export them to, iCalendar (.ics) and CSV files.
+
+Files are read line by line, so memory grows with the tasks kept rather than
+the size of the file. Records are turned into task fields and validated with
+``check_task_fields`` in chunks; for big files the chunks go to a process
+pool. Duplicates, within the file or against tasks already in the planner,
+are matched by ``task_key``: the name, ignoring case and spacing, plus the
+due time.
+"""
+
+import codecs
+import csv
+import os
+import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta, timezone
+from functools import lru_cache
+from multiprocessing import get_context
+
+from recurrence import REPEAT_RULES
+from storage import fsync_directory
+from task_store import (
+    CATEGORIES,
+    DATE_FORMAT,
+    REMIND_OPTIONS,
+    TASK_DEFAULTS,
+    check_task_fields,
+    parse_datetime,
+)
+
+FILE_KINDS = {".ics": "ics", ".ical": "ics", ".csv": "csv"}
+ALL_DAY_TIME = "08:00"
+DEFAULT_REMIND = REMIND_OPTIONS[1]
+IMPORT_CHUNK_RECORDS = 2000
+PARALLEL_IMPORT_BYTES = 4 << 20
+MAX_IMPORT_WORKERS = 8
+CHUNK_SIZE = 1 << 20
+MAX_PROBLEMS = 20
+CSV_COLUMNS = ("name", "due", "remind", "category", "status", "repeat")
+CSV_ALIASES = {
+    "name": "name",
+    "title": "name",
+    "summary": "name",
+    "subject": "name",
+    "task": "name",
+    "assignment": "name",
+    "due": "due",
+    "due date": "due",
+    "deadline": "due",
+    "date": "due",
+    "start": "due",
+    "start date": "due",
+    "dtstart": "due",
+    "time": "time",
+    "due time": "time",
+    "start time": "time",
+    "remind": "remind",
+    "reminder": "remind",
+    "remind minutes": "remind",
+    "reminder minutes": "remind",
+    "category": "category",
+    "categories": "category",
+    "type": "category",
+    "status": "status",
+    "repeat": "repeat",
+}
+CSV_TIME_FORMATS = ("%H:%M", "%H:%M:%S", "%I:%M %p", "%I:%M%p", "%I %p")
+# Rule names or the labels the dialog shows; anything else is reported.
+REPEAT_NAMES = {"": None, "never": None}
+REPEAT_NAMES.update((rule, rule) for rule in REPEAT_RULES)
+REPEAT_NAMES.update((label.casefold(), rule) for rule, label in REPEAT_RULES.items())
+DONE_WORDS = frozenset(("done", "completed", "complete"))
+ICS_RULES = {
+    "daily": "FREQ=DAILY",
+    "weekdays": "FREQ=WEEKLY;BYDAY=MO,TU,WE,TH,FR",
+    "weekly": "FREQ=WEEKLY",
+}
+ICS_LINE_OCTETS = 75
+WEEKDAYS = frozenset(("MO", "TU", "WE", "TH", "FR"))
+
+_DURATION = re.compile(
+    r"([+-]?)P(?:(\d+)W)?(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?)?$"
+)
+_ICS_ESCAPE = re.compile(r"\\(.)")
+_ICS_BEGIN = re.compile(rb"^BEGIN:(?:VEVENT|VTODO)[ \t]*\r?$", re.M | re.I)
+_ICS_RECORD = re.compile(
+    rb"^BEGIN:(VEVENT|VTODO)[ \t]*\r?\n(.*?)^END:\1[ \t]*\r?$", re.M | re.S | re.I
+)
+_ICS_FOLD = re.compile(r"\r?\n[ \t]")
+_ICS_ALARM = re.compile(r"^BEGIN:VALARM\b.*?^END:VALARM\b", re.M | re.S | re.I)
+_ICS_PROPERTY = re.compile(
+    r"^(SUMMARY|DTSTART|DUE|CATEGORIES|STATUS|RRULE|TRIGGER)([;:].*?)\r?$", re.M | re.I
+)
+
+
+def file_kind(path):
+    kind = FILE_KINDS.get(os.path.splitext(path)[1].lower())
+    if kind is None:
+        raise ValueError("Pick an iCalendar (.ics) or CSV (.csv) file.")
+    return kind
+
+
+def task_key(task):
+    """What makes two tasks the same for import: name and due time."""
+    return " ".join(str(task.get("name", "")).casefold().split()), task.get("due")
+
+
+class ImportResult:
+    """Tasks read from an import file, and what was left out of them."""
+
+    def __init__(self):
+        self.tasks = []
+        self.duplicates = 0
+        self.skipped = 0
+        self.problems = []
+
+    def discard_known(self, keys):
+        """Drop tasks whose key is in ``keys``, e.g. ones already in the planner."""
+        keys = set(keys)
+        kept = [task for task in self.tasks if task_key(task) not in keys]
+        self.duplicates += len(self.tasks) - len(kept)
+        self.tasks = kept
+
+    def summary(self):
+        count = len(self.tasks)
+        lines = [f"Imported {count} task{'' if count == 1 else 's'}."]
+        if self.duplicates:
+            lines.append(f"Left out {self.duplicates} that were already there or listed twice.")
+        if self.skipped:
+            lines.append(f"Skipped {self.skipped} that couldn't be read, for example:")
+            lines.extend(f"  record {number}: {reason}" for number, reason in self.problems[:3])
+        return "\n".join(lines)
+
+
+def import_tasks(path, progress=None, workers=None, now=None):
+    """Read an .ics or .csv file into new task dicts (without ids).
+
+    ``workers`` is the number of processes that parse records; by default
+    files over ``PARALLEL_IMPORT_BYTES`` use several and smaller ones are
+    parsed in this process. ``progress(fraction)`` is called as the file is
+    read.
+    """
+    kind = file_kind(path)
+    if workers is None:
+        workers = import_workers(os.path.getsize(path))
+    if kind == "ics":
+        records = iter_ics_records(iter_chunks(path, progress))
+    else:
+        records = iter_csv_records(iter_lines(path, progress))
+    result = ImportResult()
+    seen = set()
+    for tasks, problems in _parse_chunks(kind, records, workers, now or datetime.now()):
+        result.skipped += len(problems)
+        result.problems.extend(problems[: MAX_PROBLEMS - len(result.problems)])
+        for task in tasks:
+            key = task_key(task)
+            if key in seen:
+                result.duplicates += 1
+                continue
+            seen.add(key)
+            result.tasks.append(task)
+    return result
+
+
+def import_workers(size):
+    if size < PARALLEL_IMPORT_BYTES:
+        return 1
+    # Only the CPUs this process may run on, which can be fewer than the machine has.
+    if hasattr(os, "sched_getaffinity"):
+        cpus = len(os.sched_getaffinity(0))
+    else:
+        cpus = os.cpu_count() or 1
+    return max(1, min(MAX_IMPORT_WORKERS, cpus))
+
+
+def _parse_chunks(kind, records, workers, now):
+    chunks = _chunked(records, IMPORT_CHUNK_RECORDS)
+    if workers <= 1:
+        for first, chunk in chunks:
+            yield parse_chunk(kind, first, chunk, now)
+        return
+    # Spawned rather than forked: the planner has Tk and worker threads
+    # running, which a forked child would inherit mid-flight.
+    with ProcessPoolExecutor(workers, mp_context=get_context("spawn")) as pool:
+        # Only a few chunks are in flight at once, so reading never runs far
+        # ahead of parsing; results come back in file order.
+        pending = deque()
+        for first, chunk in chunks:
+            pending.append(pool.submit(parse_chunk, kind, first, chunk, now))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def _chunked(records, size):
+    chunk = []
+    first = 1
+    for number, record in enumerate(records, 1):
+        chunk.append(record)
+        if len(chunk) == size:
+            yield first, chunk
+            chunk = []
+            first = number + 1
+    if chunk:
+        yield first, chunk
+
+
+def parse_chunk(kind, first, records, now):
+    """Turn raw records into tasks; returns ``(tasks, [(number, reason)])``."""
+    to_fields = ics_fields if kind == "ics" else csv_fields
+    tasks = []
+    problems = []
+    for number, record in enumerate(records, first):
+        try:
+            tasks.append(new_task(to_fields(record), now))
+        except ValueError as error:
+            problems.append((number, str(error.args[-1]) if error.args else "Unreadable."))
+    return tasks, problems
+
+
+def new_task(fields, now):
+    task = check_task_fields(fields)
+    task["status"] = "Done" if fields.get("status") == "Done" else "Open"
+    if task["repeat"] is None:
+        del task["repeat"]
+        # Don't pop up reminders for everything that is already past.
+        due = parse_datetime(task["due"])
+        task["notified"] = due - timedelta(minutes=task["remind"]) <= now
+    else:
+        task["notified"] = False
+    return task
+
+
+def iter_chunks(path, progress=None, chunk_size=CHUNK_SIZE):
+    """Yield a file's bytes a chunk at a time, reporting how far through it is."""
+    size = os.path.getsize(path)
+    with open(path, "rb") as file:
+        if file.read(len(codecs.BOM_UTF8)) != codecs.BOM_UTF8:
+            file.seek(0)
+        for chunk in iter(lambda: file.read(chunk_size), b""):
+            yield chunk
+            if progress is not None:
+                progress(min(file.tell() / size, 1.0))
+
+
+def iter_lines(path, progress=None):
+    pending = b""
+    for chunk in iter_chunks(path, progress):
+        lines = (pending + chunk).splitlines(keepends=True)
+        # A trailing "\r" may be the first half of a "\r\n".
+        pending = lines.pop() if lines and not lines[-1].endswith(b"\n") else b""
+        yield from lines
+    if pending:
+        yield pending
+
+
+def iter_ics_records(chunks):
+    """Yield the raw body of each VEVENT and VTODO.
+
+    Records are only cut out here; decoding, unfolding and picking out
+    properties is left to ``ics_fields``, which runs in the worker
+    processes.
+    """
+    pending = b""
+    for chunk in chunks:
+        pending += chunk
+        end = 0
+        for match in _ICS_RECORD.finditer(pending):
+            yield match.group(2)
+            end = match.end()
+        # Keep only what can still start a record: the last BEGIN, or else
+        # the last partial line.
+        begins = [match.start() for match in _ICS_BEGIN.finditer(pending, end)]
+        if begins:
+            end = begins[0]
+        else:
+            end = max(end, pending.rfind(b"\n") + 1)
+        pending = pending[end:]
+
+
+def ics_properties(body):
+    """Map the properties the planner uses to ``(params, value)``.
+
+    The first of each wins, and TRIGGER comes from the first alarm.
+    """
+    text = body.decode("utf-8", "replace")
+    if "\n " in text or "\n\t" in text:
+        text = _ICS_FOLD.sub("", text)
+    properties = {}
+    alarm = _ICS_ALARM.search(text)
+    if alarm is not None:
+        for name, rest in _ICS_PROPERTY.findall(alarm.group()):
+            if name.upper() == "TRIGGER":
+                properties["TRIGGER"] = _split_property(name + rest)[1:]
+                break
+        text = _ICS_ALARM.sub("", text)
+    for name, rest in _ICS_PROPERTY.findall(text):
+        name = name.upper()
+        if name != "TRIGGER" and name not in properties:
+            properties[name] = _split_property(name + rest)[1:]
+    return properties
+
+
+def _split_property(line):
+    colon = line.find(":")
+    quote = line.find('"', 0, colon)
+    if quote != -1:
+        # A colon can sit inside a quoted parameter value.
+        colon = line.find(":", line.find('"', quote + 1) + 1)
+    if colon == -1:
+        return None, {}, ""
+    name, *parts = line[:colon].split(";")
+    params = {}
+    for part in parts:
+        key, _, value = part.partition("=")
+        params[key.upper()] = value.strip('"')
+    return name.upper(), params, line[colon + 1 :]
+
+
+def ics_fields(body):
+    record = ics_properties(body)
+    summary = record.get("SUMMARY")
+    status = record.get("STATUS")
+    return {
+        "name": _ics_text(summary[1]) if summary else "",
+        "due": _ics_due(record.get("DUE") or record.get("DTSTART")),
+        "remind": _ics_remind(record.get("TRIGGER")),
+        "category": _category(_ics_text(record.get("CATEGORIES", ({}, ""))[1]).split(",")),
+        "repeat": _ics_repeat(record.get("RRULE")),
+        "status": "Done" if status and status[1].strip().upper() == "COMPLETED" else "Open",
+    }
+
+
+def _ics_text(value):
+    if "\\" not in value:
+        return value
+    return _ICS_ESCAPE.sub(lambda match: "\n" if match.group(1) in "nN" else match.group(1), value)
+
+
+def _ics_due(prop):
+    if prop is None:
+        return None
+    params, value = prop
+    value = value.strip()
+    try:
+        if params.get("VALUE", "").upper() == "DATE" or len(value) == 8:
+            return f"{date(int(value[:4]), int(value[4:6]), int(value[6:8]))} {ALL_DAY_TIME}"
+        if len(value.rstrip("Zz")) != 15 or value[8] not in "Tt":
+            return None
+        moment = datetime(
+            int(value[:4]),
+            int(value[4:6]),
+            int(value[6:8]),
+            int(value[9:11]),
+            int(value[11:13]),
+            int(value[13:15]),
+        )
+    except ValueError:
+        # check_task_fields reports the missing date.
+        return None
+    if value[-1:] in "Zz":
+        moment = moment.replace(tzinfo=timezone.utc)
+    elif "TZID" in params:
+        moment = moment.replace(tzinfo=_zone(params["TZID"]))
+    return _local(moment).strftime(DATE_FORMAT)
+
+
+@lru_cache(maxsize=64)
+def _zone(name):
+    # Unknown zone names (Windows ones, say) are read as local time.
+    try:
+        from zoneinfo import ZoneInfo
+
+        return ZoneInfo(name)
+    except (ImportError, ValueError, KeyError, OSError):
+        return None
+
+
+def _local(moment):
+    if moment.tzinfo is None:
+        return moment
+    return moment.astimezone().replace(tzinfo=None)
+
+
+def _ics_remind(prop):
+    if prop is None or prop[0].get("VALUE", "").upper() == "DATE-TIME":
+        return DEFAULT_REMIND
+    match = _DURATION.match(prop[1].strip())
+    if match is None:
+        return DEFAULT_REMIND
+    sign, weeks, days, hours, minutes, seconds = match.groups()
+    before = (
+        int(weeks or 0) * 7 * 24 * 60
+        + int(days or 0) * 24 * 60
+        + int(hours or 0) * 60
+        + int(minutes or 0)
+        + int(seconds or 0) // 60
+    )
+    # Alarms after the start become "at due time".
+    return _nearest_remind(before if sign == "-" else 0)
+
+
+def _nearest_remind(minutes):
+    return min(REMIND_OPTIONS, key=lambda option: (abs(option - minutes), option))
+
+
+def _ics_repeat(prop):
+    if prop is None:
+        return None
+    parts = dict(part.partition("=")[::2] for part in prop[1].upper().split(";"))
+    # The planner's series never end and step one day or week at a time.
+    if "COUNT" in parts or "UNTIL" in parts or parts.get("INTERVAL", "1") != "1":
+        return None
+    days = {day.strip()[-2:] for day in parts.get("BYDAY", "").split(",") if day.strip()}
+    if parts.get("FREQ") == "DAILY" and not days:
+        return "daily"
+    if parts.get("FREQ") == "WEEKLY":
+        if days == WEEKDAYS:
+            return "weekdays"
+        if len(days) <= 1:
+            return "weekly"
+    return None
+
+
+def _category(names):
+    by_name = {category.casefold(): category for category in CATEGORIES}
+    for name in names:
+        category = by_name.get(name.strip().casefold())
+        if category is not None:
+            return category
+    return TASK_DEFAULTS["category"]
+
+
+def iter_csv_records(lines):
+    """Yield ``{column: text}`` for each row, with headers mapped by ``CSV_ALIASES``."""
+    reader = csv.reader(line.decode("utf-8", "replace") for line in lines)
+    header = next(reader, None)
+    if header is None:
+        return
+    columns = [
+        CSV_ALIASES.get(" ".join(cell.replace("_", " ").casefold().split())) for cell in header
+    ]
+    if "name" not in columns or "due" not in columns:
+        raise ValueError("The CSV file needs a name column and a due date column.")
+    for row in reader:
+        if any(cell.strip() for cell in row):
+            yield {column: cell for column, cell in zip(columns, row) if column is not None}
+
+
+def csv_fields(row):
+    remind = row.get("remind", "").strip()
+    repeat = row.get("repeat", "").strip()
+    return {
+        "name": row.get("name", ""),
+        "due": _csv_due(row.get("due", "").strip(), row.get("time", "").strip()),
+        "remind": _nearest_remind(int(remind)) if remind.isdigit() else remind or DEFAULT_REMIND,
+        "category": _category([row.get("category", "")]),
+        "repeat": REPEAT_NAMES.get(repeat.casefold(), repeat),
+        "status": "Done" if row.get("status", "").strip().casefold() in DONE_WORDS else "Open",
+    }
+
+
+def _csv_due(value, time_value):
+    if not value:
+        return None
+    try:
+        day = date.fromisoformat(value)
+    except ValueError:
+        pass
+    else:
+        return f"{day:%Y-%m-%d} {_csv_time(time_value)}"
+    if value[-1:] in "Zz":
+        value = f"{value[:-1]}+00:00"
+    try:
+        return _local(datetime.fromisoformat(value)).strftime(DATE_FORMAT)
+    except ValueError:
+        return value
+
+
+def _csv_time(value):
+    if not value:
+        return ALL_DAY_TIME
+    for time_format in CSV_TIME_FORMATS:
+        try:
+            return datetime.strptime(value.upper(), time_format).strftime("%H:%M")
+        except ValueError:
+            continue
+    return value
+
+
+def export_tasks(path, tasks):
+    """Write ``tasks`` to an .ics or .csv file and return how many were written.
+
+    The file is streamed to a temporary file and renamed into place.
+    """
+    kind = file_kind(path)
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w", encoding="utf-8", newline="") as file:
+        count = write_ics(file, tasks) if kind == "ics" else write_csv(file, tasks)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temp_path, path)
+    fsync_directory(path)
+    return count
+
+
+def write_csv(file, tasks):
+    writer = csv.writer(file)
+    writer.writerow(CSV_COLUMNS)
+    count = 0
+    for task in tasks:
+        writer.writerow(
+            [
+                task.get("name", ""),
+                task.get("due", ""),
+                task.get("remind", DEFAULT_REMIND),
+                task.get("category", TASK_DEFAULTS["category"]),
+                task.get("status", "Open"),
+                task.get("repeat") or "",
+            ]
+        )
+        count += 1
+    return count
+
+
+def write_ics(file, tasks):
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+    def line(text):
+        file.write(_fold(text))
+        file.write("\r\n")
+
+    line("BEGIN:VCALENDAR")
+    line("VERSION:2.0")
+    line("PRODID:-//Kid Planner//EN")
+    count = 0
+    for task in tasks:
+        line("BEGIN:VTODO")
+        line(f"UID:{task['id']}")
+        line(f"DTSTAMP:{stamp}")
+        line(f"SUMMARY:{_ics_escape(task.get('name', ''))}")
+        due = parse_datetime(task.get("due"))
+        if due is not None:
+            line(f"DUE:{due:%Y%m%dT%H%M%S}")
+        line(f"CATEGORIES:{_ics_escape(task.get('category', TASK_DEFAULTS['category']))}")
+        line("STATUS:COMPLETED" if task.get("status") == "Done" else "STATUS:NEEDS-ACTION")
+        if task.get("repeat") in ICS_RULES:
+            line(f"RRULE:{ICS_RULES[task['repeat']]}")
+        if due is not None:
+            line("BEGIN:VALARM")
+            line("ACTION:DISPLAY")
+            line(f"DESCRIPTION:{_ics_escape(task.get('name', ''))}")
+            line(f"TRIGGER:-PT{task.get('remind', DEFAULT_REMIND)}M")
+            line("END:VALARM")
+        line("END:VTODO")
+        count += 1
+    line("END:VCALENDAR")
+    return count
+
+
+def _ics_escape(text):
+    return (
+        str(text)
+        .replace("\\", "\\\\")
+        .replace(";", "\\;")
+        .replace(",", "\\,")
+        .replace("\r\n", "\\n")
+        .replace("\n", "\\n")
+    )
+
+
+def _fold(text):
+    """Split a content line into 75-octet pieces, as iCalendar requires."""
+    if len(text) * 4 <= ICS_LINE_OCTETS or len(text.encode("utf-8")) <= ICS_LINE_OCTETS:
+        return text
+    pieces = []
+    start = 0
+    size = 0
+    limit = ICS_LINE_OCTETS
+    for index, char in enumerate(text):
+        width = len(char.encode("utf-8"))
+        if size + width > limit:
+            pieces.append(text[start:index])
+            start = index
+            size = 0
+            # Continuation lines start with a space, which counts too.
+            limit = ICS_LINE_OCTETS - 1
+        size += width
+    pieces.append(text[start:])
+    return "\r\n ".join(pieces)
+
+
+if __name__ == "__main__":
+    import argparse
+    import uuid
+
+    from storage import open_storage
+
+    parser = argparse.ArgumentParser(description="Import or export tasks as .ics or .csv.")
+    parser.add_argument("command", choices=["import", "export"])
+    parser.add_argument("file")
+    parser.add_argument("--tasks", default="tasks.json", help="the planner's tasks file")
+    args = parser.parse_args()
+    storage = open_storage(os.environ.get("PLANNER_STORAGE", "json"), args.tasks)
+    try:
+        if args.command == "export":
+            count = export_tasks(args.file, storage.iter_tasks(read_only=True) if storage.exists() else ())
+            print(f"Exported {count} tasks to {args.file}.")
+        else:
+            result = import_tasks(args.file)
+            with storage.lock():
+                tasks = storage.load() if storage.exists() else []
+                result.discard_known(task_key(task) for task in tasks)
+                for task in result.tasks:
+                    task["id"] = str(uuid.uuid4())
+                storage.save(tasks + result.tasks)
+            print(result.summary())
+    except (OSError, ValueError) as error:
+        parser.exit(1, f"{error}\n")
+    finally:
+        storage.close()
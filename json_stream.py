@@ -0,0 +1,169 @@
+import codecs
+import json
+import os
+import re
+
+CHUNK_SIZE = 1 << 16
+MAX_RECORD_CHARS = 1 << 18
+WHITESPACE = " \t\r\n"
+
+# A bad element ends at the next comma at the list's own level. Strings
+# are matched whole so brackets and commas inside them don't count.
+_STRUCTURE = re.compile(r'"(?:[^"\\]|\\.)*"|["{}\[\],]')
+# Fallback for an element whose brackets never balance: the next object.
+_RESYNC = re.compile(r",\s*\{")
+_decoder = json.JSONDecoder()
+
+
+class NotAList(ValueError):
+    """The file holds something other than a JSON list."""
+
+
+class BadRecord:
+    """Raw text of a list element that could not be decoded."""
+
+    def __init__(self, raw, reason):
+        self.raw = raw
+        self.reason = reason
+
+
+def iter_json_array(path, progress=None, chunk_size=CHUNK_SIZE):
+    """Yield the elements of a top-level JSON list one at a time.
+
+    Only about one chunk plus one element is held in memory. Elements that
+    fail to decode are yielded as ``BadRecord`` and parsing resumes at the
+    next element. ``progress(fraction)`` is called after every chunk read.
+    Raises NotAList if the file does not hold a JSON list at all.
+    """
+    with open(path, "rb") as file:
+        reader = _ArrayReader(file, os.fstat(file.fileno()).st_size, progress, chunk_size)
+        yield from reader.elements()
+
+
+class _ArrayReader:
+    def __init__(self, file, size, progress, chunk_size):
+        self.file = file
+        self.size = size
+        self.progress = progress
+        self.chunk_size = chunk_size
+        self.decoder = codecs.getincrementaldecoder("utf-8")()
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def elements(self):
+        if self.skip_whitespace() != "[":
+            raise NotAList("Tasks file does not contain a JSON list")
+        self.pos += 1
+        if self.skip_whitespace() == "]":
+            return
+        while True:
+            yield self.read_element()
+            char = self.skip_whitespace()
+            if char == ",":
+                self.pos += 1
+                if self.skip_whitespace() is None:
+                    return
+            elif char == "]" or char is None:
+                return
+            else:
+                yield self.skip_bad_element()
+                if self.skip_whitespace() != ",":
+                    return
+                self.pos += 1
+                if self.skip_whitespace() is None:
+                    return
+
+    def fill(self):
+        if self.eof:
+            return False
+        data = self.file.read(self.chunk_size)
+        self.eof = not data
+        self.buffer = self.buffer[self.pos:] + self.decoder.decode(data, final=self.eof)
+        self.pos = 0
+        if self.progress is not None:
+            self.progress(min(self.file.tell() / self.size, 1.0) if self.size else 1.0)
+        return not self.eof
+
+    def skip_whitespace(self):
+        while True:
+            buffer = self.buffer
+            while self.pos < len(buffer) and buffer[self.pos] in WHITESPACE:
+                self.pos += 1
+            if self.pos < len(buffer):
+                return buffer[self.pos]
+            if not self.fill() and self.pos >= len(self.buffer):
+                return None
+
+    def read_element(self):
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                # Either the element runs past the buffer or it is broken;
+                # read ahead until we can tell which.
+                if not self.eof and len(self.buffer) - self.pos < MAX_RECORD_CHARS:
+                    self.fill()
+                    continue
+                return self.skip_bad_element()
+            if end == len(self.buffer) and not self.eof and not isinstance(value, (dict, list)):
+                # A bare number may continue in the next chunk.
+                self.fill()
+                continue
+            self.pos = end
+            return value
+
+    def skip_bad_element(self):
+        depth = 0
+        scan = self.pos
+        while True:
+            match = _STRUCTURE.search(self.buffer, scan)
+            if match is None or (match.group() == '"' and not self.eof):
+                # Out of buffer, or a string runs on into the next chunk.
+                if self.eof or len(self.buffer) - self.pos >= MAX_RECORD_CHARS:
+                    return self.skip_to_next_object()
+                scan = (len(self.buffer) if match is None else match.start()) - self.pos
+                self.fill()
+                continue
+            token = match.group()
+            scan = match.end()
+            if token in "{[":
+                depth += 1
+            elif token in "}]":
+                depth -= 1
+                if depth < 0:
+                    # The list's own closing bracket.
+                    return self.bad_record(match.start())
+            elif token == "," and depth == 0:
+                return self.bad_record(match.start())
+
+    def bad_record(self, end):
+        text = self.buffer[self.pos:end][:MAX_RECORD_CHARS].strip()
+        self.pos = end
+        return BadRecord(text, "malformed JSON")
+
+    def skip_to_next_object(self):
+        raw = []
+        kept = 0
+        start = self.pos + 1
+        while True:
+            match = _RESYNC.search(self.buffer, start)
+            if match is not None:
+                end = match.start()
+            elif self.eof:
+                end = len(self.buffer)
+            else:
+                # Keep a short tail so a separator split across chunks is seen.
+                end = max(self.pos, len(self.buffer) - 16)
+            if kept < MAX_RECORD_CHARS:
+                piece = self.buffer[self.pos:end][: MAX_RECORD_CHARS - kept]
+                raw.append(piece)
+                kept += len(piece)
+            self.pos = end
+            if match is not None or self.eof:
+                text = "".join(raw).strip()
+                if match is None:
+                    text = text.rstrip("]").rstrip()
+                return BadRecord(text, "malformed JSON")
+            self.fill()
+            start = self.pos
@@ -0,0 +1,110 @@
+import queue
+import threading
+import time
+
+NOTIFY_BATCH_SECONDS = 0.25
+NOTIFY_POLL_MS = 100
+SUMMARY_NAMES = 3
+
+
+def summarize(notifications):
+    if len(notifications) == 1:
+        return notifications[0]
+    names = [message for _, message in notifications[:SUMMARY_NAMES]]
+    extra = len(notifications) - len(names)
+    if extra:
+        names.append(f"...and {extra} more")
+    return "Planner Reminders", "\n".join(names)
+
+
+class NotificationDispatcher:
+    """Sends desktop notifications from a worker thread.
+
+    Notifications submitted within ``batch_seconds`` of each other are sent
+    as one summary. When no notification backend is available the summary is
+    handed back to the Tk thread, via ``schedule`` (``root.after``), for
+    ``fallback`` to show.
+    """
+
+    def __init__(self, schedule, fallback, batch_seconds=NOTIFY_BATCH_SECONDS):
+        self.schedule = schedule
+        self.fallback = fallback
+        self.batch_seconds = batch_seconds
+        self._backend = None
+        self._backend_loaded = False
+        self._requests = queue.Queue()
+        self._results = queue.Queue()
+        self._in_flight = 0
+        self._polling = False
+        self._worker = threading.Thread(
+            target=self._run, name="notification-dispatcher", daemon=True
+        )
+        self._worker.start()
+
+    def notify(self, title, message):
+        self._in_flight += 1
+        self._requests.put((title, message))
+        if not self._polling:
+            self._polling = True
+            self.schedule(NOTIFY_POLL_MS, self._poll)
+
+    def close(self):
+        self._requests.put(None)
+
+    def _poll(self):
+        while True:
+            try:
+                count, result = self._results.get_nowait()
+            except queue.Empty:
+                break
+            self._in_flight -= count
+            if result is not None:
+                self.fallback(*result)
+        if self._in_flight > 0:
+            self.schedule(NOTIFY_POLL_MS, self._poll)
+        else:
+            self._polling = False
+
+    def _run(self):
+        while True:
+            first = self._requests.get()
+            if first is None:
+                return
+            time.sleep(self.batch_seconds)
+            batch = [first]
+            closing = False
+            while True:
+                try:
+                    item = self._requests.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    closing = True
+                    break
+                batch.append(item)
+            title, message = summarize(batch)
+            delivered = self._send(title, message)
+            self._results.put((len(batch), None if delivered else (title, message)))
+            if closing:
+                return
+
+    def _send(self, title, message):
+        backend = self._load_backend()
+        if backend is None:
+            return False
+        try:
+            backend.notify(title=title, message=message, timeout=10)
+        except Exception:
+            return False
+        return True
+
+    def _load_backend(self):
+        if not self._backend_loaded:
+            self._backend_loaded = True
+            try:
+                from plyer import notification
+
+                self._backend = notification
+            except Exception:
+                self._backend = None
+        return self._backend
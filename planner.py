@@ -1,47 +1,195 @@
+import argparse
+import bisect
 import calendar
-import json
+import functools
+import itertools
+import math
 import os
+import queue
+import threading
 import uuid
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, simpledialog, filedialog
+
+from api_server import DEFAULT_API_PORT, ApiServer, MainThreadDispatcher, ServiceUnavailable
+from history import UndoHistory
+from interchange import export_tasks, import_tasks, task_key
+from json_stream import NotAList
+from notifications import NotificationDispatcher
+from profiles import (
+    Profile,
+    ProfileCache,
+    ProfileRegistry,
+    day_entries,
+    read_profile_today,
+    today_index_path,
+    write_today_index,
+)
+from profiling import DEFAULT_PROFILE_PATH, Profiler
+from recurrence import REPEAT_RULES
+from reminders import ReminderQueue
+from saver import WriteBehindSaver
+from search_index import SearchIndex
+from storage import open_storage
+from task_store import (
+    CATEGORIES,
+    DATE_FORMAT,
+    EDITABLE_FIELDS,
+    FILTERS,
+    REMIND_OPTIONS,
+    Task,
+    TaskStore,
+    check_task_fields,
+    with_defaults,
+)
 
 TASKS_FILE = "tasks.json"
-DATE_FORMAT = "%Y-%m-%d %H:%M"
-REMIND_OPTIONS = [0, 5, 10, 15, 30, 60]
-CATEGORIES = ["School", "Home", "Activities"]
+STORAGE_MODE = os.environ.get("PLANNER_STORAGE", "json")
+REPEAT_OPTIONS = ["Never"] + list(REPEAT_RULES.values())
 CATEGORY_COLORS = {
     "School": "#4A90E2",
     "Home": "#50B27D",
     "Activities": "#F5A623",
 }
+LOAD_POLL_MS = 30
+REMINDER_MAX_SLEEP_MS = 5 * 60 * 1000
+DAY_CHECK_MAX_SLEEP_MS = 5 * 60 * 1000
+FILE_CHECK_MS = 2000
+SQL_FILTERS = ("All", "This Week")
+SQL_CATEGORY_SHARE = 0.3
+LIST_BUFFER_ROWS = 4
+CARD_MARGIN_X = 6
+CARD_MARGIN_Y = 8
+SHIFT_OPTIONS = [("Earlier by 1 day", -1), ("Later by 1 day", 1), ("Later by 1 week", 7)]
+BULK_REDRAW_THRESHOLD = 64
+PROFILED_METHODS = (
+    "build_store",
+    "finish_loading",
+    "get_filtered_tasks",
+    "refresh_task_list",
+    "update_task_views",
+    "check_reminders",
+    "send_reminder",
+)
+PROFILER = Profiler.from_environment()
+SEARCH_DEBOUNCE_MS = 80
+CALENDAR_CELLS = 6 * 7
+# Day backgrounds in the date picker for 0, 1, 2, 3 and 4+ open tasks.
+LOAD_COLORS = ["#FFFFFF", "#EEEBFF", "#DCD6FF", "#C6BDFF", "#AFA3FF"]
+VIEWS = ["List", "Month", "Agenda", "Everyone"]
+AGENDA_ROW_HEIGHT = 64
+AGENDA_WEEKS = 12
+AGENDA_WEEKS_BEFORE = 1
+AGENDA_BUFFER_DAYS = 14
+AGENDA_PREVIEW_TASKS = 3
+IMPORT_FILE_TYPES = [("Calendar or CSV", "*.ics *.ical *.csv"), ("All files", "*")]
+EXPORT_FILE_TYPES = [("iCalendar", "*.ics"), ("CSV", "*.csv")]
+TEXT_WIDGETS = (tk.Entry, ttk.Entry, tk.Text)
 
 
 class PlannerApp:
-    def __init__(self, root):
+    def __init__(self, root, api_port=None):
         self.root = root
         self.root.title("Kid Planner")
         self.root.geometry("1100x700")
         self.root.configure(bg="#F6F7FB")
         self.root.minsize(980, 640)
 
+        PROFILER.instrument(self, PROFILED_METHODS)
+        PROFILER.instrument(TaskCard, ("__init__", "show"), prefix="TaskCard.")
+
         self.font_title = ("Helvetica", 20, "bold")
         self.font_large = ("Helvetica", 14, "bold")
         self.font_body = ("Helvetica", 12)
         self.font_button = ("Helvetica", 12, "bold")
 
-        self.tasks = []
+        self.store = TaskStore()
+        self.profiles = ProfileRegistry(TASKS_FILE)
+        self.warm_profiles = ProfileCache()
+        self.cold_today = {}
+        self.storage = self.open_profile_storage(self.profiles.active)
+        # Looked up per call: switching profiles swaps the storage underneath.
+        self.store.subscribe(
+            lambda op, task_id, payload: self.storage.record(op, task_id, payload)
+        )
+        self.saver = WriteBehindSaver(
+            self.storage,
+            self.store,
+            self.root.after,
+            self.root.after_cancel,
+            before_save=self.merge_disk_changes,
+            on_error=self.show_save_error,
+        )
+        PROFILER.instrument(self.saver, ("_prepare", "_write"), prefix="saver.")
+        self.closing = False
+        self.save_error = None
         self.selected_task_id = None
+        self.selected_ids = set()
         self.active_filter = "Today"
         self.active_category = "All"
-
-        self.load_tasks()
+        self.active_view = "List"
+        self.reminder_after_id = None
+        self.reminder_armed_for = None
+        self.notifier = NotificationDispatcher(self.root.after, messagebox.showinfo)
+        self.reminders = ReminderQueue(self.store)
+        self.store.subscribe(lambda op, task_id, payload: self.schedule_reminder_check())
+        self.search_index = SearchIndex(self.store)
+        self.history = UndoHistory(self.store)
+        self.search_var = tk.StringVar()
+        self.search_after_id = None
+        self.loading = False
+        self.importing = False
+        self.current_day = datetime.now().date()
+        self.day_check_after_id = None
+        self.file_check_after_id = None
 
         self.build_ui()
-        self.refresh_task_list()
-        self.schedule_reminder_check()
-
-        self.root.bind("<Delete>", lambda event: self.delete_task())
+        self.start_loading()
+        self.api_server = None
+        if api_port is not None:
+            self.start_api_server(api_port)
+
+        self.root.bind("<Delete>", self.shortcut(self.delete_task))
+        self.root.bind("<Control-z>", self.shortcut(self.undo))
+        self.root.bind("<Control-y>", self.shortcut(self.redo))
+        self.root.bind("<Control-Z>", self.shortcut(self.redo))
+        self.root.bind("<Control-D>", lambda event: ProfilePanel(self.root))
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+
+    def shortcut(self, action):
+        # Window bindings also see keys typed into the search box, where
+        # Delete and Ctrl+Z/Ctrl+Y belong to the text.
+        def handler(event):
+            if not isinstance(event.widget, TEXT_WIDGETS):
+                action()
+
+        return handler
+
+    def on_close(self):
+        self.closing = True
+        saved = self.saver.flush()
+        self.closing = False
+        if not saved and not messagebox.askyesno(
+            "Couldn't save",
+            f"Your latest changes couldn't be saved ({self.save_error}). "
+            "Close anyway and lose them? Choose No to keep the planner open "
+            "and try closing again later.",
+        ):
+            return
+        if self.api_server is not None:
+            self.api_server.stop()
+            self.api_dispatcher.close()
+        self.notifier.close()
+        if self.loading:
+            self.storage.close()
+        else:
+            self.retire_profile(self.capture_profile())
+        for profile in self.warm_profiles.clear():
+            self.retire_profile(profile)
+        if PROFILER.enabled:
+            PROFILER.dump()
+        self.root.destroy()
 
     def build_ui(self):
         main_frame = tk.Frame(self.root, bg="#F6F7FB")
@@ -59,6 +207,28 @@ class PlannerApp:
             font=("Helvetica", 18, "bold"),
         ).pack(pady=(20, 12), padx=12, anchor=tk.W)
 
+        tk.Label(
+            sidebar,
+            text="PROFILE",
+            bg="#2D2F6F",
+            fg="#B8B9E0",
+            font=("Helvetica", 10, "bold"),
+        ).pack(pady=(12, 6), padx=12, anchor=tk.W)
+
+        self.profile_var = tk.StringVar(value=self.profiles.active)
+        self.profile_menu = ttk.Combobox(
+            sidebar,
+            textvariable=self.profile_var,
+            values=self.profiles.names,
+            state="readonly",
+            font=self.font_body,
+        )
+        self.profile_menu.pack(fill=tk.X, padx=12, pady=4)
+        self.profile_menu.bind(
+            "<<ComboboxSelected>>", lambda event: self.switch_profile(self.profile_var.get())
+        )
+        self.create_sidebar_button(sidebar, "➕ New Profile", lambda label: self.add_profile())
+
         tk.Label(
             sidebar,
             text="FILTERS",
@@ -67,7 +237,7 @@ class PlannerApp:
             font=("Helvetica", 10, "bold"),
         ).pack(pady=(12, 6), padx=12, anchor=tk.W)
 
-        for label in ["Today", "This Week", "All", "Done"]:
+        for label in FILTERS:
             self.create_sidebar_button(sidebar, label, self.set_filter)
 
         tk.Label(
@@ -81,6 +251,17 @@ class PlannerApp:
         for category in CATEGORIES:
             self.create_sidebar_button(sidebar, category, self.set_category)
 
+        tk.Label(
+            sidebar,
+            text="VIEWS",
+            bg="#2D2F6F",
+            fg="#B8B9E0",
+            font=("Helvetica", 10, "bold"),
+        ).pack(pady=(20, 6), padx=12, anchor=tk.W)
+
+        for view in VIEWS:
+            self.create_sidebar_button(sidebar, view, self.set_view)
+
         content = tk.Frame(main_frame, bg="#F6F7FB")
         content.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
 
@@ -109,6 +290,38 @@ class PlannerApp:
         )
         add_button.pack(side=tk.RIGHT)
 
+        self.files_menu = tk.Menu(self.root, tearoff=0)
+        self.files_menu.add_command(label="Import from .ics or .csv...", command=self.import_file)
+        self.files_menu.add_command(label="Export to .ics or .csv...", command=self.export_file)
+        self.files_button = tk.Button(
+            header,
+            text="📂 Files",
+            font=self.font_button,
+            bg="#FFFFFF",
+            fg="#2E2E4F",
+            relief=tk.FLAT,
+            padx=12,
+            pady=8,
+        )
+        self.files_button.configure(
+            command=lambda: self.popup_menu(self.files_menu, self.files_button)
+        )
+        self.files_button.pack(side=tk.RIGHT, padx=(0, 12))
+
+        search_entry = tk.Entry(
+            header,
+            textvariable=self.search_var,
+            font=self.font_body,
+            width=24,
+            relief=tk.FLAT,
+        )
+        search_entry.pack(side=tk.RIGHT, padx=(0, 16), ipady=6)
+        search_entry.bind("<Escape>", lambda event: self.search_var.set(""))
+        tk.Label(header, text="🔍", bg="#F6F7FB", font=self.font_body).pack(
+            side=tk.RIGHT, padx=(0, 4)
+        )
+        self.search_var.trace_add("write", self.on_search_changed)
+
         top_section = tk.Frame(content, bg="#F6F7FB")
         top_section.pack(fill=tk.X, pady=(0, 16))
 
@@ -122,6 +335,11 @@ class PlannerApp:
 
         self.top_cards_frame = tk.Frame(top_section, bg="#F6F7FB")
         self.top_cards_frame.pack(fill=tk.X)
+        self.top_cards = []
+        self.top_task_ids = None
+        self.top_empty_card = self.create_empty_card(
+            self.top_cards_frame, "No tasks due today yet!", pack=False
+        )
 
         list_header = tk.Frame(content, bg="#F6F7FB")
         list_header.pack(fill=tk.X, pady=(0, 8))
@@ -134,9 +352,39 @@ class PlannerApp:
             font=self.font_large,
         ).pack(side=tk.LEFT)
 
+        self.selection_label = tk.Label(
+            list_header,
+            bg="#F6F7FB",
+            fg="#7A7B9A",
+            font=self.font_body,
+        )
+        self.selection_label.pack(side=tk.LEFT, padx=12)
+
         actions = tk.Frame(list_header, bg="#F6F7FB")
         actions.pack(side=tk.RIGHT)
 
+        self.undo_button = tk.Button(
+            actions,
+            text="↩ Undo",
+            font=self.font_button,
+            bg="#FFFFFF",
+            fg="#2E2E4F",
+            relief=tk.FLAT,
+            command=self.undo,
+        )
+        self.undo_button.pack(side=tk.LEFT, padx=4)
+
+        self.redo_button = tk.Button(
+            actions,
+            text="↪ Redo",
+            font=self.font_button,
+            bg="#FFFFFF",
+            fg="#2E2E4F",
+            relief=tk.FLAT,
+            command=self.redo,
+        )
+        self.redo_button.pack(side=tk.LEFT, padx=4)
+
         tk.Button(
             actions,
             text="✏️ Edit",
@@ -157,6 +405,43 @@ class PlannerApp:
             command=self.mark_done,
         ).pack(side=tk.LEFT, padx=4)
 
+        self.category_menu = tk.Menu(self.root, tearoff=0)
+        for category in CATEGORIES:
+            self.category_menu.add_command(
+                label=category,
+                command=lambda value=category: self.change_category(value),
+            )
+        category_button = tk.Button(
+            actions,
+            text="🏷 Category",
+            font=self.font_button,
+            bg="#FFFFFF",
+            fg="#2E2E4F",
+            relief=tk.FLAT,
+        )
+        category_button.configure(
+            command=lambda: self.popup_menu(self.category_menu, category_button)
+        )
+        category_button.pack(side=tk.LEFT, padx=4)
+
+        self.shift_menu = tk.Menu(self.root, tearoff=0)
+        for label, days in SHIFT_OPTIONS:
+            self.shift_menu.add_command(
+                label=label, command=lambda value=days: self.shift_due(value)
+            )
+        shift_button = tk.Button(
+            actions,
+            text="📅 Move",
+            font=self.font_button,
+            bg="#FFFFFF",
+            fg="#2E2E4F",
+            relief=tk.FLAT,
+        )
+        shift_button.configure(
+            command=lambda: self.popup_menu(self.shift_menu, shift_button)
+        )
+        shift_button.pack(side=tk.LEFT, padx=4)
+
         tk.Button(
             actions,
             text="🗑 Delete",
@@ -171,19 +456,38 @@ class PlannerApp:
         list_container.pack(fill=tk.BOTH, expand=True)
 
         self.canvas = tk.Canvas(list_container, bg="#F6F7FB", highlightthickness=0)
-        scrollbar = tk.Scrollbar(list_container, orient=tk.VERTICAL, command=self.canvas.yview)
-        self.cards_frame = tk.Frame(self.canvas, bg="#F6F7FB")
-
-        self.cards_frame.bind(
-            "<Configure>",
-            lambda e: self.canvas.configure(scrollregion=self.canvas.bbox("all")),
+        self.list_scrollbar = tk.Scrollbar(
+            list_container, orient=tk.VERTICAL, command=self.canvas.yview
+        )
+        self.canvas.configure(yscrollcommand=self.on_list_scrolled)
+        self.canvas.bind("<Configure>", self.on_list_resized)
+
+        self.list_tasks = []
+        self.list_keys = []
+        self.list_key_by_id = {}
+        self.card_pool = []
+        self.visible_cards = {}
+        self.row_height = None
+
+        self.empty_list_card = self.create_empty_card(
+            self.canvas, "No tasks to show. Add one!", pack=False
+        )
+        self.empty_list_item = self.canvas.create_window(
+            (0, CARD_MARGIN_Y), window=self.empty_list_card, anchor="nw", state="hidden"
         )
-
-        self.canvas.create_window((0, 0), window=self.cards_frame, anchor="nw")
-        self.canvas.configure(yscrollcommand=scrollbar.set)
 
         self.canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.list_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        self.month_view = MonthView(content, self)
+        self.agenda_view = AgendaView(content, self)
+        self.everyone_view = EveryoneView(content, self)
+        self.view_frames = {
+            "List": list_container,
+            "Month": self.month_view.frame,
+            "Agenda": self.agenda_view.frame,
+            "Everyone": self.everyone_view.frame,
+        }
 
     def create_sidebar_button(self, parent, label, callback):
         btn = tk.Button(
@@ -200,110 +504,509 @@ class PlannerApp:
         )
         btn.pack(fill=tk.X, padx=12, pady=4)
 
-    def load_tasks(self):
-        if not os.path.exists(TASKS_FILE):
-            self.tasks = []
-            self.save_tasks()
+    def open_profile_storage(self, name):
+        storage = open_storage(STORAGE_MODE, self.profiles.shard_path(name))
+        PROFILER.instrument(storage, ("snapshot", "write"), prefix="storage.")
+        return storage
+
+    def capture_profile(self):
+        # Empty shells first so building them costs nothing, then take over
+        # the live indexes without copying them.
+        store = TaskStore()
+        reminders = ReminderQueue(store)
+        search_index = SearchIndex(store)
+        store.adopt(self.store)
+        reminders.adopt(self.reminders)
+        search_index.adopt(self.search_index)
+        return Profile(
+            self.profiles.active, self.storage, store, reminders, search_index, self.history
+        )
+
+    def use_profile(self, profile):
+        self.storage = profile.storage
+        self.saver.storage = profile.storage
+        self.store.adopt(profile.store)
+        self.reminders.adopt(profile.reminders)
+        self.search_index.adopt(profile.search_index)
+        self.history = profile.history
+
+    def retire_profile(self, profile):
+        profile.storage.close()
+        try:
+            write_today_index(
+                today_index_path(self.profiles.shard_path(profile.name)),
+                profile.store,
+                profile.storage.data_signature(),
+                datetime.now().date(),
+            )
+        except OSError:
+            # Only a shortcut; the shard itself is read instead next time.
+            pass
+
+    def switch_profile(self, name):
+        if self.loading or name == self.profiles.active or not self.saver.flush():
+            self.profile_var.set(self.profiles.active)
             return
+        for profile in self.warm_profiles.put(self.capture_profile()):
+            self.retire_profile(profile)
+        self.profiles.set_active(name)
+        profile = self.warm_profiles.pop(name)
+        cold = profile is None
+        if cold:
+            store = TaskStore()
+            profile = Profile(
+                name,
+                self.open_profile_storage(name),
+                store,
+                ReminderQueue(store),
+                SearchIndex(store),
+                UndoHistory(self.store),
+            )
+        self.use_profile(profile)
+        self.profile_var.set(name)
+        self.set_selection(set())
+        self.canvas.yview_moveto(0)
+        if cold:
+            self.start_loading()
+        self.refresh_task_list()
+        if not cold:
+            self.schedule_reminder_check()
+            self.publish_reload()
+
+    def add_profile(self):
+        if self.loading:
+            return
+        name = simpledialog.askstring(
+            "New profile", "Who is this profile for?", parent=self.root
+        )
+        if not name:
+            return
+        try:
+            name = self.profiles.add(name)
+        except ValueError as error:
+            messagebox.showerror("New profile", str(error))
+            return
+        self.profile_menu.configure(values=self.profiles.names)
+        self.switch_profile(name)
+
+    def get_profile_today(self, name, day):
+        if name == self.profiles.active:
+            return day_entries(self.store, day)
+        profile = self.warm_profiles.get(name)
+        if profile is not None:
+            return day_entries(profile.store, day)
+        storage = open_storage(STORAGE_MODE, self.profiles.shard_path(name))
+        try:
+            key = storage.data_signature(), day
+            cached = self.cold_today.get(name)
+            if cached is None or cached[0] != key:
+                entries = read_profile_today(storage, self.profiles.shard_path(name), day)
+                cached = self.cold_today[name] = key, entries
+            return cached[1]
+        finally:
+            storage.close()
+
+    def start_loading(self):
+        self.loading = True
+        self.load_progress = 0.0
+        self.load_results = queue.Queue()
+        self.set_empty_messages("Loading your tasks...")
+        threading.Thread(
+            target=self.load_in_background, name="task-loader", daemon=True
+        ).start()
+        self.root.after(LOAD_POLL_MS, self.poll_loading)
+
+    def load_in_background(self):
         try:
-            with open(TASKS_FILE, "r", encoding="utf-8") as file:
-                self.tasks = json.load(file)
-            for task in self.tasks:
-                task.setdefault("status", "Open")
-                task.setdefault("category", "School")
-                task.setdefault("notified", False)
-        except (json.JSONDecodeError, OSError):
+            result = self.build_store()
+        except Exception as error:
+            result = error
+        self.load_results.put(result)
+
+    def poll_loading(self):
+        try:
+            result = self.load_results.get_nowait()
+        except queue.Empty:
+            self.set_empty_messages(
+                f"Loading your tasks... {int(self.load_progress * 100)}%"
+            )
+            self.root.after(LOAD_POLL_MS, self.poll_loading)
+            return
+        self.finish_loading(result)
+
+    def build_store(self):
+        store = TaskStore(self.read_tasks())
+        return store, ReminderQueue(store), SearchIndex(store)
+
+    def read_tasks(self):
+        if not self.storage.exists():
+            self.storage.save([])
+            return []
+        return (
+            with_defaults(task)
+            for task in self.storage.iter_tasks(progress=self.set_load_progress)
+        )
+
+    def set_load_progress(self, fraction):
+        self.load_progress = fraction
+
+    def finish_loading(self, loaded):
+        if isinstance(loaded, NotAList):
             messagebox.showwarning(
                 "Tasks file issue",
-                "We couldn't read tasks.json, so we're starting fresh.",
+                "We couldn't read tasks.json, so we're starting fresh. "
+                "The old file was kept as tasks.json.unreadable.",
+            )
+            self.storage.set_aside()
+            self.storage.save([])
+            store = TaskStore()
+            loaded = store, ReminderQueue(store), SearchIndex(store)
+        elif isinstance(loaded, Exception):
+            # Anything else may be passing (a locked or unreachable file), so
+            # leave the tasks file alone rather than start over on top of it.
+            messagebox.showerror(
+                "Tasks file issue",
+                f"We couldn't read tasks.json ({loaded}). "
+                "The planner will close without changing it.",
             )
-            self.tasks = []
+            self.on_close()
+            return
+        store, reminders, search_index = loaded
+        self.store.adopt(store)
+        self.reminders.adopt(reminders)
+        self.search_index.adopt(search_index)
+        self.loading = False
+        self.set_empty_messages()
+        self.refresh_task_list()
+        self.publish_reload()
+        self.schedule_reminder_check()
+        self.schedule_day_check()
+        if self.file_check_after_id is None:
+            self.file_check_after_id = self.root.after(FILE_CHECK_MS, self.check_tasks_file)
+        if self.storage.quarantined:
+            # Rewrite the file without them, so the next start is clean.
             self.save_tasks()
+            messagebox.showwarning(
+                "Some tasks were set aside",
+                f"{self.storage.quarantined} task(s) in tasks.json couldn't be read. "
+                f"They were saved to {self.storage.quarantine_path} so nothing is lost.",
+            )
+
+    def schedule_day_check(self):
+        if self.day_check_after_id is not None:
+            self.root.after_cancel(self.day_check_after_id)
+        now = datetime.now()
+        midnight = datetime.combine(now.date() + timedelta(days=1), datetime.min.time())
+        delay_ms = math.ceil((midnight - now).total_seconds() * 1000)
+        self.day_check_after_id = self.root.after(
+            min(delay_ms, DAY_CHECK_MAX_SLEEP_MS), self.check_day_rollover
+        )
+
+    def check_day_rollover(self):
+        self.day_check_after_id = None
+        today = datetime.now().date()
+        if today != self.current_day:
+            self.current_day = today
+            self.refresh_task_list()
+        self.schedule_day_check()
+
+    def check_tasks_file(self):
+        # A stat call per tick; the file is only read when it has changed.
+        if not self.saver.writing and not self.loading:
+            self.merge_disk_changes()
+        self.file_check_after_id = self.root.after(FILE_CHECK_MS, self.check_tasks_file)
+
+    def merge_disk_changes(self):
+        if not self.storage.changed_on_disk():
+            return
+        quarantined = self.storage.quarantined
+        try:
+            with self.storage.lock():
+                changed = None
+                if self.storage.changed_on_disk():
+                    changed = self.storage.sync_from_disk(self.store)
+        except Exception as error:
+            # Runs before every save, so it must not fail the save or the
+            # close; their file is kept and ours replaces it.
+            backup_path = self.storage.keep_outside_copy()
+            self.save_tasks()
+            self.refresh_task_list()
+            messagebox.showwarning(
+                "Couldn't merge changes",
+                f"Another program changed tasks.json, but we couldn't merge it ({error}). "
+                f"Its version was saved to {backup_path}; the planner keeps yours.",
+            )
+            return
+        if changed:
+            # Undoing an older edit would overwrite what they just wrote.
+            self.history.forget(changed)
+            self.refresh_task_list()
+        if self.storage.quarantined > quarantined:
+            messagebox.showwarning(
+                "Some tasks were set aside",
+                f"{self.storage.quarantined - quarantined} task(s) another program wrote "
+                f"to tasks.json couldn't be read. They were saved to "
+                f"{self.storage.quarantine_path} so nothing is lost.",
+            )
+
+    def set_empty_messages(self, text=None):
+        self.top_empty_card.label.configure(text=text or "No tasks due today yet!")
+        self.empty_list_card.label.configure(text=text or "No tasks to show. Add one!")
+        if text:
+            self.top_empty_card.pack(fill=tk.X, pady=8)
+            self.canvas.itemconfigure(self.empty_list_item, state="normal")
 
     def save_tasks(self):
-        with open(TASKS_FILE, "w", encoding="utf-8") as file:
-            json.dump(self.tasks, file, indent=2)
+        # Written shortly after on a worker thread; edits in the meantime
+        # share the same write. Outside edits are merged in first.
+        self.saver.mark_dirty()
+
+    def show_save_error(self, error):
+        self.save_error = error
+        if self.closing:
+            # on_close asks what to do once all its attempts are done.
+            return
+        messagebox.showwarning(
+            "Couldn't save",
+            f"Your latest changes couldn't be saved yet ({error}). "
+            "The planner will try again with your next change and when it closes.",
+        )
 
     def set_filter(self, label):
         self.active_filter = label
+        self.canvas.yview_moveto(0)
+        self.set_view("List")
         self.refresh_task_list()
 
     def set_category(self, label):
         self.active_category = label if self.active_category != label else "All"
+        self.canvas.yview_moveto(0)
+        self.refresh_task_list()
+
+    def set_view(self, label, day=None):
+        if label != self.active_view:
+            self.view_frames[self.active_view].pack_forget()
+            self.view_frames[label].pack(fill=tk.BOTH, expand=True)
+            self.active_view = label
+        if label == "Agenda" and day is not None:
+            self.agenda_view.show_from(day)
+        else:
+            self.refresh_day_views()
+
+    def refresh_day_views(self):
+        # Only the view on screen is redrawn; the others catch up when shown.
+        if self.loading:
+            return
+        if self.active_view == "Month":
+            self.month_view.draw()
+        elif self.active_view == "Agenda":
+            self.agenda_view.draw()
+        elif self.active_view == "Everyone":
+            self.everyone_view.draw()
+
+    def get_day_counts(self, first_day, days):
+        counts = self.store.category_counts_by_day(first_day, days)
+        category = self.active_category
+        if category == "All":
+            return counts
+        return {
+            day: {category: by_category[category]}
+            for day, by_category in counts.items()
+            if category in by_category
+        }
+
+    def get_day_preview(self, day, limit):
+        tasks = self.store.iter_open_by_day(day)
+        if self.active_category != "All":
+            tasks = (task for task in tasks if task.category == self.active_category)
+        return list(itertools.islice(tasks, limit))
+
+    def on_search_changed(self, *args):
+        # Coalesce keystrokes so fast typing rebuilds the list once.
+        if self.search_after_id is not None:
+            self.root.after_cancel(self.search_after_id)
+        self.search_after_id = self.root.after(SEARCH_DEBOUNCE_MS, self.apply_search)
+
+    def apply_search(self):
+        self.search_after_id = None
+        self.canvas.yview_moveto(0)
         self.refresh_task_list()
 
     def get_filtered_tasks(self):
-        now = datetime.now()
-        today = now.date()
-        week_end = today + timedelta(days=7)
-
-        def in_filter(task):
-            status = task.get("status")
-            due = self.parse_datetime(task.get("due"))
-
-            if self.active_filter == "Done":
-                return status == "Done"
-            if status == "Done":
-                return False
-            if self.active_filter == "All":
-                return True
-            if not due:
-                return False
-            if self.active_filter == "Today":
-                return due.date() == today
-            if self.active_filter == "This Week":
-                return today <= due.date() <= week_end
-            return True
-
-        def in_category(task):
-            if self.active_category == "All":
-                return True
-            return task.get("category") == self.active_category
-
-        filtered = [task for task in self.tasks if in_filter(task) and in_category(task)]
-
-        def sort_key(task):
-            status_order = 0 if task.get("status") == "Open" else 1
-            due = self.parse_datetime(task.get("due")) or datetime.max
-            return (status_order, due)
-
-        return sorted(filtered, key=sort_key)
+        return self.query_tasks(
+            self.active_filter, self.active_category, self.search_var.get()
+        )
+
+    def query_tasks(self, active_filter, active_category, query=""):
+        if query.strip():
+            return self.search_index.filter_tasks(query, active_filter, active_category)
+        if self.should_query_storage(active_filter, active_category):
+            # Another program may have changed the database since it was
+            # last merged; rows the store doesn't know are left out.
+            task_ids = self.storage.filter_ids(active_filter, active_category)
+            return self.store.get_known(task_ids)
+        return self.store.filter_tasks(active_filter, active_category)
 
     def refresh_task_list(self):
-        for widget in self.top_cards_frame.winfo_children():
-            widget.destroy()
-        for widget in self.cards_frame.winfo_children():
-            widget.destroy()
+        self.refresh_top_cards()
+        self.refresh_day_views()
+        self.refresh_history_buttons()
 
+        self.list_tasks = self.get_filtered_tasks()
+        self.list_keys = [self.store.sort_key(task["id"]) for task in self.list_tasks]
+        self.list_key_by_id = {key[-1]: key for key in self.list_keys}
+        self.update_list_layout()
+
+    def refresh_history_buttons(self):
+        self.undo_button.configure(state=tk.NORMAL if self.history.can_undo() else tk.DISABLED)
+        self.redo_button.configure(state=tk.NORMAL if self.history.can_redo() else tk.DISABLED)
+
+    def refresh_top_cards(self):
         top_tasks = self.get_top_today_tasks()
+        top_task_ids = [task["id"] for task in top_tasks]
+        if top_task_ids == self.top_task_ids:
+            for card, task in zip(self.top_cards, top_tasks):
+                card.show(task, self.selected_ids)
+            return
+
+        while len(self.top_cards) < len(top_tasks):
+            self.top_cards.append(TaskCard(self.top_cards_frame, self, compact=True))
+
+        self.top_empty_card.pack_forget()
+        for card in self.top_cards:
+            card.frame.pack_forget()
         if not top_tasks:
-            self.create_empty_card(self.top_cards_frame, "No tasks due today yet!")
-        else:
-            for task in top_tasks:
-                self.create_task_card(self.top_cards_frame, task, compact=True)
+            self.top_empty_card.pack(fill=tk.X, pady=8)
+        for card, task in zip(self.top_cards, top_tasks):
+            card.show(task, self.selected_ids)
+            card.frame.pack(fill=tk.X, pady=CARD_MARGIN_Y, padx=CARD_MARGIN_X)
+        self.top_task_ids = top_task_ids
+
+    def update_task_views(self, *task_ids):
+        if len(task_ids) > BULK_REDRAW_THRESHOLD or any(
+            self.store.series_id(task_id) != task_id or self.store.is_recurring(task_id)
+            for task_id in task_ids
+        ):
+            # Repeating tasks can fill several rows, and big batches are
+            # cheaper to rebuild than to patch row by row.
+            self.refresh_task_list()
+            return
+        self.refresh_top_cards()
+        self.refresh_day_views()
+        self.refresh_history_buttons()
+
+        for task_id in task_ids:
+            old_key = self.list_key_by_id.pop(task_id, None)
+            if old_key is not None:
+                position = bisect.bisect_left(self.list_keys, old_key)
+                del self.list_keys[position]
+                del self.list_tasks[position]
+
+            task = self.store.get(task_id)
+            if (
+                task is not None
+                and self.store.matches(task, self.active_filter, self.active_category)
+                and self.search_index.matches(task, self.search_var.get())
+            ):
+                key = self.store.sort_key(task_id)
+                position = bisect.bisect_left(self.list_keys, key)
+                self.list_keys.insert(position, key)
+                self.list_tasks.insert(position, task)
+                self.list_key_by_id[task_id] = key
+
+        self.update_list_layout()
+
+    def update_list_layout(self):
+        self.canvas.itemconfigure(
+            self.empty_list_item, state="hidden" if self.list_tasks else "normal"
+        )
+        self.update_list_scrollregion()
+        self.render_visible_rows()
+
+    def update_list_scrollregion(self):
+        height = len(self.list_tasks) * self.get_row_height()
+        self.canvas.configure(scrollregion=(0, 0, self.canvas.winfo_width(), height))
+
+    def get_row_height(self):
+        if self.row_height is None:
+            card = self.get_pooled_card(0)
+            card.show({"name": "Task", "due": ""}, ())
+            card.frame.update_idletasks()
+            self.row_height = card.frame.winfo_reqheight() + 2 * CARD_MARGIN_Y
+        return self.row_height
+
+    def get_pooled_card(self, index):
+        while len(self.card_pool) <= index:
+            card = TaskCard(self.canvas, self)
+            card.item = self.canvas.create_window(
+                (CARD_MARGIN_X, 0),
+                window=card.frame,
+                anchor="nw",
+                width=max(self.canvas.winfo_width() - 2 * CARD_MARGIN_X, 1),
+                state="hidden",
+            )
+            self.card_pool.append(card)
+        return self.card_pool[index]
+
+    def render_visible_rows(self):
+        row_height = self.get_row_height()
+        top = self.canvas.canvasy(0)
+        bottom = top + self.canvas.winfo_height()
+        first = max(0, int(top // row_height) - LIST_BUFFER_ROWS)
+        last = min(len(self.list_tasks), int(bottom // row_height) + 1 + LIST_BUFFER_ROWS)
+
+        self.visible_cards = {}
+        for offset in range(max(last - first, 0)):
+            row = first + offset
+            card = self.get_pooled_card(offset)
+            card.show(self.list_tasks[row], self.selected_ids)
+            self.visible_cards[self.list_tasks[row]["id"]] = card
+            self.canvas.coords(card.item, CARD_MARGIN_X, row * row_height + CARD_MARGIN_Y)
+            self.canvas.itemconfigure(card.item, state="normal")
+        for card in self.card_pool[max(last - first, 0):]:
+            self.canvas.itemconfigure(card.item, state="hidden")
+
+    def on_list_scrolled(self, first, last):
+        self.list_scrollbar.set(first, last)
+        self.render_visible_rows()
+
+    def on_list_resized(self, event):
+        width = max(event.width - 2 * CARD_MARGIN_X, 1)
+        for card in self.card_pool:
+            self.canvas.itemconfigure(card.item, width=width)
+        self.canvas.itemconfigure(self.empty_list_item, width=event.width)
+        self.update_list_scrollregion()
+        self.render_visible_rows()
+
+    def can_query_storage(self):
+        # Repeating tasks are expanded in memory; SQL only sees the series
+        # rows. While a profile loads, the store cannot resolve its ids yet,
+        # and until the saver catches up the database lags behind the store.
+        return (
+            self.storage.supports_queries
+            and not self.loading
+            and not self.saver.pending
+            and not self.store.has_recurring()
+        )
 
-        tasks = self.get_filtered_tasks()
-        if not tasks:
-            self.create_empty_card(self.cards_frame, "No tasks to show. Add one!")
-        else:
-            for task in tasks:
-                self.create_task_card(self.cards_frame, task)
+    def should_query_storage(self, active_filter, active_category):
+        # The in-memory indexes answer most filters faster than SQLite does
+        # (benchmarks/bench_filters.py). The category index only pays off
+        # for a long date range and a category holding a small share of
+        # the tasks, where the store would walk every other task too.
+        if active_filter not in SQL_FILTERS or active_category == "All":
+            return False
+        share = self.store.category_size(active_category) / max(len(self.store), 1)
+        return share <= SQL_CATEGORY_SHARE and self.can_query_storage()
 
     def get_top_today_tasks(self):
-        today = datetime.now().date()
-        open_tasks = [
-            task
-            for task in self.tasks
-            if task.get("status") == "Open"
-            and (self.parse_datetime(task.get("due")) or datetime.max).date() == today
-        ]
-        open_tasks.sort(key=lambda t: self.parse_datetime(t.get("due")) or datetime.max)
-        return open_tasks[:3]
+        return self.store.top_today()
 
-    def create_empty_card(self, parent, text):
+    def create_empty_card(self, parent, text, pack=True):
         card = tk.Frame(parent, bg="#FFFFFF", bd=0, relief=tk.FLAT)
-        card.pack(fill=tk.X, pady=8)
-        tk.Label(
+        if pack:
+            card.pack(fill=tk.X, pady=8)
+        card.label = tk.Label(
             card,
             text=text,
             bg="#FFFFFF",
@@ -311,204 +1014,860 @@ class PlannerApp:
             font=self.font_body,
             padx=16,
             pady=16,
-        ).pack(anchor=tk.W)
+        )
+        card.label.pack(anchor=tk.W)
+        return card
+
+    def select_task(self, task, mode="single"):
+        task_id = task.get("id")
+        if mode == "toggle":
+            selected = self.selected_ids ^ {task_id}
+        elif mode == "range" and self.selected_task_id in self.list_key_by_id:
+            rows = sorted(
+                bisect.bisect_left(self.list_keys, self.list_key_by_id[key_id])
+                for key_id in (self.selected_task_id, task_id)
+                if key_id in self.list_key_by_id
+            )
+            selected = {row_task["id"] for row_task in self.list_tasks[rows[0] : rows[-1] + 1]}
+            selected.add(task_id)
+        else:
+            selected = {task_id}
+        self.set_selection(selected, task_id if task_id in selected else None)
+
+    def set_selection(self, task_ids, primary_id=None):
+        changed = self.selected_ids ^ task_ids
+        self.selected_ids = task_ids
+        self.selected_task_id = primary_id
+        for card in self.top_cards + list(self.visible_cards.values()):
+            if card.task is not None and card.task.get("id") in changed:
+                card.show(card.task, self.selected_ids)
+        count = len(task_ids)
+        self.selection_label.configure(text=f"{count} selected" if count > 1 else "")
+
+    def popup_menu(self, menu, button):
+        menu.tk_popup(button.winfo_rootx(), button.winfo_rooty() + button.winfo_height())
+
+    def run_in_background(self, work, done, name, tick=None):
+        """Run ``work()`` on a thread, then ``done(result)`` back on the Tk thread.
+
+        ``result`` is the exception if ``work`` raised. ``tick`` runs on
+        every poll while waiting.
+        """
+        results = queue.Queue()
+
+        def run():
+            try:
+                result = work()
+            except Exception as error:
+                result = error
+            results.put(result)
+
+        threading.Thread(target=run, name=name, daemon=True).start()
+        self.root.after(LOAD_POLL_MS, self.poll_background, results, done, tick)
+
+    def poll_background(self, results, done, tick):
+        try:
+            result = results.get_nowait()
+        except queue.Empty:
+            if tick is not None:
+                tick()
+            self.root.after(LOAD_POLL_MS, self.poll_background, results, done, tick)
+            return
+        done(result)
+
+    def import_file(self):
+        if self.loading or self.importing:
+            return
+        path = filedialog.askopenfilename(
+            parent=self.root, title="Import tasks", filetypes=IMPORT_FILE_TYPES
+        )
+        if path:
+            self.start_import(path)
+
+    def start_import(self, path):
+        # Parsed off the Tk thread (in worker processes for big files); the
+        # tasks are only added to the store once it is all read.
+        self.importing = True
+        self.import_progress = 0.0
+        profile = self.profiles.active
+        self.run_in_background(
+            lambda: self.read_import(path),
+            lambda result: self.finish_import(path, profile, result),
+            "task-importer",
+            tick=lambda: self.files_button.configure(
+                text=f"📂 Importing {int(self.import_progress * 100)}%"
+            ),
+        )
+
+    def read_import(self, path):
+        result = import_tasks(path, progress=self.set_import_progress)
+        # Built here so the Tk thread only has to index them.
+        result.tasks = [Task(dict(task, id=str(uuid.uuid4()))) for task in result.tasks]
+        return result
+
+    def set_import_progress(self, fraction):
+        self.import_progress = fraction
+
+    def finish_import(self, path, profile, result):
+        self.importing = False
+        self.files_button.configure(text="📂 Files")
+        name = os.path.basename(path)
+        if isinstance(result, Exception):
+            messagebox.showerror("Import", f"We couldn't import {name}: {result}")
+            return
+        if self.loading or profile != self.profiles.active:
+            messagebox.showwarning(
+                "Import",
+                f"You switched profiles while {name} was being read, so nothing was added. "
+                "Import it again to add it here.",
+            )
+            return
+        result.discard_known(task_key(task) for task in self.store)
+        changes = [("add", task.id, task) for task in result.tasks]
+        if changes:
+            # One undo step and one save for the whole file.
+            self.apply_changes(changes, ())
+        messagebox.showinfo("Import", result.summary())
+
+    def export_file(self):
+        if self.loading:
+            return
+        path = filedialog.asksaveasfilename(
+            parent=self.root,
+            title="Export tasks",
+            defaultextension=".ics",
+            filetypes=EXPORT_FILE_TYPES,
+        )
+        if not path:
+            return
+        # Task records are shared rather than copied, as for saves.
+        tasks = self.store.to_list()
+        self.run_in_background(
+            lambda: export_tasks(path, tasks),
+            lambda result: self.finish_export(path, result),
+            "task-exporter",
+        )
+
+    def finish_export(self, path, result):
+        name = os.path.basename(path)
+        if isinstance(result, Exception):
+            messagebox.showerror("Export", f"We couldn't export to {name}: {result}")
+            return
+        messagebox.showinfo(
+            "Export", f"Exported {result} task{'' if result == 1 else 's'} to {name}."
+        )
+
+    def open_add_dialog(self):
+        if self.loading:
+            return
+        TaskDialog(self.root, title="Add Task", on_save=self.add_task, store=self.store)
+
+    def open_edit_dialog(self):
+        task = self.get_selected_task()
+        if not task:
+            messagebox.showinfo("Choose a task", "Please select a task to edit.")
+            return
+        task = self.store.get(self.store.series_id(task["id"]))
+        TaskDialog(
+            self.root, title="Edit Task", task=task, on_save=self.edit_task, store=self.store
+        )
+
+    def start_api_server(self, port):
+        self.api_dispatcher = MainThreadDispatcher(self.root.after)
+        server = ApiServer(self, self.api_dispatcher.submit, port)
+        try:
+            server.start()
+        except OSError as error:
+            self.api_dispatcher.close()
+            messagebox.showwarning(
+                "API server", f"Couldn't start the API server on port {port} ({error})."
+            )
+            return
+        self.api_server = server
+        self.store.subscribe(lambda op, task_id, payload: server.publish(op, task_id))
+
+    def publish_reload(self):
+        # The whole store was swapped; API clients should fetch the list again.
+        if self.api_server is not None:
+            self.api_server.publish("reload", None)
+
+    # The API server calls these on the Tk thread, through the same methods
+    # the buttons and dialogs use.
+
+    def ensure_ready(self):
+        if self.loading:
+            raise ServiceUnavailable("Tasks are still loading. Try again shortly.")
+
+    def page_tasks(self, active_filter, active_category, query="", offset=0, limit=None):
+        self.ensure_ready()
+        if active_filter not in FILTERS:
+            raise ValueError(f"filter must be one of {', '.join(FILTERS)}.")
+        if active_category != "All" and active_category not in CATEGORIES:
+            raise ValueError(f"category must be All or one of {', '.join(CATEGORIES)}.")
+        tasks = self.query_tasks(active_filter, active_category, query)
+        end = None if limit is None else offset + limit
+        return {"total": len(tasks), "tasks": [dict(task) for task in tasks[offset:end]]}
+
+    def get_task(self, task_id):
+        self.ensure_ready()
+        task = self.store.get(task_id)
+        if task is None:
+            raise KeyError(task_id)
+        return dict(task)
+
+    def create_task(self, fields):
+        self.ensure_ready()
+        data = check_task_fields(fields)
+        self.add_task(data)
+        return dict(self.store.get(data["id"]))
+
+    def change_task(self, task_id, fields):
+        """Update some fields; an occurrence id changes its whole series."""
+        self.ensure_ready()
+        unknown = sorted(set(fields) - set(EDITABLE_FIELDS))
+        if unknown:
+            raise ValueError(f"Can't change {', '.join(unknown)}.")
+        series_id = self.store.series_id(task_id)
+        if series_id not in self.store:
+            raise KeyError(task_id)
+        task = self.store.get(series_id)
+        merged = {field: task.get(field) for field in EDITABLE_FIELDS}
+        merged.update(fields)
+        data = check_task_fields(merged)
+        data["id"] = series_id
+        self.edit_task(data)
+        return dict(self.store.get(series_id))
+
+    def add_task(self, data):
+        data["id"] = str(uuid.uuid4())
+        data["status"] = "Open"
+        data["notified"] = False
+        if data.get("repeat") is None:
+            data.pop("repeat", None)
+        self.history.apply([("add", data["id"], data)])
+        self.save_tasks()
+        self.update_task_views(data["id"])
+
+    def edit_task(self, data):
+        task = self.store.get(data["id"])
+        if data["id"] in self.store:
+            changes = {
+                "name": data["name"],
+                "due": data["due"],
+                "remind": data["remind"],
+                "category": data["category"],
+                "notified": False,
+            }
+            if data.get("repeat") or "repeat" in task:
+                changes["repeat"] = data.get("repeat")
+            if task.get("notified_through") and (
+                data["due"] != task.get("due") or data.get("repeat") != task.get("repeat")
+            ):
+                # The series falls on other days now; start reminding afresh.
+                changes["notified_through"] = None
+            self.history.apply([("update", data["id"], changes)])
+        self.save_tasks()
+        self.update_task_views(data["id"])
+
+    def mark_done(self):
+        task_ids = self.get_selected_ids()
+        if not task_ids:
+            messagebox.showinfo("Choose a task", "Please select a task to mark done.")
+            return
+        self.finish_tasks(task_ids)
+
+    def delete_task(self):
+        task_ids = self.get_selected_ids()
+        if not task_ids:
+            messagebox.showinfo("Choose a task", "Please select a task to delete.")
+            return
+        if len(task_ids) == 1:
+            question = "Are you sure you want to delete this task?"
+        else:
+            question = f"Are you sure you want to delete these {len(task_ids)} tasks?"
+        if not messagebox.askyesno("Delete task", question):
+            return
+        self.remove_tasks(task_ids)
+
+    def finish_tasks(self, task_ids):
+        self.ensure_ready()
+        self.apply_changes([("done", task_id, None) for task_id in task_ids], task_ids)
+        return task_ids
+
+    def remove_tasks(self, task_ids):
+        """Delete tasks, or the whole series behind any occurrence ids."""
+        self.ensure_ready()
+        series_ids = list(dict.fromkeys(self.store.series_id(task_id) for task_id in task_ids))
+        missing = next((series_id for series_id in series_ids if series_id not in self.store), None)
+        if missing is not None:
+            raise KeyError(missing)
+        removed = set(series_ids)
+        kept = {
+            task_id for task_id in self.selected_ids if self.store.series_id(task_id) not in removed
+        }
+        self.set_selection(kept, self.selected_task_id if self.selected_task_id in kept else None)
+        self.apply_changes([("remove", series_id, None) for series_id in series_ids], task_ids)
+        return series_ids
+
+    def change_category(self, category):
+        series_ids = self.get_selected_series()
+        if not series_ids:
+            messagebox.showinfo("Choose a task", "Please select a task to change.")
+            return
+        changes = [("update", series_id, {"category": category}) for series_id in series_ids]
+        self.apply_changes(changes, self.get_selected_ids())
+
+    def shift_due(self, days):
+        series_ids = self.get_selected_series()
+        if not series_ids:
+            messagebox.showinfo("Choose a task", "Please select a task to move.")
+            return
+        changes = []
+        for series_id in series_ids:
+            due = self.store.due_time(series_id)
+            if due is not None:
+                due = (due + timedelta(days=days)).strftime(DATE_FORMAT)
+                change = {"due": due, "notified": False}
+                if self.store.get(series_id).get("notified_through"):
+                    change["notified_through"] = None
+                changes.append(("update", series_id, change))
+        self.apply_changes(changes, self.get_selected_ids())
+        skipped = len(series_ids) - len(changes)
+        if skipped:
+            messagebox.showinfo(
+                "Move tasks",
+                f"{skipped} task(s) without a valid due date were left where they are.",
+            )
+
+    def apply_changes(self, changes, task_ids):
+        # One store batch, one write and one redraw however many tasks.
+        if not changes:
+            return
+        self.history.apply(changes)
+        self.save_tasks()
+        touched = dict.fromkeys([*task_ids, *(task_id for _, task_id, _ in changes)])
+        self.update_task_views(*touched)
+
+    def undo(self):
+        self.step_history(self.history.undo, "undo")
+
+    def redo(self):
+        self.step_history(self.history.redo, "redo")
+
+    def step_history(self, step, action):
+        if self.loading:
+            return
+        try:
+            task_ids = step()
+        except KeyError:
+            messagebox.showinfo(
+                f"Can't {action}",
+                f"Those tasks were changed somewhere else, so there's nothing left to {action}.",
+            )
+            self.refresh_history_buttons()
+            return
+        if task_ids:
+            self.save_tasks()
+            self.update_task_views(*dict.fromkeys(task_ids))
+
+    def get_selected_task(self):
+        return self.store.get(self.selected_task_id)
 
-    def create_task_card(self, parent, task, compact=False):
-        shadow = tk.Frame(parent, bg="#E2E3EC")
-        shadow.pack(fill=tk.X, pady=8, padx=6)
+    def get_selected_ids(self):
+        return [task_id for task_id in self.selected_ids if self.store.get(task_id) is not None]
 
-        card = tk.Frame(
-            shadow,
+    def get_selected_series(self):
+        return list(dict.fromkeys(self.store.series_id(task_id) for task_id in self.get_selected_ids()))
+
+    def schedule_reminder_check(self):
+        next_time = self.reminders.next_time()
+        if self.reminder_after_id is not None:
+            if next_time == self.reminder_armed_for:
+                return
+            self.root.after_cancel(self.reminder_after_id)
+            self.reminder_after_id = None
+        self.reminder_armed_for = next_time
+        if next_time is None:
+            return
+        delay = (next_time - datetime.now()).total_seconds()
+        delay_ms = min(max(math.ceil(delay * 1000), 0), REMINDER_MAX_SLEEP_MS)
+        self.reminder_after_id = self.root.after(delay_ms, self.check_reminders)
+
+    def check_reminders(self):
+        self.reminder_after_id = None
+        due_tasks = self.reminders.pop_due(datetime.now())
+        for task in due_tasks:
+            self.send_reminder(task)
+            self.store.mark_notified(task["id"])
+        if due_tasks:
+            self.save_tasks()
+        self.schedule_reminder_check()
+
+    def send_reminder(self, task):
+        title = "Planner Reminder"
+        message = f"{task.get('name')} is due at {task.get('due')}"
+        self.notifier.notify(title, message)
+
+
+class TaskCard:
+    """One task card whose widgets are built once and refilled by ``show``."""
+
+    def __init__(self, parent, app, compact=False):
+        self.app = app
+        self.task = None
+        self.shown = None
+        self.item = None
+
+        self.frame = tk.Frame(parent, bg="#E2E3EC")
+
+        self.card = tk.Frame(
+            self.frame,
             bg="#FFFFFF",
             highlightthickness=2,
             highlightbackground="#FFFFFF",
             padx=16,
             pady=12 if compact else 16,
         )
-        card.pack(fill=tk.X)
-
-        if self.selected_task_id == task.get("id"):
-            card.configure(highlightbackground="#7B6CFF")
+        self.card.pack(fill=tk.X)
 
-        card.bind("<Button-1>", lambda event, t=task: self.select_task(t))
-
-        header = tk.Frame(card, bg="#FFFFFF")
+        header = tk.Frame(self.card, bg="#FFFFFF")
         header.pack(fill=tk.X)
 
-        title = tk.Label(
+        self.title = tk.Label(
             header,
-            text=task.get("name"),
             bg="#FFFFFF",
             fg="#2E2E4F",
-            font=self.font_large,
+            font=app.font_large,
         )
-        title.pack(side=tk.LEFT, anchor=tk.W)
-        title.bind("<Button-1>", lambda event, t=task: self.select_task(t))
+        self.title.pack(side=tk.LEFT, anchor=tk.W)
+        for widget in (self.card, self.title):
+            widget.bind("<Button-1>", self.on_click)
+            widget.bind("<Control-Button-1>", self.on_toggle_click)
+            widget.bind("<Shift-Button-1>", self.on_range_click)
 
-        status = task.get("status", "Open")
-        status_color = "#A6E3A1" if status == "Done" else "#FFD3B6"
-        status_text = "Done" if status == "Done" else "Open"
-        status_label = tk.Label(
+        self.status_label = tk.Label(
             header,
-            text=status_text,
-            bg=status_color,
             fg="#2E2E4F",
             font=("Helvetica", 10, "bold"),
             padx=10,
             pady=4,
         )
-        status_label.pack(side=tk.RIGHT)
+        self.status_label.pack(side=tk.RIGHT)
 
-        meta = tk.Frame(card, bg="#FFFFFF")
+        meta = tk.Frame(self.card, bg="#FFFFFF")
         meta.pack(fill=tk.X, pady=(8, 0))
 
-        due_label = tk.Label(
+        self.due_label = tk.Label(
             meta,
-            text=f"Due: {task.get('due')}",
             bg="#FFFFFF",
             fg="#6A6B89",
-            font=self.font_body,
+            font=app.font_body,
         )
-        due_label.pack(side=tk.LEFT)
+        self.due_label.pack(side=tk.LEFT)
 
-        category = task.get("category", "School")
-        tag_color = CATEGORY_COLORS.get(category, "#4A90E2")
-        category_label = tk.Label(
+        self.category_label = tk.Label(
             meta,
-            text=category,
-            bg=tag_color,
             fg="white",
             font=("Helvetica", 10, "bold"),
             padx=10,
             pady=4,
         )
-        category_label.pack(side=tk.RIGHT)
+        self.category_label.pack(side=tk.RIGHT)
 
-    def select_task(self, task):
-        self.selected_task_id = task.get("id")
-        self.refresh_task_list()
+    def show(self, task, selected_ids):
+        status = "Done" if task.get("status", "Open") == "Done" else "Open"
+        category = task.get("category", "School")
+        shown = (
+            task.get("name"),
+            status,
+            task.get("due"),
+            category,
+            REPEAT_RULES.get(task.get("repeat")),
+            task.get("id") in selected_ids,
+        )
+        self.task = task
+        if shown == self.shown:
+            return
+        self.shown = shown
+        name, status, due, category, repeat, selected = shown
 
-    def open_add_dialog(self):
-        TaskDialog(self.root, title="Add Task", on_save=self.add_task)
+        self.card.configure(highlightbackground="#7B6CFF" if selected else "#FFFFFF")
+        self.title.configure(text=name)
+        self.status_label.configure(
+            text=status, bg="#A6E3A1" if status == "Done" else "#FFD3B6"
+        )
+        self.due_label.configure(
+            text=f"Due: {due}  ·  {repeat}" if repeat else f"Due: {due}"
+        )
+        self.category_label.configure(
+            text=category, bg=CATEGORY_COLORS.get(category, "#4A90E2")
+        )
 
-    def open_edit_dialog(self):
-        task = self.get_selected_task()
-        if not task:
-            messagebox.showinfo("Choose a task", "Please select a task to edit.")
-            return
-        TaskDialog(self.root, title="Edit Task", task=task, on_save=self.edit_task)
+    def on_click(self, event):
+        if self.task is not None:
+            self.app.select_task(self.task)
 
-    def add_task(self, data):
-        data["id"] = str(uuid.uuid4())
-        data["status"] = "Open"
-        data["notified"] = False
-        self.tasks.append(data)
-        self.save_tasks()
-        self.refresh_task_list()
+    def on_toggle_click(self, event):
+        if self.task is not None:
+            self.app.select_task(self.task, mode="toggle")
+        return "break"
 
-    def edit_task(self, data):
-        for task in self.tasks:
-            if task["id"] == data["id"]:
-                task.update(
-                    {
-                        "name": data["name"],
-                        "due": data["due"],
-                        "remind": data["remind"],
-                        "category": data["category"],
-                        "notified": False,
-                    }
-                )
-                break
-        self.save_tasks()
-        self.refresh_task_list()
+    def on_range_click(self, event):
+        if self.task is not None:
+            self.app.select_task(self.task, mode="range")
+        return "break"
 
-    def mark_done(self):
-        task = self.get_selected_task()
-        if not task:
-            messagebox.showinfo("Choose a task", "Please select a task to mark done.")
-            return
-        task["status"] = "Done"
-        self.save_tasks()
-        self.refresh_task_list()
 
-    def delete_task(self):
-        task = self.get_selected_task()
-        if not task:
-            messagebox.showinfo("Choose a task", "Please select a task to delete.")
-            return
-        confirm = messagebox.askyesno(
-            "Delete task", "Are you sure you want to delete this task?"
+class DayCell:
+    """Date, per-category open counts and an optional task preview for one day."""
+
+    def __init__(self, parent, app, horizontal=False, preview=False):
+        self.app = app
+        self.day = None
+        self.frame = tk.Frame(parent, bg="#FFFFFF", bd=0, relief=tk.FLAT)
+        side = tk.LEFT if horizontal else tk.TOP
+        self.day_label = tk.Label(
+            self.frame,
+            bg="#FFFFFF",
+            fg="#2E2E4F",
+            font=("Helvetica", 11, "bold"),
+            width=12 if horizontal else 4,
+            anchor=tk.W,
         )
-        if not confirm:
-            return
-        self.tasks = [t for t in self.tasks if t["id"] != task["id"]]
-        self.selected_task_id = None
-        self.save_tasks()
-        self.refresh_task_list()
+        self.day_label.pack(side=side, anchor=tk.W, padx=6, pady=(4, 0))
+        self.count_labels = {}
+        for category in CATEGORIES:
+            label = tk.Label(
+                self.frame,
+                bg="#FFFFFF",
+                fg=CATEGORY_COLORS[category],
+                font=("Helvetica", 10, "bold"),
+                anchor=tk.W,
+            )
+            label.pack(side=side, anchor=tk.W, padx=6)
+            self.count_labels[category] = label
+        self.preview_label = None
+        if preview:
+            self.preview_label = tk.Label(
+                self.frame,
+                bg="#FFFFFF",
+                fg="#7A7B9A",
+                font=("Helvetica", 10),
+                anchor=tk.W,
+                justify=tk.LEFT,
+            )
+            self.preview_label.pack(side=side, fill=tk.X, expand=True, padx=6)
+
+    def show(self, day, counts, day_text, today, preview_text=""):
+        self.day = day
+        bg = "#FFFFFF" if day is not None else "#F6F7FB"
+        self.frame.configure(bg=bg)
+        self.day_label.configure(
+            text=day_text, bg=bg, fg="#7B6CFF" if day == today else "#2E2E4F"
+        )
+        for category, label in self.count_labels.items():
+            count = counts.get(category, 0)
+            label.configure(text=f"{count} {category}" if count else "", bg=bg)
+        if self.preview_label is not None:
+            self.preview_label.configure(text=preview_text, bg=bg)
 
-    def get_selected_task(self):
-        if not self.selected_task_id:
-            return None
-        for task in self.tasks:
-            if task["id"] == self.selected_task_id:
-                return task
-        return None
-
-    def parse_datetime(self, value):
-        if not value:
-            return None
-        try:
-            return datetime.strptime(value, DATE_FORMAT)
-        except ValueError:
-            return None
+    def bind_click(self, callback):
+        widgets = [self.frame, self.day_label, *self.count_labels.values()]
+        if self.preview_label is not None:
+            widgets.append(self.preview_label)
+        for widget in widgets:
+            widget.bind("<Button-1>", lambda event: callback(self.day))
 
-    def schedule_reminder_check(self):
-        self.check_reminders()
-        self.root.after(30000, self.schedule_reminder_check)
 
-    def check_reminders(self):
-        now = datetime.now()
-        updated = False
-        for task in self.tasks:
-            if task.get("status") != "Open" or task.get("notified"):
-                continue
-            due = self.parse_datetime(task.get("due"))
-            if not due:
-                continue
-            remind_minutes = int(task.get("remind", 0))
-            remind_time = due - timedelta(minutes=remind_minutes)
-            if now >= remind_time:
-                self.send_reminder(task)
-                task["notified"] = True
-                updated = True
-        if updated:
-            self.save_tasks()
-            self.refresh_task_list()
+class MonthView:
+    """A month of open-task counts per day, on a grid built once."""
 
-    def send_reminder(self, task):
-        title = "Planner Reminder"
-        message = f"{task.get('name')} is due at {task.get('due')}"
-        try:
-            from plyer import notification
+    def __init__(self, parent, app):
+        self.app = app
+        today = datetime.now().date()
+        self.display_year = today.year
+        self.display_month = today.month
+        self.frame = tk.Frame(parent, bg="#F6F7FB")
 
-            notification.notify(
-                title=title,
-                message=message,
-                timeout=10,
+        header = tk.Frame(self.frame, bg="#F6F7FB")
+        header.pack(fill=tk.X, pady=(0, 8))
+        tk.Button(
+            header, text="<", width=3, relief=tk.FLAT, command=lambda: self.step_month(-1)
+        ).pack(side=tk.LEFT, padx=4)
+        self.label_month = tk.Label(
+            header, font=app.font_large, bg="#F6F7FB", fg="#2E2E4F"
+        )
+        self.label_month.pack(side=tk.LEFT, padx=8)
+        tk.Button(
+            header, text=">", width=3, relief=tk.FLAT, command=lambda: self.step_month(1)
+        ).pack(side=tk.LEFT, padx=4)
+        tk.Button(
+            header,
+            text="Today",
+            font=app.font_button,
+            bg="#FFFFFF",
+            fg="#2E2E4F",
+            relief=tk.FLAT,
+            command=self.show_today,
+        ).pack(side=tk.LEFT, padx=8)
+
+        days_header = tk.Frame(self.frame, bg="#F6F7FB")
+        days_header.pack(fill=tk.X)
+        for name in ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]:
+            tk.Label(days_header, text=name, bg="#F6F7FB", fg="#7A7B9A").pack(
+                side=tk.LEFT, fill=tk.X, expand=True
+            )
+
+        self.cells = []
+        for _ in range(CALENDAR_CELLS // 7):
+            row = tk.Frame(self.frame, bg="#F6F7FB")
+            row.pack(fill=tk.BOTH, expand=True)
+            for _ in range(7):
+                cell = DayCell(row, app)
+                cell.frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=2, pady=2)
+                cell.bind_click(self.open_day)
+                self.cells.append(cell)
+
+    def step_month(self, months):
+        index = self.display_year * 12 + self.display_month - 1 + months
+        self.display_year, self.display_month = divmod(index, 12)
+        self.display_month += 1
+        self.draw()
+
+    def show_today(self):
+        today = datetime.now().date()
+        self.display_year = today.year
+        self.display_month = today.month
+        self.draw()
+
+    def open_day(self, day):
+        if day is not None:
+            self.app.set_view("Agenda", day)
+
+    def draw(self):
+        self.label_month.configure(
+            text=date(self.display_year, self.display_month, 1).strftime("%B %Y")
+        )
+        layout = month_layout(self.display_year, self.display_month)
+        counts = self.app.get_day_counts(
+            date(self.display_year, self.display_month, 1),
+            calendar.monthrange(self.display_year, self.display_month)[1],
+        )
+        today = datetime.now().date()
+        for cell, day in zip(self.cells, layout):
+            if day is None:
+                cell.show(None, {}, "", today)
+            else:
+                cell.show(day, counts.get(day, {}), str(day.day), today)
+
+
+class AgendaView:
+    """Day-by-day agenda that only builds widgets for the rows on screen."""
+
+    def __init__(self, parent, app):
+        self.app = app
+        self.first_day = None
+        self.days = 0
+        self.row_pool = []
+        self.frame = tk.Frame(parent, bg="#F6F7FB")
+
+        header = tk.Frame(self.frame, bg="#F6F7FB")
+        header.pack(fill=tk.X, pady=(0, 8))
+        tk.Label(
+            header, text="Agenda", font=app.font_large, bg="#F6F7FB", fg="#2E2E4F"
+        ).pack(side=tk.LEFT)
+        tk.Button(
+            header,
+            text="Today",
+            font=app.font_button,
+            bg="#FFFFFF",
+            fg="#2E2E4F",
+            relief=tk.FLAT,
+            command=lambda: self.show_from(datetime.now().date()),
+        ).pack(side=tk.LEFT, padx=8)
+
+        self.canvas = tk.Canvas(self.frame, bg="#F6F7FB", highlightthickness=0)
+        self.scrollbar = tk.Scrollbar(
+            self.frame, orient=tk.VERTICAL, command=self.canvas.yview
+        )
+        self.canvas.configure(yscrollcommand=self.on_scrolled)
+        self.canvas.bind("<Configure>", self.on_resized)
+        self.canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+    def show_from(self, day):
+        """Start a few weeks' window at ``day``'s week and scroll it into view."""
+        monday = day - timedelta(days=day.weekday())
+        self.first_day = monday - timedelta(weeks=AGENDA_WEEKS_BEFORE)
+        self.days = AGENDA_WEEKS * 7
+        self.update_scrollregion()
+        self.canvas.yview_moveto((day - self.first_day).days / self.days)
+        self.draw()
+
+    def update_scrollregion(self):
+        height = self.days * AGENDA_ROW_HEIGHT
+        self.canvas.configure(scrollregion=(0, 0, self.canvas.winfo_width(), height))
+
+    def get_pooled_row(self, index):
+        while len(self.row_pool) <= index:
+            row = DayCell(self.canvas, self.app, horizontal=True, preview=True)
+            row.item = self.canvas.create_window(
+                (CARD_MARGIN_X, 0),
+                window=row.frame,
+                anchor="nw",
+                width=max(self.canvas.winfo_width() - 2 * CARD_MARGIN_X, 1),
+                height=AGENDA_ROW_HEIGHT - CARD_MARGIN_Y,
+                state="hidden",
+            )
+            self.row_pool.append(row)
+        return self.row_pool[index]
+
+    def draw(self):
+        if self.first_day is None:
+            self.show_from(datetime.now().date())
+            return
+        top = self.canvas.canvasy(0)
+        bottom = top + self.canvas.winfo_height()
+        first = max(0, int(top // AGENDA_ROW_HEIGHT))
+        last = min(self.days, int(bottom // AGENDA_ROW_HEIGHT) + 1)
+        if last >= self.days - AGENDA_BUFFER_DAYS:
+            # Scrolled near the end: the agenda just keeps going.
+            self.days += AGENDA_WEEKS * 7
+            self.update_scrollregion()
+        count = max(last - first, 0)
+        first_day = self.first_day + timedelta(days=first)
+        counts = self.app.get_day_counts(first_day, count)
+        today = datetime.now().date()
+        for offset in range(count):
+            day = first_day + timedelta(days=offset)
+            row = self.get_pooled_row(offset)
+            day_counts = counts.get(day, {})
+            row.show(
+                day,
+                day_counts,
+                day.strftime("%a %d %b"),
+                today,
+                self.preview_text(day, sum(day_counts.values())),
             )
-        except Exception:
-            messagebox.showinfo(title, message)
+            self.canvas.coords(row.item, CARD_MARGIN_X, (first + offset) * AGENDA_ROW_HEIGHT)
+            self.canvas.itemconfigure(row.item, state="normal")
+        for row in self.row_pool[count:]:
+            self.canvas.itemconfigure(row.item, state="hidden")
+
+    def preview_text(self, day, total):
+        if not total:
+            return ""
+        tasks = self.app.get_day_preview(day, AGENDA_PREVIEW_TASKS)
+        parts = [
+            f"{self.app.store.due_time(task['id']).strftime('%H:%M')} {task.get('name', '')}"
+            for task in tasks
+        ]
+        if total > len(tasks):
+            parts.append(f"+{total - len(tasks)} more")
+        return "  ·  ".join(parts)
+
+    def on_scrolled(self, first, last):
+        self.scrollbar.set(first, last)
+        self.draw()
+
+    def on_resized(self, event):
+        width = max(event.width - 2 * CARD_MARGIN_X, 1)
+        for row in self.row_pool:
+            self.canvas.itemconfigure(row.item, width=width)
+        self.update_scrollregion()
+        self.draw()
+
+
+class EveryoneView:
+    """Today's open tasks for every profile, cold ones from their today index."""
+
+    def __init__(self, parent, app):
+        self.app = app
+        self.frame = tk.Frame(parent, bg="#F6F7FB")
+        tk.Label(
+            self.frame,
+            text="Everyone's Today",
+            font=app.font_large,
+            bg="#F6F7FB",
+            fg="#2E2E4F",
+        ).pack(anchor=tk.W, pady=(0, 8))
+        self.text = tk.Text(
+            self.frame,
+            font=app.font_body,
+            bg="#FFFFFF",
+            fg="#2E2E4F",
+            relief=tk.FLAT,
+            wrap=tk.WORD,
+            padx=12,
+            pady=8,
+        )
+        self.text.pack(fill=tk.BOTH, expand=True)
+        self.text.tag_configure("profile", font=app.font_large, spacing1=8)
+        self.text.tag_configure("empty", foreground="#7A7B9A")
+        for category, color in CATEGORY_COLORS.items():
+            self.text.tag_configure(category, foreground=color)
+
+    def draw(self):
+        today = datetime.now().date()
+        self.text.configure(state=tk.NORMAL)
+        self.text.delete("1.0", tk.END)
+        for name in self.app.profiles.names:
+            entries = self.app.get_profile_today(name, today)
+            self.text.insert(tk.END, f"{name} ({len(entries)})\n", "profile")
+            if not entries:
+                self.text.insert(tk.END, "  Nothing due today\n", "empty")
+            for entry in entries:
+                self.text.insert(tk.END, f"  {entry['due'][-5:]}  {entry['name']}  ")
+                self.text.insert(tk.END, f"{entry['category']}\n", entry["category"])
+        self.text.configure(state=tk.DISABLED)
+
+
+class ProfilePanel:
+    """Hidden debug window (Ctrl+Shift+D) listing the profiling hooks."""
+
+    def __init__(self, parent):
+        self.window = tk.Toplevel(parent)
+        self.window.title("Planner profile")
+        self.window.geometry("640x360")
+        self.window.configure(bg="#F6F7FB")
+
+        self.text = tk.Text(self.window, font=("Courier", 11), wrap=tk.NONE)
+        self.text.pack(fill=tk.BOTH, expand=True, padx=12, pady=(12, 6))
+
+        btn_frame = tk.Frame(self.window, bg="#F6F7FB")
+        btn_frame.pack(pady=(0, 12))
+        tk.Button(
+            btn_frame, text="Refresh", relief=tk.FLAT, command=self.refresh
+        ).pack(side=tk.LEFT, padx=6)
+        tk.Button(
+            btn_frame, text="Save JSON", relief=tk.FLAT, command=self.save
+        ).pack(side=tk.LEFT, padx=6)
+        self.refresh()
+
+    def refresh(self):
+        if PROFILER.enabled:
+            report = PROFILER.report()
+        else:
+            report = "Profiling is off. Start with --profile or PLANNER_PROFILE=1."
+        self.text.delete("1.0", tk.END)
+        self.text.insert(tk.END, report)
+
+    def save(self):
+        if PROFILER.enabled:
+            PROFILER.dump()
+            messagebox.showinfo("Profile saved", f"Wrote {PROFILER.output_path}")
 
 
 class TaskDialog:
-    def __init__(self, parent, title, on_save, task=None):
+    def __init__(self, parent, title, on_save, task=None, store=None):
         self.parent = parent
+        self.store = store
         self.on_save = on_save
         self.task = task
 
         self.window = tk.Toplevel(parent)
         self.window.title(title)
-        self.window.geometry("480x420")
+        self.window.geometry("480x480")
         self.window.configure(bg="#F6F7FB")
         self.window.transient(parent)
         self.window.grab_set()
@@ -592,7 +1951,24 @@ class TaskDialog:
             state="readonly",
             font=font_entry,
         )
-        remind_menu.pack(fill=tk.X, pady=(0, 16))
+        remind_menu.pack(fill=tk.X, pady=(0, 10))
+
+        tk.Label(
+            self.container,
+            text="Repeat",
+            font=font_label,
+            bg="#F6F7FB",
+            fg="#2E2E4F",
+        ).pack(anchor=tk.W, pady=(0, 4))
+        self.repeat_var = tk.StringVar()
+        repeat_menu = ttk.Combobox(
+            self.container,
+            textvariable=self.repeat_var,
+            values=REPEAT_OPTIONS,
+            state="readonly",
+            font=font_entry,
+        )
+        repeat_menu.pack(fill=tk.X, pady=(0, 16))
 
         tk.Label(
             self.container,
@@ -642,60 +2018,63 @@ class TaskDialog:
                     self.entry_date.insert(0, due_value)
             self.remind_var.set(str(task.get("remind", REMIND_OPTIONS[0])))
             self.category_var.set(task.get("category", CATEGORIES[0]))
+            self.repeat_var.set(REPEAT_RULES.get(task.get("repeat"), REPEAT_OPTIONS[0]))
         else:
             self.remind_var.set(str(REMIND_OPTIONS[1]))
             self.category_var.set(CATEGORIES[0])
+            self.repeat_var.set(REPEAT_OPTIONS[0])
 
     def save(self):
-        name = self.entry_name.get().strip()
         due_date = self.entry_date.get().strip()
         due_time = self.entry_time.get().strip()
-        remind = self.remind_var.get()
-        category = self.category_var.get()
-
-        if not name:
-            messagebox.showerror("Missing name", "Please enter a task name.")
-            return
-
         try:
-            datetime.strptime(f"{due_date} {due_time}", DATE_FORMAT)
-        except ValueError:
-            messagebox.showerror(
-                "Date format",
-                "Please use date YYYY-MM-DD and time HH:MM (24-hour).",
-            )
-            return
-
-        if remind not in [str(option) for option in REMIND_OPTIONS]:
-            messagebox.showerror(
-                "Remind minutes", "Please choose a reminder time from the list."
+            data = check_task_fields(
+                {
+                    "name": self.entry_name.get(),
+                    "due": f"{due_date} {due_time}",
+                    "remind": self.remind_var.get(),
+                    "category": self.category_var.get(),
+                    "repeat": next(
+                        (
+                            rule
+                            for rule, label in REPEAT_RULES.items()
+                            if label == self.repeat_var.get()
+                        ),
+                        None,
+                    ),
+                }
             )
+        except ValueError as error:
+            messagebox.showerror(*error.args)
             return
 
-        if category not in CATEGORIES:
-            messagebox.showerror("Category", "Please choose a category.")
-            return
-
-        data = {
-            "id": self.task["id"] if self.task else None,
-            "name": name,
-            "due": f"{due_date} {due_time}",
-            "remind": int(remind),
-            "category": category,
-        }
+        data["id"] = self.task["id"] if self.task else None
         self.on_save(data)
         self.window.destroy()
 
     def open_calendar(self):
-        CalendarPopup(self.window, self.entry_date)
+        CalendarPopup(self.window, self.entry_date, self.store)
+
+
+@functools.lru_cache(maxsize=48)
+def month_layout(year, month):
+    """The month's days laid out on a fixed 6x7 grid, None for blank cells."""
+    first = date(year, month, 1)
+    lead = first.weekday()
+    days_in_month = calendar.monthrange(year, month)[1]
+    cells = [None] * lead
+    cells.extend(first + timedelta(days=offset) for offset in range(days_in_month))
+    cells.extend([None] * (CALENDAR_CELLS - len(cells)))
+    return tuple(cells)
 
 
 class CalendarPopup:
-    def __init__(self, parent, entry_widget):
+    def __init__(self, parent, entry_widget, store=None):
         self.entry_widget = entry_widget
+        self.store = store
         self.window = tk.Toplevel(parent)
         self.window.title("Pick a date")
-        self.window.geometry("340x340")
+        self.window.geometry("360x400")
         self.window.configure(bg="#F6F7FB")
         self.window.transient(parent)
         self.window.grab_set()
@@ -703,6 +2082,7 @@ class CalendarPopup:
         self.current_date = datetime.now().date()
         self.display_year = self.current_date.year
         self.display_month = self.current_date.month
+        self.layout = ()
 
         header = tk.Frame(self.window, bg="#F6F7FB")
         header.pack(pady=8)
@@ -725,39 +2105,59 @@ class CalendarPopup:
         self.calendar_frame = tk.Frame(self.window, bg="#F6F7FB")
         self.calendar_frame.pack(pady=8)
 
+        days_header = tk.Frame(self.calendar_frame, bg="#F6F7FB")
+        days_header.pack()
+        for day in ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]:
+            tk.Label(days_header, text=day, width=4, bg="#F6F7FB").pack(side=tk.LEFT)
+
+        # Built once; changing month only relabels these buttons.
+        self.day_buttons = []
+        for _ in range(CALENDAR_CELLS // 7):
+            row = tk.Frame(self.calendar_frame, bg="#F6F7FB")
+            row.pack()
+            for _ in range(7):
+                index = len(self.day_buttons)
+                btn = tk.Button(
+                    row,
+                    width=4,
+                    height=2,
+                    relief=tk.FLAT,
+                    command=lambda index=index: self.select_cell(index),
+                )
+                btn.pack(side=tk.LEFT, padx=1, pady=1)
+                self.day_buttons.append(btn)
+
         self.draw_calendar()
 
     def draw_calendar(self):
-        for widget in self.calendar_frame.winfo_children():
-            widget.destroy()
-
         month_name = datetime(self.display_year, self.display_month, 1).strftime(
             "%B %Y"
         )
         self.label_month.config(text=month_name)
 
-        days_header = tk.Frame(self.calendar_frame, bg="#F6F7FB")
-        days_header.pack()
-        for day in ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]:
-            tk.Label(days_header, text=day, width=4, bg="#F6F7FB").pack(side=tk.LEFT)
+        self.layout = month_layout(self.display_year, self.display_month)
+        counts = {}
+        if self.store is not None:
+            first_day = date(self.display_year, self.display_month, 1)
+            days = calendar.monthrange(self.display_year, self.display_month)[1]
+            counts = self.store.open_counts_by_day(first_day, days)
 
-        weeks = calendar.monthcalendar(self.display_year, self.display_month)
-        for week in weeks:
-            row = tk.Frame(self.calendar_frame, bg="#F6F7FB")
-            row.pack()
-            for day in week:
-                if day == 0:
-                    tk.Label(row, text="", width=4, bg="#F6F7FB").pack(side=tk.LEFT)
-                else:
-                    btn = tk.Button(
-                        row,
-                        text=str(day),
-                        width=4,
-                        relief=tk.FLAT,
-                        bg="#FFFFFF",
-                        command=lambda d=day: self.select_date(d),
-                    )
-                    btn.pack(side=tk.LEFT, padx=1, pady=1)
+        for btn, day in zip(self.day_buttons, self.layout):
+            if day is None:
+                btn.config(text="", state=tk.DISABLED, bg="#F6F7FB")
+                continue
+            count = counts.get(day, 0)
+            btn.config(
+                text=f"{day.day}\n{count}" if count else str(day.day),
+                state=tk.NORMAL,
+                bg=LOAD_COLORS[min(count, len(LOAD_COLORS) - 1)],
+                fg="#7B6CFF" if day == self.current_date else "#2E2E4F",
+            )
+
+    def select_cell(self, index):
+        day = self.layout[index]
+        if day is not None:
+            self.select_date(day.day)
 
     def select_date(self, day):
         selected = datetime(self.display_year, self.display_month, day).strftime(
@@ -785,6 +2185,25 @@ class CalendarPopup:
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Kid Planner")
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const=DEFAULT_PROFILE_PATH,
+        metavar="PATH",
+        help=f"time the hot paths and write them to PATH on exit (default {DEFAULT_PROFILE_PATH})",
+    )
+    parser.add_argument(
+        "--serve",
+        nargs="?",
+        type=int,
+        const=DEFAULT_API_PORT,
+        metavar="PORT",
+        help=f"serve the JSON API on localhost:PORT (default {DEFAULT_API_PORT})",
+    )
+    args = parser.parse_args()
+    if args.profile:
+        PROFILER.enable(args.profile)
     root = tk.Tk()
-    app = PlannerApp(root)
+    app = PlannerApp(root, api_port=args.serve)
     root.mainloop()
@@ -0,0 +1,199 @@
+import json
+import os
+import re
+from collections import OrderedDict
+from datetime import timedelta
+
+from recurrence import is_recurring, parse_day
+from storage import atomic_write_json
+from task_store import DATE_FORMAT, TaskStore, parse_datetime, with_defaults
+
+DEFAULT_PROFILE = "Default"
+PROFILES_FILE = "profiles.json"
+WARM_PROFILES = 3
+TODAY_INDEX_DAYS = 14
+
+
+def profile_slug(name):
+    return re.sub(r"[^a-z0-9]+", "-", name.lower()).strip("-")
+
+
+class ProfileRegistry:
+    """Profile names, which one is active, and where each one's shard lives.
+
+    The default profile keeps ``default_path`` (the original tasks.json) so
+    existing data carries over; every other profile gets its own file next
+    to it, e.g. ``tasks-sam.json``.
+    """
+
+    def __init__(self, default_path, path=PROFILES_FILE):
+        self.path = path
+        self.default_path = default_path
+        self.names = [DEFAULT_PROFILE]
+        self.active = DEFAULT_PROFILE
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path, encoding="utf-8") as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            return
+        if not isinstance(data, dict):
+            return
+        slugs = {profile_slug(DEFAULT_PROFILE)}
+        for name in data.get("profiles", ()):
+            if isinstance(name, str) and profile_slug(name) not in slugs:
+                slugs.add(profile_slug(name))
+                self.names.append(name)
+        if data.get("active") in self.names:
+            self.active = data["active"]
+
+    def save(self):
+        atomic_write_json(self.path, {"active": self.active, "profiles": self.names}, indent=2)
+
+    def add(self, name):
+        name = name.strip()
+        slug = profile_slug(name)
+        if not slug:
+            raise ValueError("Profile names need at least one letter or number.")
+        if any(profile_slug(existing) == slug for existing in self.names):
+            raise ValueError(f"There is already a profile called {name}.")
+        self.names.append(name)
+        self.save()
+        return name
+
+    def set_active(self, name):
+        if name not in self.names:
+            raise KeyError(name)
+        self.active = name
+        self.save()
+
+    def shard_path(self, name):
+        if name == DEFAULT_PROFILE:
+            return self.default_path
+        root, ext = os.path.splitext(self.default_path)
+        return f"{root}-{profile_slug(name)}{ext}"
+
+
+class Profile:
+    """One profile's storage and loaded indexes, parked while another is active."""
+
+    def __init__(self, name, storage, store, reminders, search_index, history):
+        self.name = name
+        self.storage = storage
+        self.store = store
+        self.reminders = reminders
+        self.search_index = search_index
+        self.history = history
+
+
+class ProfileCache:
+    """The most recently used inactive profiles, kept loaded for quick switching."""
+
+    def __init__(self, size=WARM_PROFILES):
+        self.size = size
+        self._profiles = OrderedDict()
+
+    def __contains__(self, name):
+        return name in self._profiles
+
+    def get(self, name):
+        return self._profiles.get(name)
+
+    def pop(self, name):
+        return self._profiles.pop(name, None)
+
+    def put(self, profile):
+        """Park ``profile`` and return any profiles pushed out to make room."""
+        self._profiles[profile.name] = profile
+        self._profiles.move_to_end(profile.name)
+        evicted = []
+        while len(self._profiles) > self.size:
+            evicted.append(self._profiles.popitem(last=False)[1])
+        return evicted
+
+    def clear(self):
+        profiles = list(self._profiles.values())
+        self._profiles.clear()
+        return profiles
+
+
+def today_index_path(shard_path):
+    return f"{shard_path}.today"
+
+
+def day_entries(store, first_day, days=1):
+    """Small records of the open tasks due in the window, by due time."""
+    return [
+        {
+            "id": task["id"],
+            "name": task.get("name", ""),
+            "due": store.due_time(task["id"]).strftime(DATE_FORMAT),
+            "category": task.category,
+        }
+        for task in store.iter_open_by_day(first_day, days)
+    ]
+
+
+def write_today_index(path, store, signature, first_day, days=TODAY_INDEX_DAYS):
+    """Save the next ``days`` days of open tasks for when the profile is unloaded."""
+    atomic_write_json(
+        path,
+        {
+            "signature": signature,
+            "first_day": first_day.isoformat(),
+            "days": days,
+            "tasks": day_entries(store, first_day, days),
+        },
+    )
+
+
+def read_today_index(path, signature, day):
+    """Entries due on ``day`` from a today index, or None if it is stale."""
+    try:
+        with open(path, encoding="utf-8") as file:
+            data = json.load(file)
+    except (OSError, ValueError):
+        return None
+    # The signature went through JSON, so compare it in that form.
+    if not isinstance(data, dict) or data.get("signature") != json.loads(json.dumps(signature)):
+        return None
+    first_day = parse_day(data.get("first_day"))
+    days = data.get("days")
+    if first_day is None or not isinstance(days, int):
+        return None
+    if not first_day <= day < first_day + timedelta(days=days):
+        return None
+    prefix = day.isoformat()
+    return [
+        entry
+        for entry in data.get("tasks", ())
+        if isinstance(entry, dict) and str(entry.get("due", "")).startswith(prefix)
+    ]
+
+
+def read_profile_today(storage, shard_path, day):
+    """Open tasks due on ``day`` for a profile that is not loaded.
+
+    Normally this only reads the profile's small today index. If the shard
+    changed since the index was written, or the index no longer covers
+    ``day``, the shard is streamed once, keeping just the tasks that can
+    fall in a new window, and the index is rewritten.
+    """
+    index_path = today_index_path(shard_path)
+    signature = storage.data_signature()
+    entries = read_today_index(index_path, signature, day)
+    if entries is not None:
+        return entries
+    if not storage.exists():
+        return []
+    end = day + timedelta(days=TODAY_INDEX_DAYS)
+    candidates = []
+    for task in storage.iter_tasks(read_only=True):
+        due = parse_datetime(task.get("due"))
+        if is_recurring(task) or (due is not None and day <= due.date() < end):
+            candidates.append(with_defaults(task))
+    store = TaskStore(candidates)
+    write_today_index(index_path, store, signature, day)
+    return day_entries(store, day)
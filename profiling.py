@@ -0,0 +1,127 @@
+import bisect
+import functools
+import json
+import os
+import threading
+import time
+
+PROFILE_ENV = "PLANNER_PROFILE"
+DEFAULT_PROFILE_PATH = "planner_profile.json"
+HISTOGRAM_BOUNDS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+
+class Timing:
+    """Call count, total and a fixed-bucket latency histogram for one hook."""
+
+    __slots__ = ("count", "total_ms", "max_ms", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.buckets = [0] * (len(HISTOGRAM_BOUNDS_MS) + 1)
+
+    def add(self, elapsed_ms):
+        self.count += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self.buckets[bisect.bisect_left(HISTOGRAM_BOUNDS_MS, elapsed_ms)] += 1
+
+    def percentile(self, fraction):
+        """Upper bound of the bucket holding the given fraction of calls."""
+        target = fraction * self.count
+        seen = 0
+        for bound, count in zip(HISTOGRAM_BOUNDS_MS, self.buckets):
+            seen += count
+            if seen >= target:
+                return bound
+        return self.max_ms
+
+    def to_dict(self):
+        labels = [f"<={bound}ms" for bound in HISTOGRAM_BOUNDS_MS]
+        labels.append(f">{HISTOGRAM_BOUNDS_MS[-1]}ms")
+        return {
+            "count": self.count,
+            "total_ms": round(self.total_ms, 3),
+            "mean_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+            "max_ms": round(self.max_ms, 3),
+            "p50_ms": self.percentile(0.5),
+            "p95_ms": self.percentile(0.95),
+            "histogram": dict(zip(labels, self.buckets)),
+        }
+
+
+class Profiler:
+    """Timing hooks that cost nothing until profiling is switched on.
+
+    ``instrument`` swaps methods for timed wrappers only while enabled, so a
+    normal run calls the original methods directly.
+    """
+
+    def __init__(self, output_path=None):
+        self.output_path = output_path
+        self.timings = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_environment(cls):
+        """Enabled by ``PLANNER_PROFILE=1`` or ``PLANNER_PROFILE=path.json``."""
+        value = os.environ.get(PROFILE_ENV, "").strip()
+        if not value or value == "0":
+            return cls()
+        return cls(DEFAULT_PROFILE_PATH if value == "1" else value)
+
+    @property
+    def enabled(self):
+        return self.output_path is not None
+
+    def enable(self, output_path=DEFAULT_PROFILE_PATH):
+        self.output_path = output_path
+
+    def record(self, name, elapsed_ms):
+        with self._lock:
+            timing = self.timings.get(name)
+            if timing is None:
+                timing = self.timings[name] = Timing()
+            timing.add(elapsed_ms)
+
+    def wrap(self, name, func):
+        @functools.wraps(func)
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.record(name, (time.perf_counter() - start) * 1000)
+
+        return timed
+
+    def instrument(self, target, names, prefix=""):
+        """Wrap the named methods of an instance or class in place."""
+        if not self.enabled:
+            return
+        for name in names:
+            func = getattr(target, name)
+            if getattr(func, "__wrapped__", None) is None:
+                setattr(target, name, self.wrap(prefix + name, func))
+
+    def snapshot(self):
+        with self._lock:
+            return {name: timing.to_dict() for name, timing in sorted(self.timings.items())}
+
+    def report(self):
+        lines = [f"{'hook':<26}{'calls':>8}{'mean ms':>10}{'p95 ms':>9}{'max ms':>10}"]
+        for name, stats in self.snapshot().items():
+            lines.append(
+                f"{name:<26}{stats['count']:>8}{stats['mean_ms']:>10.2f}"
+                f"{stats['p95_ms']:>9}{stats['max_ms']:>10.2f}"
+            )
+        return "\n".join(lines)
+
+    def dump(self, path=None):
+        with open(path or self.output_path, "w", encoding="utf-8") as file:
+            json.dump(
+                {"histogram_bounds_ms": HISTOGRAM_BOUNDS_MS, "hooks": self.snapshot()},
+                file,
+                indent=2,
+            )
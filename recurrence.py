@@ -0,0 +1,72 @@
+from datetime import date, timedelta
+
+REPEAT_RULES = {
+    "daily": "Every day",
+    "weekdays": "Every weekday",
+    "weekly": "Every week",
+}
+OCCURRENCE_SEPARATOR = "@"
+
+
+def is_recurring(task):
+    return task.get("repeat") in REPEAT_RULES
+
+
+def parse_day(value):
+    if not isinstance(value, str):
+        return None
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        return None
+
+
+def occurs_on(rule, anchor_day, day):
+    if day < anchor_day:
+        return False
+    if rule == "weekdays":
+        return day.weekday() < 5
+    if rule == "weekly":
+        return day.weekday() == anchor_day.weekday()
+    return True
+
+
+def iter_days(rule, anchor_day, first_day, days):
+    """Yield the days a series falls on in the ``days`` days from ``first_day``.
+
+    Works out each day from the rule as it goes, so an open-ended series
+    costs nothing outside the window asked for.
+    """
+    end = first_day + timedelta(days=days)
+    day = max(first_day, anchor_day)
+    step = timedelta(days=1)
+    if rule == "weekly":
+        day += timedelta(days=(anchor_day.weekday() - day.weekday()) % 7)
+        step = timedelta(days=7)
+    while day < end:
+        if occurs_on(rule, anchor_day, day):
+            yield day
+        day += step
+
+
+def occurrence_id(series_id, day):
+    return f"{series_id}{OCCURRENCE_SEPARATOR}{day.isoformat()}"
+
+
+def split_occurrence_id(task_id):
+    """Return ``(series_id, day)`` for an occurrence id, else None."""
+    if not isinstance(task_id, str):
+        return None
+    series_id, separator, day = task_id.rpartition(OCCURRENCE_SEPARATOR)
+    day = parse_day(day)
+    if not separator or not series_id or day is None:
+        return None
+    return series_id, day
+
+
+def add_done_day(done_days, day):
+    # Kept for good: the month and agenda views can page back to any past
+    # occurrence, and one short string per completion stays small on disk.
+    kept = {value for value in done_days if isinstance(value, str)}
+    kept.add(day.isoformat())
+    return sorted(kept)
@@ -0,0 +1,85 @@
+import heapq
+from datetime import date, timedelta
+
+from recurrence import parse_day
+
+
+class ReminderQueue:
+    """Min-heap of pending reminders keyed on ``due - remind``.
+
+    Entries are invalidated lazily: a heap entry is only live while it still
+    matches the task's current reminder time in ``_pending``. The queue keeps
+    itself current by listening to store mutations. A repeating task holds
+    one entry, for its next occurrence that has not been reminded yet.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self._heap = []
+        self._pending = {}
+        store.subscribe(self.on_store_change)
+        self.rebuild()
+
+    def __len__(self):
+        return len(self._pending)
+
+    def rebuild(self):
+        self._pending = {}
+        for task in self.store.with_status("Open"):
+            remind_at = self.remind_time(task)
+            if remind_at is not None:
+                self._pending[task["id"]] = remind_at
+        self._heap = [(remind_at, task_id) for task_id, remind_at in self._pending.items()]
+        heapq.heapify(self._heap)
+
+    def adopt(self, other):
+        self._heap = other._heap
+        self._pending = other._pending
+
+    def remind_target(self, task):
+        if task is None or not self.store.is_recurring(task["id"]):
+            return task
+        first_day = date.today()
+        notified_through = parse_day(task.get("notified_through"))
+        if notified_through is not None:
+            first_day = max(first_day, notified_through + timedelta(days=1))
+        return self.store.next_occurrence(task["id"], first_day)
+
+    def remind_time(self, task):
+        task = self.remind_target(task)
+        if task is None or task.get("status") != "Open" or task.get("notified"):
+            return None
+        due = self.store.due_time(task["id"])
+        if due is None:
+            return None
+        return due - timedelta(minutes=int(task.get("remind", 0)))
+
+    def on_store_change(self, op, task_id, payload=None):
+        task = self.store.get(task_id) if op != "remove" else None
+        remind_at = self.remind_time(task) if task is not None else None
+        if remind_at is None:
+            self._pending.pop(task_id, None)
+        elif self._pending.get(task_id) != remind_at:
+            self._pending[task_id] = remind_at
+            heapq.heappush(self._heap, (remind_at, task_id))
+
+    def next_time(self):
+        self._drop_stale()
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now):
+        due_tasks = []
+        while True:
+            self._drop_stale()
+            if not self._heap or self._heap[0][0] > now:
+                return due_tasks
+            _, task_id = heapq.heappop(self._heap)
+            del self._pending[task_id]
+            task = self.remind_target(self.store.get(task_id))
+            if task is not None:
+                due_tasks.append(task)
+
+    def _drop_stale(self):
+        heap = self._heap
+        while heap and self._pending.get(heap[0][1]) != heap[0][0]:
+            heapq.heappop(heap)
@@ -0,0 +1,115 @@
+import threading
+
+SAVE_DELAY_MS = 300
+SAVE_POLL_MS = 50
+FLUSH_ATTEMPTS = 3
+
+
+class WriteBehindSaver:
+    """Coalesces save requests into background writes.
+
+    ``mark_dirty`` arms a single timer. When it fires, ``before_save`` runs
+    and the storage takes its snapshot, both on the Tk thread, then a worker
+    thread serializes and writes it. Edits made during a write just leave
+    the saver dirty for the next round, so a burst of changes costs one or
+    two writes. ``schedule(ms, callback)`` and ``cancel(id)`` are Tk's
+    ``after`` and ``after_cancel``.
+    """
+
+    def __init__(
+        self,
+        storage,
+        store,
+        schedule,
+        cancel,
+        before_save=None,
+        on_error=None,
+        delay_ms=SAVE_DELAY_MS,
+    ):
+        self.storage = storage
+        self.store = store
+        self.schedule = schedule
+        self.cancel = cancel
+        self.before_save = before_save
+        self.on_error = on_error
+        self.delay_ms = delay_ms
+        self.dirty = False
+        self._timer = None
+        self._writer = None
+        self._result = None
+
+    @property
+    def writing(self):
+        return self._writer is not None
+
+    @property
+    def pending(self):
+        """True while some edit has not reached the storage yet."""
+        return self.dirty or self._writer is not None
+
+    def mark_dirty(self):
+        self.dirty = True
+        if self._timer is None and self._writer is None:
+            self._timer = self.schedule(self.delay_ms, self._start_write)
+
+    def flush(self):
+        """Finish any write in flight and write what is left, on this thread."""
+        if self._timer is not None:
+            self.cancel(self._timer)
+            self._timer = None
+        if self._writer is not None:
+            self._writer.join()
+            self._handle(self._take_result())
+        for _ in range(FLUSH_ATTEMPTS):
+            if not self.dirty:
+                return True
+            self._write(self._prepare())
+            self._handle(self._take_result())
+        return not self.dirty
+
+    def _prepare(self):
+        if self.before_save is not None:
+            self.before_save()
+        self.dirty = False
+        return self.storage.snapshot(self.store)
+
+    def _start_write(self):
+        self._timer = None
+        snapshot = self._prepare()
+        # Not a daemon: an interpreter exit waits for the file to land.
+        self._writer = threading.Thread(
+            target=self._write, args=(snapshot,), name="task-saver"
+        )
+        self._writer.start()
+        self._timer = self.schedule(SAVE_POLL_MS, self._poll)
+
+    def _write(self, snapshot):
+        try:
+            self._result = self.storage.write(snapshot)
+        except Exception as error:
+            self._result = error
+
+    def _poll(self):
+        self._timer = None
+        if self._writer.is_alive():
+            self._timer = self.schedule(SAVE_POLL_MS, self._poll)
+            return
+        if self._handle(self._take_result()) and self.dirty:
+            self.mark_dirty()
+
+    def _take_result(self):
+        self._writer = None
+        result, self._result = self._result, None
+        return result
+
+    def _handle(self, result):
+        """Note a write's outcome; False means stop retrying until the next edit."""
+        if result is True:
+            return True
+        self.dirty = True
+        if isinstance(result, Exception):
+            if self.on_error is not None:
+                self.on_error(result)
+            return False
+        # Someone else wrote the file first; before_save merges it next round.
+        return True
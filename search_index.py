@@ -0,0 +1,114 @@
+import bisect
+import re
+from datetime import datetime
+
+_TOKEN = re.compile(r"\w+")
+
+
+def tokenize(text):
+    if not isinstance(text, str):
+        return ()
+    return tuple(dict.fromkeys(_TOKEN.findall(text.lower())))
+
+
+class SearchIndex:
+    """Inverted index from name tokens to task ids with prefix lookup.
+
+    Every query term is matched as a word prefix, so results update as the
+    user types. Distinct tokens are kept in a sorted vocabulary so a prefix
+    maps to a contiguous slice of it. The index keeps itself current by
+    listening to store mutations.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self._postings = {}
+        self._vocabulary = []
+        self._tokens_by_id = {}
+        store.subscribe(self.on_store_change)
+        self.rebuild()
+
+    def rebuild(self):
+        self._postings = {}
+        self._tokens_by_id = {}
+        for task in self.store:
+            tokens = tokenize(task.get("name"))
+            self._tokens_by_id[task["id"]] = tokens
+            for token in tokens:
+                self._postings.setdefault(token, set()).add(task["id"])
+        self._vocabulary = sorted(self._postings)
+
+    def adopt(self, other):
+        self._postings = other._postings
+        self._vocabulary = other._vocabulary
+        self._tokens_by_id = other._tokens_by_id
+
+    def on_store_change(self, op, task_id, payload=None):
+        if op == "update" and "name" not in payload:
+            return
+        self._remove(task_id)
+        if op != "remove":
+            self._add(task_id, tokenize(self.store.get(task_id).get("name")))
+
+    def search(self, query):
+        """Return the set of ids whose name matches every term, or None for no query."""
+        terms = tokenize(query)
+        if not terms:
+            return None
+        postings = self._postings
+        hits = sorted(
+            (set().union(*(postings[token] for token in self._prefix_tokens(term))) for term in terms),
+            key=len,
+        )
+        matches = hits[0]
+        for other in hits[1:]:
+            matches &= other
+        return matches
+
+    def matches(self, task, query):
+        terms = tokenize(query)
+        tokens = self._tokens_by_id.get(self.store.series_id(task["id"]), ())
+        return not terms or self._has_terms(tokens, terms)
+
+    def filter_tasks(self, query, active_filter="All", active_category="All", now=None):
+        """Search results limited to a sidebar filter, in list order."""
+        matches = self.search(query)
+        if matches is None:
+            return self.store.filter_tasks(active_filter, active_category, now)
+        if active_filter in ("Today", "This Week"):
+            today = (now or datetime.now()).date()
+            days = 1 if active_filter == "Today" else 8
+            if self.store.count_open_by_day(today, days) < len(matches):
+                # The day buckets are the smaller side; walk them instead.
+                return [
+                    task
+                    for task in self.store.filter_tasks(active_filter, active_category, now)
+                    if self.store.series_id(task.id) in matches
+                ]
+        return self.store.filter_subset(matches, active_filter, active_category, now)
+
+    def _prefix_tokens(self, prefix):
+        lo = bisect.bisect_left(self._vocabulary, prefix)
+        hi = bisect.bisect_left(self._vocabulary, prefix + "\U0010ffff")
+        return self._vocabulary[lo:hi]
+
+    @staticmethod
+    def _has_terms(tokens, terms):
+        return all(any(token.startswith(term) for token in tokens) for term in terms)
+
+    def _add(self, task_id, tokens):
+        self._tokens_by_id[task_id] = tokens
+        for token in tokens:
+            posting = self._postings.get(token)
+            if posting is None:
+                posting = self._postings[token] = set()
+                bisect.insort(self._vocabulary, token)
+            posting.add(task_id)
+
+    def _remove(self, task_id):
+        for token in self._tokens_by_id.pop(task_id, ()):
+            posting = self._postings[token]
+            posting.discard(task_id)
+            if not posting:
+                del self._postings[token]
+                del self._vocabulary[bisect.bisect_left(self._vocabulary, token)]
@@ -0,0 +1,710 @@
+import json
+import os
+import shutil
+import sqlite3
+import threading
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, time, timedelta
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+from json_stream import BadRecord, iter_json_array
+from task_store import DATE_FORMAT, parse_datetime, record_problem, task_json, with_defaults
+
+JOURNAL_COMPACT_BYTES = 1024 * 1024
+
+
+def fsync_directory(path):
+    directory = os.path.dirname(os.path.abspath(path))
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def file_signature(path):
+    """Cheap change token for a file: inode, size and mtime, or None if missing."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+
+@contextmanager
+def file_lock(path):
+    """Hold an exclusive advisory lock on ``path``, creating it if needed.
+
+    Other tools that write tasks.json should take the same lock on
+    ``tasks.json.lock`` around their read-modify-write.
+    """
+    with open(path, "a+b") as file:
+        if fcntl is not None:
+            fcntl.flock(file.fileno(), fcntl.LOCK_EX)
+        else:
+            file.seek(0)
+            msvcrt.locking(file.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(file.fileno(), fcntl.LOCK_UN)
+            else:
+                file.seek(0)
+                msvcrt.locking(file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def atomic_write_json(path, data, indent=None, default=task_json):
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as file:
+        json.dump(data, file, indent=indent, default=default)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temp_path, path)
+    fsync_directory(path)
+
+
+def unusable_record(record, seen):
+    """The quarantine entry for a record read from a tasks file, or None if usable."""
+    if isinstance(record, BadRecord):
+        return {"reason": record.reason, "raw": record.raw}
+    if not isinstance(record, dict):
+        return {"reason": "not an object", "record": record}
+    if not isinstance(record.get("id"), str) or not record["id"]:
+        return {"reason": "missing id", "record": record}
+    if record["id"] in seen:
+        return {"reason": "duplicate id", "record": record}
+    problem = record_problem(record)
+    if problem is not None:
+        return {"reason": problem, "record": record}
+    return None
+
+
+class JsonStorage:
+    """Stores every task in one JSON file, rewritten on each commit.
+
+    ``commit`` is split into ``snapshot``, a cheap capture taken on the Tk
+    thread, and ``write``, the slow part, which is safe to run on a worker.
+    """
+
+    supports_queries = False
+
+    def __init__(self, path):
+        self.path = path
+        self.quarantine_path = f"{path}.quarantine"
+        self.lock_path = f"{path}.lock"
+        self.quarantined = 0
+        self.signature = None
+        # Each local change gets a number; ids changed after the last
+        # snapshot that reached the file still count as local.
+        self._changed_at = {}
+        self._version = 0
+        self._saved_version = 0
+        self._syncing = False
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def load(self):
+        return list(self.iter_tasks())
+
+    def iter_tasks(self, progress=None, read_only=False):
+        """Stream tasks from the file, setting unreadable records aside.
+
+        Records that are not valid JSON objects with a string id, repeat an
+        id already seen or hold a field of the wrong type are appended to
+        ``quarantine_path`` and counted in ``quarantined`` instead of failing
+        the whole load. With ``read_only`` they are only skipped.
+        """
+        self.quarantined = 0
+        self.signature = file_signature(self.path)
+        seen = set()
+        unusable = []
+        for record in iter_json_array(self.path, progress):
+            entry = unusable_record(record, seen)
+            if entry is None:
+                seen.add(record["id"])
+                yield record
+            else:
+                unusable.append(entry)
+        if unusable and not read_only:
+            self.quarantine(unusable)
+
+    def quarantine(self, entries):
+        """Append entries to ``quarantine_path``, skipping ones already there.
+
+        Until the tasks file is rewritten, every load finds the same bad
+        records; only new ones are counted in ``quarantined``.
+        """
+        try:
+            with open(self.quarantine_path, encoding="utf-8") as file:
+                known = {line.rstrip("\n") for line in file}
+        except OSError:
+            known = set()
+        lines = [json.dumps(entry) for entry in entries]
+        lines = [line for line in lines if line not in known]
+        if not lines:
+            return
+        with open(self.quarantine_path, "a", encoding="utf-8") as file:
+            for line in lines:
+                file.write(line + "\n")
+        self.quarantined += len(lines)
+
+    def set_aside(self):
+        """Move an unreadable tasks file out of the way instead of overwriting it."""
+        if os.path.exists(self.path):
+            os.replace(self.path, f"{self.path}.unreadable")
+
+    def save(self, tasks):
+        atomic_write_json(self.path, tasks, indent=2)
+        self.signature = file_signature(self.path)
+        self._changed_at.clear()
+
+    def record(self, op, task_id, payload=None):
+        if not self._syncing:
+            self._version += 1
+            self._changed_at[task_id] = self._version
+
+    def snapshot(self, store):
+        # Task records are shared rather than copied up front, which would
+        # cost a dict per task; the store pins a copy of any task edited
+        # while the write is running and the worker writes that instead.
+        self._changed_at = {
+            task_id: version
+            for task_id, version in self._changed_at.items()
+            if version > self._saved_version
+        }
+        return store.to_list(), store.pin(), self._version
+
+    def write(self, snapshot):
+        """Write a snapshot; False if another process changed the file first."""
+        tasks, pinned, version = snapshot
+
+        def as_of_snapshot(task):
+            try:
+                data = task.to_dict()
+            except RuntimeError:
+                # Edited mid-copy; the store pinned the earlier copy first.
+                data = None
+            return pinned.get(task.id, data)
+
+        with self.lock():
+            if self.changed_on_disk():
+                return False
+            atomic_write_json(self.path, tasks, indent=2, default=as_of_snapshot)
+            self.signature = file_signature(self.path)
+        self._saved_version = version
+        return True
+
+    def lock(self):
+        return file_lock(self.lock_path)
+
+    def is_local_change(self, task_id):
+        return self._changed_at.get(task_id, 0) > self._saved_version
+
+    def changed_on_disk(self):
+        if self.signature is None:
+            return False
+        return file_signature(self.path) not in (None, self.signature)
+
+    def data_signature(self):
+        """Change token for everything this storage keeps on disk."""
+        return file_signature(self.path)
+
+    def sync_from_disk(self, store):
+        """Merge records another process changed in the file into ``store``.
+
+        Records are matched by id and only those that differ from the store
+        are applied, replacing the whole task; ids changed here since our
+        last write keep the local version. Records ``iter_tasks`` would not
+        load are quarantined instead, and a task whose record is unusable
+        keeps its local version too. Returns the changed ids, or None if the
+        file could not be read cleanly (say, mid-write), in which case the
+        next check retries.
+        """
+        signature = file_signature(self.path)
+        if signature is None:
+            return None
+        changed = {}
+        seen = set()
+        unusable = []
+        try:
+            for record in iter_json_array(self.path):
+                entry = unusable_record(record, seen)
+                if entry is not None:
+                    unusable.append(entry)
+                    if isinstance(record, dict) and isinstance(record.get("id"), str):
+                        seen.add(record["id"])
+                    continue
+                task_id = record["id"]
+                seen.add(task_id)
+                if self.is_local_change(task_id):
+                    continue
+                record = with_defaults(record)
+                task = store.get(task_id)
+                if task is None or task.to_dict() != record:
+                    changed[task_id] = record
+        except (OSError, ValueError):
+            return None
+        if file_signature(self.path) != signature:
+            return None
+        if unusable:
+            self.quarantine(unusable)
+        removed = [
+            task.id
+            for task in store
+            if task.id not in seen and not self.is_local_change(task.id)
+        ]
+        self._syncing = True
+        try:
+            for task_id, record in changed.items():
+                # Replaced rather than updated, so fields the other program
+                # dropped go too.
+                if task_id in store:
+                    store.remove(task_id)
+                store.add(record)
+            for task_id in removed:
+                store.remove(task_id)
+        finally:
+            self._syncing = False
+        self.signature = signature
+        return list(changed) + removed
+
+    def keep_outside_copy(self):
+        """Copy aside a file another program changed and let our next save replace it."""
+        backup_path = f"{self.path}.outside"
+        shutil.copyfile(self.path, backup_path)
+        self.signature = file_signature(self.path)
+        return backup_path
+
+    def commit(self, store):
+        return self.write(self.snapshot(store))
+
+    def close(self):
+        pass
+
+
+class JournalStorage(JsonStorage):
+    """Snapshot file plus an append-only journal of mutations.
+
+    Each add/update/remove is appended as one JSON line and fsynced on
+    commit. Once the journal grows past ``compact_bytes`` it is rotated and
+    folded into a fresh snapshot on a background thread.
+    """
+
+    def __init__(self, path, compact_bytes=JOURNAL_COMPACT_BYTES):
+        super().__init__(path)
+        self.journal_path = f"{path}.journal"
+        self.compacting_path = f"{path}.journal.compacting"
+        self.compact_bytes = compact_bytes
+        self._journal = None
+        self._pending = False
+        self._compactor = None
+        self._local_changes = set()
+        self._folding = set()
+
+    def exists(self):
+        return any(
+            os.path.exists(path)
+            for path in (self.path, self.journal_path, self.compacting_path)
+        )
+
+    def iter_tasks(self, progress=None, read_only=False):
+        tasks = {}
+        self.quarantined = 0
+        if os.path.exists(self.path):
+            for task in super().iter_tasks(progress, read_only):
+                tasks[task["id"]] = task
+        replayed = set()
+        for path in (self.compacting_path, self.journal_path):
+            if os.path.exists(path):
+                replayed |= self._replay(path, tasks)
+        # Journaled changes skip the snapshot's checks; an update can still
+        # break a task that was fine there.
+        bad = [
+            {"reason": record_problem(tasks[task_id]), "record": tasks.pop(task_id)}
+            for task_id in replayed
+            if task_id in tasks and record_problem(tasks[task_id]) is not None
+        ]
+        if bad and not read_only:
+            self.quarantine(bad)
+        return iter(tasks.values())
+
+    def set_aside(self):
+        for path in (self.path, self.compacting_path, self.journal_path):
+            if os.path.exists(path):
+                os.replace(path, f"{path}.unreadable")
+
+    def save(self, tasks):
+        self.wait_for_compaction()
+        self._close_journal()
+        atomic_write_json(self.path, tasks, indent=2)
+        for path in (self.compacting_path, self.journal_path):
+            if os.path.exists(path):
+                os.remove(path)
+        self.signature = file_signature(self.path)
+        self._local_changes.clear()
+
+    def record(self, op, task_id, payload=None):
+        if self._syncing:
+            return
+        self._local_changes.add(task_id)
+        if self._journal is None:
+            self._journal = self._open_journal()
+        entry = {"op": op, "id": task_id}
+        if payload is not None:
+            entry["data"] = payload
+        line = json.dumps(entry, separators=(",", ":"), default=task_json)
+        self._journal.write(line + "\n")
+        self._pending = True
+
+    def snapshot(self, store):
+        # Entries are already in the journal; only compaction needs the
+        # store, and it has to start on the thread that appends. A journal
+        # left from an unfinished compaction is folded in on the first save.
+        if (
+            self._journal is not None and self._journal.tell() >= self.compact_bytes
+        ) or os.path.exists(self.compacting_path):
+            self.compact(store)
+        return None
+
+    def write(self, snapshot):
+        self._sync_journal()
+        return True
+
+    def compact(self, store):
+        if self._compactor is not None and self._compactor.is_alive():
+            return
+        self._sync_journal()
+        self._close_journal()
+        if os.path.exists(self.compacting_path):
+            # An earlier compaction was interrupted or backed off. Its journal
+            # is still needed, so this one goes on the end of it.
+            if os.path.exists(self.journal_path):
+                self._append_journal_to_compacting()
+        elif os.path.exists(self.journal_path):
+            os.replace(self.journal_path, self.compacting_path)
+            fsync_directory(self.journal_path)
+        else:
+            return
+        snapshot = [task.to_dict() for task in store.to_list()]
+        self._folding = self._local_changes
+        self._local_changes = set()
+        self._compactor = threading.Thread(
+            target=self._write_snapshot,
+            args=(snapshot, self.signature),
+            name="journal-compactor",
+        )
+        self._compactor.start()
+
+    def is_local_change(self, task_id):
+        return task_id in self._local_changes or task_id in self._folding
+
+    def wait_for_compaction(self):
+        if self._compactor is not None:
+            self._compactor.join()
+            self._compactor = None
+
+    def data_signature(self):
+        return tuple(
+            file_signature(path)
+            for path in (self.path, self.journal_path, self.compacting_path)
+        )
+
+    def close(self):
+        self._sync_journal()
+        self._close_journal()
+        self.wait_for_compaction()
+
+    def _write_snapshot(self, snapshot, signature):
+        with file_lock(self.lock_path):
+            if file_signature(self.path) != signature:
+                # Someone else rewrote the snapshot since we read it. Keep the
+                # rotated journal: loads replay it over theirs, and the next
+                # compaction, after their changes are merged, folds it in.
+                self._local_changes |= self._folding
+                self._folding = set()
+                return
+            atomic_write_json(self.path, snapshot, indent=2)
+            self.signature = file_signature(self.path)
+            self._folding = set()
+        os.remove(self.compacting_path)
+        fsync_directory(self.compacting_path)
+
+    def _append_journal_to_compacting(self):
+        # Replaying an entry twice gives the same result, so a crash before
+        # the journal is removed only repeats work on the next load.
+        with open(self.journal_path, "rb") as source, open(self.compacting_path, "ab") as target:
+            target.write(b"\n")
+            shutil.copyfileobj(source, target)
+            target.flush()
+            os.fsync(target.fileno())
+        os.remove(self.journal_path)
+        fsync_directory(self.journal_path)
+
+    def _open_journal(self):
+        torn = False
+        if os.path.exists(self.journal_path):
+            with open(self.journal_path, "rb") as file:
+                file.seek(0, os.SEEK_END)
+                if file.tell() > 0:
+                    file.seek(-1, os.SEEK_END)
+                    torn = file.read(1) != b"\n"
+        journal = open(self.journal_path, "a", encoding="utf-8")
+        if torn:
+            # Terminate a torn record so the next append starts clean.
+            journal.write("\n")
+        return journal
+
+    def _sync_journal(self):
+        if self._pending:
+            # Clear first so an append racing this sync is synced next time.
+            self._pending = False
+            self._journal.flush()
+            os.fsync(self._journal.fileno())
+
+    def _close_journal(self):
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+
+    def _replay(self, path, tasks):
+        replayed = set()
+        with open(path, "r", encoding="utf-8") as file:
+            for line in file:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # A crash mid-append leaves a torn final line; skip it.
+                    continue
+                if not isinstance(entry, dict):
+                    continue
+                op = entry.get("op")
+                task_id = entry.get("id")
+                data = entry.get("data")
+                if not isinstance(task_id, str):
+                    continue
+                # Journaled ids differ from the snapshot until it is rewritten.
+                self._local_changes.add(task_id)
+                replayed.add(task_id)
+                if op == "add" and isinstance(data, dict):
+                    tasks[task_id] = data
+                elif op == "update" and task_id in tasks and isinstance(data, dict):
+                    tasks[task_id].update(data)
+                elif op == "remove":
+                    tasks.pop(task_id, None)
+        return replayed
+
+
+class SqliteStorage:
+    """Tasks in a SQLite table with indexes on due time, status and category.
+
+    Each task is kept whole as JSON in ``data``; ``due_at``, ``status`` and
+    ``category`` are copied into indexed columns so ``filter_ids`` runs as
+    a range query. ``due_at`` is the normalized due string (or NULL when the
+    due value does not parse), which sorts chronologically as text.
+    """
+
+    supports_queries = True
+
+    def __init__(self, path, db_path=None):
+        self.json_path = path
+        self.path = db_path or f"{os.path.splitext(path)[0]}.db"
+        self._connection = None
+        self._dirty = set()
+        self._removed = set()
+
+    @property
+    def connection(self):
+        if self._connection is None:
+            self._connection = sqlite3.connect(self.path, check_same_thread=False)
+            self._connection.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS tasks (
+                    id TEXT PRIMARY KEY,
+                    due_at TEXT,
+                    status TEXT,
+                    category TEXT,
+                    data TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_tasks_due ON tasks (due_at);
+                CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks (status, due_at);
+                CREATE INDEX IF NOT EXISTS idx_tasks_category ON tasks (category, due_at);
+                """
+            )
+        return self._connection
+
+    def exists(self):
+        return os.path.exists(self.path) or os.path.exists(self.json_path)
+
+    quarantined = 0
+
+    def load(self):
+        return list(self.iter_tasks())
+
+    def iter_tasks(self, progress=None, read_only=False):
+        if not os.path.exists(self.path) and os.path.exists(self.json_path):
+            migrate_json_to_sqlite(self.json_path, self.path)
+        total = self.connection.execute("SELECT COUNT(*) FROM tasks").fetchone()[0]
+        rows = self.connection.execute("SELECT data FROM tasks ORDER BY rowid")
+        for count, (data,) in enumerate(rows, 1):
+            if progress is not None and count % 10000 == 0:
+                progress(count / total)
+            yield json.loads(data)
+
+    def set_aside(self):
+        self.close()
+        if os.path.exists(self.path):
+            os.replace(self.path, f"{self.path}.unreadable")
+
+    def save(self, tasks):
+        with self.connection:
+            self.connection.execute("DELETE FROM tasks")
+            self.connection.executemany(
+                "INSERT INTO tasks (id, due_at, status, category, data) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (self._row(task) for task in tasks),
+            )
+        self._dirty.clear()
+        self._removed.clear()
+
+    def lock(self):
+        # SQLite does its own locking between connections.
+        return nullcontext()
+
+    def changed_on_disk(self):
+        return False
+
+    def sync_from_disk(self, store):
+        return []
+
+    def record(self, op, task_id, payload=None):
+        if op == "remove":
+            self._dirty.discard(task_id)
+            self._removed.add(task_id)
+        else:
+            self._removed.discard(task_id)
+            self._dirty.add(task_id)
+
+    def snapshot(self, store):
+        rows = [self._row(store.get(task_id)) for task_id in self._dirty]
+        removed = list(self._removed)
+        self._dirty.clear()
+        self._removed.clear()
+        return rows, removed
+
+    def write(self, snapshot):
+        rows, removed = snapshot
+        if not rows and not removed:
+            return True
+        try:
+            with self.connection:
+                self.connection.executemany(
+                    "DELETE FROM tasks WHERE id = ?", ((task_id,) for task_id in removed)
+                )
+                self.connection.executemany(
+                    "INSERT OR REPLACE INTO tasks (id, due_at, status, category, data) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    rows,
+                )
+        except Exception:
+            # Nothing was committed; queue the same rows for the next write.
+            self._dirty.update(row[0] for row in rows if row[0] not in self._removed)
+            self._removed.update(task_id for task_id in removed if task_id not in self._dirty)
+            raise
+        return True
+
+    def commit(self, store):
+        return self.write(self.snapshot(store))
+
+    def filter_ids(self, active_filter="All", active_category="All", now=None):
+        now = now or datetime.now()
+        today_start = datetime.combine(now.date(), time.min)
+        clauses = []
+        params = []
+        if active_filter == "Done":
+            clauses.append("status = 'Done'")
+        else:
+            clauses.append("status != 'Done'")
+            if active_filter in ("Today", "This Week"):
+                days = 1 if active_filter == "Today" else 8
+                clauses.append("due_at >= ? AND due_at < ?")
+                params += [
+                    today_start.strftime(DATE_FORMAT),
+                    (today_start + timedelta(days=days)).strftime(DATE_FORMAT),
+                ]
+        if active_category != "All":
+            clauses.append("category = ?")
+            params.append(active_category)
+        rows = self.connection.execute(
+            f"SELECT id FROM tasks WHERE {' AND '.join(clauses)} "
+            "ORDER BY status != 'Open', due_at IS NULL, due_at, id",
+            params,
+        )
+        return [task_id for (task_id,) in rows]
+
+    def data_signature(self):
+        return file_signature(self.path)
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    @staticmethod
+    def _row(task):
+        due = parse_datetime(task.get("due"))
+        return (
+            task["id"],
+            due.strftime(DATE_FORMAT) if due else None,
+            task.get("status"),
+            task.get("category"),
+            json.dumps(task, default=task_json),
+        )
+
+
+def migrate_json_to_sqlite(json_path, db_path=None):
+    # JournalStorage also replays any journal left beside the JSON snapshot.
+    tasks = JournalStorage(json_path).load()
+    storage = SqliteStorage(json_path, db_path)
+    try:
+        storage.save(tasks)
+    finally:
+        storage.close()
+    return len(tasks)
+
+
+STORAGE_BACKENDS = {
+    "json": JsonStorage,
+    "journal": JournalStorage,
+    "sqlite": SqliteStorage,
+}
+
+
+def open_storage(mode, path):
+    try:
+        backend = STORAGE_BACKENDS[mode]
+    except KeyError:
+        raise ValueError(f"Unknown storage mode: {mode}") from None
+    return backend(path)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Copy a tasks.json file into SQLite.")
+    parser.add_argument("json_path", nargs="?", default="tasks.json")
+    parser.add_argument("db_path", nargs="?")
+    args = parser.parse_args()
+    count = migrate_json_to_sqlite(args.json_path, args.db_path)
+    print(f"Migrated {count} tasks.")
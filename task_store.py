@@ -0,0 +1,778 @@
+import bisect
+import heapq
+import sys
+from collections.abc import Mapping, MutableMapping
+from datetime import datetime, time, timedelta
+from functools import lru_cache
+
+from recurrence import (
+    REPEAT_RULES,
+    add_done_day,
+    is_recurring,
+    iter_days,
+    occurrence_id,
+    occurs_on,
+    split_occurrence_id,
+)
+
+DATE_FORMAT = "%Y-%m-%d %H:%M"
+FILTERS = ["Today", "This Week", "All", "Done"]
+DUE_CACHE_SIZE = 1 << 16
+TASK_FIELDS = ("id", "name", "due", "remind", "category", "status", "notified")
+TASK_DEFAULTS = {"status": "Open", "category": "School", "notified": False}
+INTERNED_FIELDS = frozenset(("due", "category", "status"))
+BATCH_OPS = ("add", "update", "remove", "done")
+BULK_INSERT_THRESHOLD = 256
+REMIND_OPTIONS = [0, 5, 10, 15, 30, 60]
+CATEGORIES = ["School", "Home", "Activities"]
+EDITABLE_FIELDS = ("name", "due", "remind", "category", "repeat")
+
+_MISSING = object()
+
+
+def parse_datetime(value):
+    if not value or not isinstance(value, str):
+        return None
+    return _parse_due(value)
+
+
+@lru_cache(maxsize=DUE_CACHE_SIZE)
+def _parse_due(value):
+    # Fast path for the canonical "YYYY-MM-DD HH:MM" shape; strptime is
+    # several times slower and only needed for looser spellings.
+    if (
+        len(value) == 16
+        and value[4] == "-"
+        and value[7] == "-"
+        and value[10] == " "
+        and value[13] == ":"
+        and value[:4].isdigit()
+        and value[5:7].isdigit()
+        and value[8:10].isdigit()
+        and value[11:13].isdigit()
+        and value[14:].isdigit()
+    ):
+        try:
+            return datetime(
+                int(value[:4]),
+                int(value[5:7]),
+                int(value[8:10]),
+                int(value[11:13]),
+                int(value[14:]),
+            )
+        except ValueError:
+            return None
+    try:
+        return datetime.strptime(value, DATE_FORMAT)
+    except ValueError:
+        return None
+
+
+def check_task_fields(fields):
+    """Validate task fields from the dialog, the API or an import and normalize them.
+
+    Raises ``ValueError(title, message)`` for the first problem found.
+    """
+    name = fields.get("name")
+    name = name.strip() if isinstance(name, str) else ""
+    if not name:
+        raise ValueError("Missing name", "Please enter a task name.")
+    due = fields.get("due")
+    if parse_datetime(due) is None:
+        raise ValueError("Date format", "Please use date YYYY-MM-DD and time HH:MM (24-hour).")
+    remind = str(fields.get("remind"))
+    if remind not in [str(option) for option in REMIND_OPTIONS]:
+        raise ValueError("Remind minutes", "Please choose a reminder time from the list.")
+    category = fields.get("category")
+    if category not in CATEGORIES:
+        raise ValueError("Category", "Please choose a category.")
+    repeat = fields.get("repeat")
+    if repeat is not None and repeat not in REPEAT_RULES:
+        raise ValueError("Repeat", "Please choose how often the task repeats.")
+    return {
+        "name": name,
+        "due": due,
+        "remind": int(remind),
+        "category": category,
+        "repeat": repeat,
+    }
+
+
+def record_problem(record):
+    """Why a task read from storage can't be indexed, or None if it can.
+
+    Only checks what the store and reminders rely on; missing fields get
+    their defaults later.
+    """
+    for key in ("name", "due", "status", "category", "repeat"):
+        value = record.get(key)
+        if value is not None and not isinstance(value, str):
+            return f"{key} is not text"
+    try:
+        int(record.get("remind", 0))
+    except (TypeError, ValueError):
+        return "remind is not a number"
+    return None
+
+
+class Task(MutableMapping):
+    """Compact task record that still behaves like the task dicts it replaces.
+
+    Known fields live in ``__slots__`` and repeated strings (status, category,
+    due) are interned, which cuts per-task memory several times over a
+    dict. Any other keys go to an ``extra`` dict that is only created when
+    needed.
+    """
+
+    __slots__ = TASK_FIELDS + ("extra",)
+
+    def __init__(self, data=()):
+        for field in TASK_FIELDS:
+            setattr(self, field, _MISSING)
+        self.extra = None
+        self.update(data)
+
+    def __getitem__(self, key):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        if key in TASK_FIELDS:
+            if key in INTERNED_FIELDS and type(value) is str:
+                value = sys.intern(value)
+            setattr(self, key, value)
+        else:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[key] = value
+
+    def __delitem__(self, key):
+        if key in TASK_FIELDS:
+            if getattr(self, key) is _MISSING:
+                raise KeyError(key)
+            setattr(self, key, _MISSING)
+        elif self.extra is not None and key in self.extra:
+            del self.extra[key]
+        else:
+            raise KeyError(key)
+
+    def __iter__(self):
+        for field in TASK_FIELDS:
+            if getattr(self, field) is not _MISSING:
+                yield field
+        if self.extra:
+            yield from self.extra
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __contains__(self, key):
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __repr__(self):
+        return f"Task({self.to_dict()!r})"
+
+    def get(self, key, default=None):
+        if key in TASK_FIELDS:
+            value = getattr(self, key)
+            return default if value is _MISSING else value
+        if self.extra is None:
+            return default
+        return self.extra.get(key, default)
+
+    def update(self, other=(), **fields):
+        items = other.items() if hasattr(other, "items") else other
+        for key, value in items:
+            self[key] = value
+        for key, value in fields.items():
+            self[key] = value
+
+    def to_dict(self):
+        return dict(self.items())
+
+
+class Occurrence(Mapping):
+    """One dated instance of a repeating task, expanded on demand.
+
+    Occurrences are never stored. Reads fall through to the series task
+    except for ``id``, ``due``, ``status`` and ``notified``, which come from
+    the occurrence day and the series' sparse ``done_days`` and
+    ``notified_through`` fields.
+    """
+
+    __slots__ = ("series", "due_key", "day", "id")
+
+    def __init__(self, series, due_key):
+        self.series = series
+        self.due_key = due_key
+        self.day = due_key.date()
+        self.id = occurrence_id(series.id, self.day)
+
+    @property
+    def category(self):
+        return self.series.category
+
+    @property
+    def status(self):
+        if self.day.isoformat() in (self.series.get("done_days") or ()):
+            return "Done"
+        return self.series.status
+
+    @property
+    def notified(self):
+        through = self.series.get("notified_through")
+        return isinstance(through, str) and self.day.isoformat() <= through
+
+    def __getitem__(self, key):
+        if key == "id":
+            return self.id
+        if key == "due":
+            return self.due_key.strftime(DATE_FORMAT)
+        if key in ("status", "notified"):
+            return getattr(self, key)
+        return self.series[key]
+
+    def __iter__(self):
+        return iter(self.series)
+
+    def __len__(self):
+        return len(self.series)
+
+    def __repr__(self):
+        return f"Occurrence({self.id!r})"
+
+
+def with_defaults(task):
+    for key, value in TASK_DEFAULTS.items():
+        task.setdefault(key, value)
+    return task
+
+
+def task_json(value):
+    """``default`` hook so json can serialize Task records."""
+    if isinstance(value, Task):
+        return value.to_dict()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class TaskStore:
+    """In-memory task collection with id, due-time, status and category indexes.
+
+    Each task's due string is parsed once, when it is indexed or its ``due``
+    changes, and the result is kept beside the task rather than in it, so
+    tasks.json is unchanged. Has no tkinter dependency so the planner logic
+    can run headless.
+    """
+
+    def __init__(self, tasks=()):
+        self._tasks = {}
+        self._due_keys = {}
+        self._due_index = []
+        self._by_status = {}
+        self._by_category = {}
+        self._open_by_day = {}
+        self._day_counts = {}
+        self._recurring = set()
+        self._listeners = []
+        self._pinned = None
+        self.replace_all(tasks)
+
+    def __len__(self):
+        return len(self._tasks)
+
+    def __iter__(self):
+        return iter(list(self._tasks.values()))
+
+    def __contains__(self, task_id):
+        return task_id in self._tasks
+
+    def subscribe(self, listener):
+        """Call ``listener(op, task_id, payload)`` after every add, update and remove."""
+        self._listeners.append(listener)
+
+    def get(self, task_id):
+        if task_id is None:
+            return None
+        task = self._tasks.get(task_id)
+        if task is None:
+            return self._occurrence(task_id)
+        return task
+
+    def due_time(self, task_id):
+        due_key = self._due_key_of(self.get(task_id))
+        return None if due_key == datetime.max else due_key
+
+    def is_recurring(self, task_id):
+        return task_id in self._recurring
+
+    def has_recurring(self):
+        return bool(self._recurring)
+
+    def series_id(self, task_id):
+        """The stored task behind ``task_id``: itself, or an occurrence's series."""
+        if task_id in self._tasks:
+            return task_id
+        parts = split_occurrence_id(task_id)
+        return task_id if parts is None else parts[0]
+
+    def to_list(self):
+        return list(self._tasks.values())
+
+    def replace_all(self, tasks):
+        self._tasks.clear()
+        self._due_keys.clear()
+        self._due_index = []
+        self._by_status.clear()
+        self._by_category.clear()
+        self._open_by_day.clear()
+        self._day_counts.clear()
+        self._recurring.clear()
+        for task in tasks:
+            self._insert(task, bulk=True)
+        self._due_index.sort()
+        for bucket in self._open_by_day.values():
+            bucket.sort()
+
+    def adopt(self, other):
+        """Take over another store's tasks and indexes, keeping our listeners.
+
+        Lets a store be built off the Tk thread and swapped in cheaply.
+        """
+        self._tasks = other._tasks
+        self._due_keys = other._due_keys
+        self._due_index = other._due_index
+        self._by_status = other._by_status
+        self._by_category = other._by_category
+        self._open_by_day = other._open_by_day
+        self._day_counts = other._day_counts
+        self._recurring = other._recurring
+
+    def add(self, task):
+        task = self._insert(task)
+        self._notify("add", task["id"], task)
+        return task
+
+    def pin(self):
+        """Keep a copy of each task as it is now, taken just before its next edit.
+
+        Returns the ``{task_id: dict}`` of those copies. Another thread that
+        holds the current task records can read any record found there from
+        the copy instead, and so sees every task as of this call. Replaces
+        the previous pin.
+        """
+        self._pinned = {}
+        return self._pinned
+
+    def update(self, task_id, changes):
+        task = self._tasks[task_id]
+        pinned = self._pinned
+        if pinned is not None and task_id not in pinned:
+            pinned[task_id] = task.to_dict()
+        due_changed = "due" in changes and changes["due"] != task.get("due")
+        self._unindex(task, due_changed)
+        task.update(changes)
+        self._index(task, due=due_changed)
+        self._notify("update", task_id, changes)
+        return task
+
+    def remove(self, task_id):
+        task = self._tasks.pop(task_id)
+        self._unindex(task)
+        self._notify("remove", task_id)
+        return task
+
+    def apply_batch(self, changes):
+        """Apply ``(op, task_id, payload)`` changes in order as one unit.
+
+        ``op`` is one of ``BATCH_OPS``; "add" takes the task as payload and
+        "done" goes through ``mark_done``. Every change is checked first, so
+        an unknown id or duplicate add raises before anything is applied.
+        Listeners still hear each change; callers persist and redraw once.
+
+        Returns the inverse batch, which undoes this one when applied.
+        """
+        changes = list(changes)
+        present = {}
+        for op, task_id, payload in changes:
+            if op not in BATCH_OPS:
+                raise ValueError(f"Unknown batch op: {op}")
+            if task_id in present:
+                exists = present[task_id]
+            elif op == "done":
+                exists = self.get(task_id) is not None
+            else:
+                exists = task_id in self._tasks
+            if op == "add":
+                if exists or payload is None or payload.get("id") != task_id:
+                    raise KeyError(f"Cannot add task: {task_id}")
+                present[task_id] = True
+            elif not exists:
+                raise KeyError(task_id)
+            elif op == "remove":
+                present[task_id] = False
+        if len(changes) > BULK_INSERT_THRESHOLD and all(op == "add" for op, _, _ in changes):
+            return self._add_many([payload for _, _, payload in changes])
+        inverse = []
+        for op, task_id, payload in changes:
+            if op == "done":
+                op = "update"
+                task_id, payload = self.done_change(task_id)
+            if op == "add":
+                inverse.append(("remove", self.add(payload).id, None))
+            elif op == "update":
+                task = self._tasks[task_id]
+                if all(key in task for key in payload):
+                    inverse.append(("update", task_id, {key: task[key] for key in payload}))
+                else:
+                    # An update can't delete the keys it added, so undo
+                    # puts the whole task back instead (reversed below).
+                    inverse.append(("add", task_id, task.to_dict()))
+                    inverse.append(("remove", task_id, None))
+                self.update(task_id, payload)
+            else:
+                inverse.append(("add", task_id, self.remove(task_id).to_dict()))
+        inverse.reverse()
+        return inverse
+
+    def _add_many(self, tasks):
+        # Appended and sorted once rather than bisected in one at a time,
+        # as for a full load.
+        days = set()
+        tasks = [self._insert(task, bulk=True) for task in tasks]
+        for task in tasks:
+            entry = self._day_entry(task)
+            if entry is not None:
+                days.add(entry[0])
+        self._due_index.sort()
+        for day in days:
+            self._open_by_day[day].sort()
+        for task in tasks:
+            self._notify("add", task.id, task)
+        return [("remove", task.id, None) for task in reversed(tasks)]
+
+    def mark_done(self, task_id):
+        """Finish a task, or just one occurrence of a repeating task."""
+        return self.update(*self.done_change(task_id))
+
+    def done_change(self, task_id):
+        """The ``(task_id, changes)`` update that ``mark_done`` applies."""
+        parts = None if task_id in self._tasks else split_occurrence_id(task_id)
+        if parts is None:
+            return task_id, {"status": "Done"}
+        series_id, day = parts
+        done_days = self._tasks[series_id].get("done_days") or ()
+        return series_id, {"done_days": add_done_day(done_days, day)}
+
+    def mark_notified(self, task_id):
+        parts = None if task_id in self._tasks else split_occurrence_id(task_id)
+        if parts is None:
+            return self.update(task_id, {"notified": True})
+        series_id, day = parts
+        return self.update(series_id, {"notified_through": day.isoformat()})
+
+    def next_occurrence(self, series_id, first_day, horizon_days=366):
+        """First not-done occurrence of a series on or after ``first_day``."""
+        occurrences = self._series_occurrences(self._tasks[series_id], first_day, horizon_days)
+        return next(occurrences, None)
+
+    def with_status(self, status):
+        return [self._tasks[task_id] for task_id in self._by_status.get(status, ())]
+
+    def in_category(self, category):
+        return [self._tasks[task_id] for task_id in self._by_category.get(category, ())]
+
+    def category_size(self, category):
+        return len(self._by_category.get(category, ()))
+
+    def get_known(self, task_ids):
+        """Tasks for ``task_ids`` in order, skipping ids the store doesn't hold."""
+        tasks = self._tasks
+        return [tasks[task_id] for task_id in task_ids if task_id in tasks]
+
+    def iter_by_due(self, start=None, end=None):
+        """Yield tasks with start <= due < end, ordered by due time.
+
+        Tasks without a valid due time sort last and are only reached when
+        ``end`` is None.
+        """
+        lo = 0 if start is None else bisect.bisect_left(self._due_index, (start,))
+        hi = (
+            len(self._due_index)
+            if end is None
+            else bisect.bisect_left(self._due_index, (end,))
+        )
+        for _, task_id in self._due_index[lo:hi]:
+            yield self._tasks[task_id]
+
+    def iter_open_by_day(self, first_day, days=1):
+        """Yield not-done tasks due on ``days`` days from ``first_day``, by due time.
+
+        Repeating tasks contribute their occurrences in the window instead of
+        the series itself.
+        """
+        buckets = [
+            self._open_by_day[day]
+            for day in (first_day + timedelta(days=offset) for offset in range(days))
+            if day in self._open_by_day
+        ]
+        occurrences = self._open_occurrences(first_day, days)
+        if occurrences:
+            buckets.append(sorted((item.due_key, item.id) for item in occurrences.values()))
+        entries = buckets[0] if len(buckets) == 1 else heapq.merge(*buckets)
+        for _, task_id in entries:
+            if task_id in occurrences:
+                yield occurrences[task_id]
+            else:
+                yield self._tasks[task_id]
+
+    def filter_tasks(self, active_filter="All", active_category="All", now=None):
+        if active_filter == "Done":
+            candidates = self._sorted_ids(self._by_status.get("Done", ()))
+        elif active_filter in ("Today", "This Week"):
+            today = (now or datetime.now()).date()
+            days = 1 if active_filter == "Today" else 8
+            candidates = self.iter_open_by_day(today, days)
+        else:
+            candidates = self.iter_by_due()
+
+        result = []
+        for task in candidates:
+            if active_filter != "Done" and task.status == "Done":
+                continue
+            if active_category != "All" and task.category != active_category:
+                continue
+            result.append(task)
+        result.sort(key=lambda task: 0 if task.status == "Open" else 1)
+        return result
+
+    def filter_subset(self, task_ids, active_filter="All", active_category="All", now=None):
+        """``filter_tasks`` restricted to ``task_ids``, in the same order.
+
+        Costs O(k log k) in the number of ids rather than a pass over the store.
+        """
+        tasks = self._tasks
+        due_keys = self._due_keys
+        done_view = active_filter == "Done"
+        start, end = self._due_window(active_filter, now)
+        keyed = []
+        occurrences = {}
+        for task_id in task_ids:
+            task = tasks[task_id]
+            if active_category != "All" and task.category != active_category:
+                continue
+            if task_id in self._recurring and start is not None:
+                days = (end - start).days
+                for occurrence in self._series_occurrences(task, start.date(), days):
+                    occurrences[occurrence.id] = occurrence
+                    keyed.append((task.status != "Open", occurrence.due_key, occurrence.id))
+                continue
+            if (task.status == "Done") != done_view:
+                continue
+            due_key = due_keys[task_id]
+            if start is not None and not start <= due_key < end:
+                continue
+            keyed.append((task.status != "Open", due_key, task_id))
+        keyed.sort()
+        return [
+            occurrences[task_id] if task_id in occurrences else tasks[task_id]
+            for _, _, task_id in keyed
+        ]
+
+    def count_open_by_day(self, first_day, days=1):
+        """Number of not-done tasks due on ``days`` days from ``first_day``."""
+        return len(self._open_occurrences(first_day, days)) + sum(
+            len(self._open_by_day.get(first_day + timedelta(days=offset), ()))
+            for offset in range(days)
+        )
+
+    def open_counts_by_day(self, first_day, days):
+        """``{day: open task count}`` for each of ``days`` days from ``first_day``.
+
+        One bucket lookup per day plus a single pass over the repeating tasks,
+        so a whole month grid costs about as much as one day used to.
+        """
+        open_by_day = self._open_by_day
+        counts = {}
+        for offset in range(days):
+            day = first_day + timedelta(days=offset)
+            counts[day] = len(open_by_day.get(day, ()))
+        for occurrence in self._open_occurrences(first_day, days).values():
+            counts[occurrence.day] += 1
+        return counts
+
+    def category_counts_by_day(self, first_day, days):
+        """``{day: {category: open count}}`` for days in the window with open tasks.
+
+        Non-repeating tasks come from counters kept up to date as tasks are
+        added, edited, finished and removed; repeating tasks are counted from
+        their occurrences in the window.
+        """
+        day_counts = self._day_counts
+        result = {}
+        for offset in range(days):
+            day = first_day + timedelta(days=offset)
+            counts = day_counts.get(day)
+            if counts:
+                result[day] = dict(counts)
+        for occurrence in self._open_occurrences(first_day, days).values():
+            counts = result.setdefault(occurrence.day, {})
+            counts[occurrence.category] = counts.get(occurrence.category, 0) + 1
+        return result
+
+    def matches(self, task, active_filter="All", active_category="All", now=None):
+        if active_category != "All" and task.category != active_category:
+            return False
+        # Occurrences only appear in the dated views; the series row stands
+        # in for them under All and Done.
+        occurrence = type(task) is Occurrence
+        if active_filter == "Done":
+            return not occurrence and task.status == "Done"
+        if task.status == "Done":
+            return False
+        start, end = self._due_window(active_filter, now)
+        if start is None:
+            return not occurrence
+        if task.id in self._recurring:
+            return False
+        return start <= self._due_key_of(task) < end
+
+    def sort_key(self, task_id):
+        """Key matching the order returned by ``filter_tasks``."""
+        task = self.get(task_id)
+        status_order = 0 if task.status == "Open" else 1
+        return (status_order, self._due_key_of(task), task_id)
+
+    def top_today(self, now=None, limit=3):
+        top = []
+        for task in self.iter_open_by_day((now or datetime.now()).date()):
+            if task.status == "Open":
+                top.append(task)
+                if len(top) == limit:
+                    break
+        return top
+
+    def _insert(self, task, bulk=False):
+        if not isinstance(task, Task):
+            task = Task(task)
+        task_id = task["id"]
+        if task_id in self._tasks:
+            raise KeyError(f"Duplicate task id: {task_id}")
+        self._tasks[task_id] = task
+        self._index(task, bulk)
+        return task
+
+    @staticmethod
+    def _due_window(active_filter, now=None):
+        if active_filter not in ("Today", "This Week"):
+            return None, None
+        now = now or datetime.now()
+        today_start = datetime.combine(now.date(), time.min)
+        days = 1 if active_filter == "Today" else 8
+        return today_start, today_start + timedelta(days=days)
+
+    def _due_key_of(self, task):
+        if type(task) is Occurrence:
+            return task.due_key
+        return self._due_keys[task.id]
+
+    def _occurrence(self, task_id):
+        parts = split_occurrence_id(task_id)
+        if parts is None or parts[0] not in self._recurring:
+            return None
+        series_id, day = parts
+        series = self._tasks[series_id]
+        anchor = self._due_keys[series_id]
+        if anchor == datetime.max or not occurs_on(series.get("repeat"), anchor.date(), day):
+            return None
+        return Occurrence(series, datetime.combine(day, anchor.time()))
+
+    def _series_occurrences(self, series, first_day, days):
+        """Not-done occurrences of one series in the window."""
+        anchor = self._due_keys[series.id]
+        if series.status == "Done" or anchor == datetime.max:
+            return
+        for day in iter_days(series.get("repeat"), anchor.date(), first_day, days):
+            occurrence = Occurrence(series, datetime.combine(day, anchor.time()))
+            if occurrence.status != "Done":
+                yield occurrence
+
+    def _open_occurrences(self, first_day, days):
+        return {
+            occurrence.id: occurrence
+            for series_id in self._recurring
+            for occurrence in self._series_occurrences(self._tasks[series_id], first_day, days)
+        }
+
+    def _notify(self, op, task_id, payload=None):
+        for listener in self._listeners:
+            listener(op, task_id, payload)
+
+    def _sorted_ids(self, task_ids):
+        keyed = sorted((self._due_keys[task_id], task_id) for task_id in task_ids)
+        return [self._tasks[task_id] for _, task_id in keyed]
+
+    def _index(self, task, bulk=False, due=True):
+        task_id = task["id"]
+        if due:
+            due_key = parse_datetime(task.get("due")) or datetime.max
+            self._due_keys[task_id] = due_key
+            if bulk:
+                self._due_index.append((due_key, task_id))
+            else:
+                bisect.insort(self._due_index, (due_key, task_id))
+        self._by_status.setdefault(task.get("status"), set()).add(task_id)
+        self._by_category.setdefault(task.get("category"), set()).add(task_id)
+        if is_recurring(task):
+            self._recurring.add(task_id)
+        entry = self._day_entry(task)
+        if entry is not None:
+            day, key = entry
+            bucket = self._open_by_day.setdefault(day, [])
+            if bulk:
+                bucket.append(key)
+            else:
+                bisect.insort(bucket, key)
+            counts = self._day_counts.setdefault(day, {})
+            category = task.get("category")
+            counts[category] = counts.get(category, 0) + 1
+
+    def _unindex(self, task, due=True):
+        task_id = task["id"]
+        entry = self._day_entry(task)
+        if entry is not None:
+            day, key = entry
+            bucket = self._open_by_day[day]
+            del bucket[bisect.bisect_left(bucket, key)]
+            if not bucket:
+                del self._open_by_day[day]
+            counts = self._day_counts[day]
+            category = task.get("category")
+            counts[category] -= 1
+            if not counts[category]:
+                del counts[category]
+                if not counts:
+                    del self._day_counts[day]
+        if due:
+            due_key = self._due_keys.pop(task_id)
+            position = bisect.bisect_left(self._due_index, (due_key, task_id))
+            del self._due_index[position]
+        self._discard(self._by_status, task.get("status"), task_id)
+        self._discard(self._by_category, task.get("category"), task_id)
+        self._recurring.discard(task_id)
+
+    def _day_entry(self, task):
+        due_key = self._due_keys[task.id]
+        if task.status == "Done" or due_key == datetime.max or task.id in self._recurring:
+            return None
+        return due_key.date(), (due_key, task.id)
+
+    @staticmethod
+    def _discard(index, key, task_id):
+        bucket = index.get(key)
+        if bucket is None:
+            return
+        bucket.discard(task_id)
+        if not bucket:
+            del index[key]
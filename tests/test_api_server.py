@@ -0,0 +1,183 @@
+"""ApiServer against ApiClient, with a stand-in for the planner behind it."""
+
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from api_server import ApiClient, ApiServer, MainThreadDispatcher, ServiceUnavailable
+from task_store import check_task_fields
+
+
+class StandInService:
+    """Answers the service calls ``PlannerApp`` handles, from a plain dict."""
+
+    def __init__(self):
+        self.tasks = {}
+        self.server = None
+        self.ready = True
+
+    def ensure_ready(self):
+        if not self.ready:
+            raise ServiceUnavailable("Tasks are still loading.")
+
+    def page_tasks(self, active_filter, active_category, query="", offset=0, limit=None):
+        self.ensure_ready()
+        if active_filter not in ("Today", "This Week", "All", "Done"):
+            raise ValueError("filter must be one of Today, This Week, All, Done.")
+        tasks = [
+            task
+            for task in self.tasks.values()
+            if active_category in ("All", task["category"]) and query in task["name"]
+        ]
+        return {"total": len(tasks), "tasks": tasks[offset : offset + limit]}
+
+    def get_task(self, task_id):
+        self.ensure_ready()
+        return self.tasks[task_id]
+
+    def create_task(self, fields):
+        self.ensure_ready()
+        task = dict(check_task_fields(fields), id=uuid.uuid4().hex, status="Open")
+        self.tasks[task["id"]] = task
+        self.server.publish("add", task["id"])
+        return task
+
+    def change_task(self, task_id, fields):
+        self.ensure_ready()
+        task = self.tasks[task_id]
+        task.update(check_task_fields(dict(task, **fields)))
+        self.server.publish("update", task_id)
+        return task
+
+    def finish_tasks(self, task_ids):
+        self.ensure_ready()
+        for task_id in task_ids:
+            self.tasks[task_id]["status"] = "Done"
+            self.server.publish("update", task_id)
+        return task_ids
+
+    def remove_tasks(self, task_ids):
+        self.ensure_ready()
+        missing = [task_id for task_id in task_ids if task_id not in self.tasks]
+        if missing:
+            raise KeyError(missing[0])
+        for task_id in task_ids:
+            del self.tasks[task_id]
+            self.server.publish("remove", task_id)
+        return task_ids
+
+
+FIELDS = {"name": "Read ch. 3", "due": "2024-05-06 17:00", "remind": 10, "category": "School"}
+
+
+@pytest.fixture
+def api():
+    # One worker thread stands in for the Tk thread the planner submits to.
+    service = StandInService()
+    executor = ThreadPoolExecutor(max_workers=1)
+    server = ApiServer(service, submit=executor.submit, port=0)
+    service.server = server
+    port = server.start()
+    client = ApiClient(port, timeout=10)
+    yield service, server, client
+    client.close()
+    server.stop()
+    executor.shutdown()
+
+
+def test_routes_reach_the_service(api):
+    service, server, client = api
+    status, task = client.create_task(FIELDS)
+    assert status == 201 and task["name"] == "Read ch. 3"
+    task_id = task["id"]
+
+    assert client.get_task(task_id) == (200, task)
+    status, page = client.list_tasks(category="School", q="Read")
+    assert status == 200 and page["total"] == 1 and page["tasks"][0]["id"] == task_id
+    assert "version" in page
+
+    status, _ = client.change_task(task_id, {"name": "Read ch. 4"})
+    assert status == 200 and service.tasks[task_id]["name"] == "Read ch. 4"
+    assert client.finish_tasks([task_id]) == (200, {"ids": [task_id]})
+    assert service.tasks[task_id]["status"] == "Done"
+    assert client.request("DELETE", f"/tasks/{task_id}") == (200, {"ids": [task_id]})
+    assert service.tasks == {}
+
+
+def test_bad_requests_get_400(api):
+    service, server, client = api
+    status, body = client.create_task(dict(FIELDS, due="tomorrow"))
+    assert status == 400 and "YYYY-MM-DD" in body["error"]
+    assert client.list_tasks(filter="Someday")[0] == 400
+    assert client.list_tasks(limit="lots") == (400, {"error": "limit must be a whole number."})
+    assert client.request("POST", "/tasks", ["not", "an", "object"])[0] == 400
+    assert client.finish_tasks([])[0] == 400
+    assert client.request("POST", "/tasks/delete", {"ids": [1, 2]})[0] == 400
+    assert service.tasks == {}
+
+
+def test_unknown_tasks_and_routes_get_404(api):
+    service, server, client = api
+    status, body = client.get_task("nope")
+    assert status == 404 and "nope" in body["error"]
+    assert client.change_task("nope", {"name": "x"})[0] == 404
+    assert client.remove_tasks(["nope"])[0] == 404
+    assert client.request("GET", "/projects")[0] == 404
+    assert client.request("PUT", "/tasks/nope")[0] == 405
+
+
+def test_requests_while_loading_get_503(api):
+    service, server, client = api
+    service.ready = False
+    assert client.list_tasks()[0] == 503
+
+
+def test_long_poll_wakes_up_on_a_change(api):
+    service, server, client = api
+    version = client.list_tasks()[1]["version"]
+    assert client.changes(version, timeout=0) == (200, {"version": version, "changes": []})
+
+    answer = {}
+
+    def wait_for_changes():
+        waiter = ApiClient(server.port, timeout=10)
+        started = time.perf_counter()
+        answer["response"] = waiter.changes(version, timeout=30)
+        answer["seconds"] = time.perf_counter() - started
+        waiter.close()
+
+    thread = threading.Thread(target=wait_for_changes)
+    thread.start()
+    time.sleep(0.2)
+    status, task = client.create_task(FIELDS)
+    thread.join(timeout=10)
+
+    assert not thread.is_alive() and answer["seconds"] < 5
+    status, body = answer["response"]
+    assert status == 200
+    assert body["changes"] == [{"version": version + 1, "op": "add", "id": task["id"]}]
+
+
+def test_long_poll_from_an_unknown_version_asks_for_a_reload(api):
+    service, server, client = api
+    status, body = client.changes(50, timeout=0)
+    assert status == 200 and body["reset"] and body["changes"] == []
+
+
+def test_dispatcher_backs_off_while_idle():
+    scheduled = []
+    dispatcher = MainThreadDispatcher(lambda ms, func: scheduled.append(ms))
+    for _ in range(6):
+        dispatcher._poll()
+    assert scheduled == [15, 30, 60, 120, 200, 200, 200]
+
+    future = dispatcher.submit(len, "abc")
+    dispatcher._poll()
+    assert future.result(timeout=0) == 3 and scheduled[-1] == 15
+
+    dispatcher.close()
+    dispatcher._poll()
+    assert len(scheduled) == 8
@@ -0,0 +1,90 @@
+"""Month grids and the per-day open counts the calendars show."""
+
+from datetime import date
+
+import pytest
+
+from task_store import TaskStore
+
+MAY = date(2024, 5, 1)
+
+
+def task(task_id, due, category="School", status="Open", **fields):
+    return dict(
+        {
+            "id": task_id,
+            "name": task_id,
+            "due": due,
+            "remind": 10,
+            "category": category,
+            "status": status,
+            "notified": False,
+        },
+        **fields,
+    )
+
+
+def make_store():
+    store = TaskStore()
+    store.replace_all(
+        [
+            task("math", "2024-05-06 15:00"),
+            task("dishes", "2024-05-06 18:00", category="Home"),
+            task("quiz", "2024-05-06 08:00", status="Done"),
+            task("essay", "2024-05-31 10:00"),
+            task("june", "2024-06-01 10:00"),
+            task("piano", "2024-05-20 16:00", category="Activities", repeat="weekly"),
+        ]
+    )
+    return store
+
+
+def test_month_layout_fills_a_fixed_six_week_grid():
+    # planner.py is the Tk app; the layout itself needs no display.
+    pytest.importorskip("tkinter")
+    import planner
+
+    cells = planner.month_layout(2024, 5)
+    assert len(cells) == planner.CALENDAR_CELLS
+    # May 2024 starts on a Wednesday.
+    assert cells[:3] == (None, None, MAY)
+    assert cells[2 + 30] == date(2024, 5, 31) and cells[2 + 31:] == (None,) * 9
+
+
+def test_open_counts_cover_every_day_of_the_month():
+    store = make_store()
+    counts = store.open_counts_by_day(MAY, 31)
+    assert len(counts) == 31
+    assert {day.day: count for day, count in counts.items() if count} == {
+        6: 2,
+        20: 1,
+        27: 1,
+        31: 1,
+    }
+
+
+def test_open_counts_follow_changes():
+    store = make_store()
+    store.mark_done("math")
+    store.mark_done("piano@2024-05-27")
+    store.update("june", {"due": "2024-05-31 12:00"})
+    counts = store.open_counts_by_day(MAY, 31)
+    assert counts[date(2024, 5, 6)] == 1
+    assert counts[date(2024, 5, 27)] == 0
+    assert counts[date(2024, 5, 31)] == 2
+
+
+def test_category_counts_feed_the_month_and_agenda_views():
+    store = make_store()
+    counts = store.category_counts_by_day(MAY, 31)
+    assert counts[date(2024, 5, 6)] == {"School": 1, "Home": 1}
+    assert counts[date(2024, 5, 20)] == {"Activities": 1}
+    assert date(2024, 5, 7) not in counts
+
+    store.update("dishes", {"category": "School"})
+    store.remove("essay")
+    store.mark_done("piano@2024-05-20")
+    counts = store.category_counts_by_day(MAY, 31)
+    assert counts[date(2024, 5, 6)] == {"School": 2}
+    assert date(2024, 5, 20) not in counts and date(2024, 5, 31) not in counts
+    assert counts[date(2024, 5, 27)] == {"Activities": 1}
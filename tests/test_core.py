@@ -0,0 +1,304 @@
+"""Tests for the Tk-free planner modules: the store, storage and interchange."""
+
+import json
+from datetime import datetime
+
+import pytest
+
+from interchange import export_tasks, import_tasks
+from json_stream import BadRecord, NotAList, iter_json_array
+from saver import WriteBehindSaver
+from storage import JournalStorage, JsonStorage, SqliteStorage
+from task_store import TaskStore, with_defaults
+
+NOW = datetime(2024, 5, 6, 9, 0)  # a Monday
+
+
+def make_task(task_id, due, name=None, category="School", status="Open", **fields):
+    task = {
+        "id": task_id,
+        "name": name or f"Task {task_id}",
+        "due": due,
+        "remind": 10,
+        "category": category,
+        "status": status,
+        "notified": False,
+    }
+    task.update(fields)
+    return task
+
+
+def sample_tasks():
+    return [
+        make_task("math", "2024-05-06 15:00"),
+        make_task("dishes", "2024-05-06 18:00", category="Home"),
+        make_task("essay", "2024-05-09 10:00"),
+        make_task("piano", "2024-05-20 16:00", category="Activities"),
+        make_task("quiz", "2024-05-06 08:00", status="Done"),
+    ]
+
+
+def ids(tasks):
+    return [task["id"] for task in tasks]
+
+
+def load_store(storage):
+    store = TaskStore(with_defaults(task) for task in storage.load())
+    store.subscribe(storage.record)
+    return store
+
+
+# TaskStore indexes
+
+
+def test_filters_use_due_status_and_category_indexes():
+    store = TaskStore(sample_tasks())
+    assert ids(store.filter_tasks("Today", "All", NOW)) == ["math", "dishes"]
+    assert ids(store.filter_tasks("This Week", "All", NOW)) == ["math", "dishes", "essay"]
+    assert ids(store.filter_tasks("This Week", "School", NOW)) == ["math", "essay"]
+    assert ids(store.filter_tasks("Done", "All", NOW)) == ["quiz"]
+    assert ids(store.filter_tasks("All", "All", NOW)) == ["math", "dishes", "essay", "piano"]
+    assert ids(store.top_today(NOW)) == ["math", "dishes"]
+
+
+def test_indexes_follow_updates_and_removals():
+    store = TaskStore(sample_tasks())
+    store.update("piano", {"due": "2024-05-06 12:00"})
+    store.update("math", {"category": "Home"})
+    store.mark_done("dishes")
+    store.remove("essay")
+    assert ids(store.filter_tasks("Today", "All", NOW)) == ["piano", "math"]
+    assert ids(store.filter_tasks("All", "Home", NOW)) == ["math"]
+    assert ids(store.filter_tasks("Done", "All", NOW)) == ["quiz", "dishes"]
+    assert ids(store.in_category("School")) == ["quiz"]
+    assert store.category_size("Home") == 2
+    assert store.count_open_by_day(NOW.date(), 7) == 2
+
+
+def test_get_known_skips_ids_the_store_does_not_hold():
+    store = TaskStore(sample_tasks())
+    assert ids(store.get_known(["essay", "ghost", "math"])) == ["essay", "math"]
+
+
+# apply_batch
+
+
+def test_apply_batch_inverse_restores_the_store():
+    store = TaskStore(sample_tasks())
+    before = [task.to_dict() for task in store.to_list()]
+    inverse = store.apply_batch(
+        [
+            ("update", "math", {"name": "Algebra", "due": "2024-05-07 15:00"}),
+            ("done", "essay", None),
+            ("remove", "dishes", None),
+            ("add", "new", make_task("new", "2024-05-06 11:00")),
+        ]
+    )
+    assert store.get("math")["name"] == "Algebra"
+    assert "dishes" not in store and "new" in store
+
+    redo = store.apply_batch(inverse)
+    after = [task.to_dict() for task in store.to_list()]
+    assert sorted(after, key=lambda task: task["id"]) == sorted(before, key=lambda task: task["id"])
+    assert ids(store.filter_tasks("Today", "All", NOW)) == ["math", "dishes"]
+
+    store.apply_batch(redo)
+    assert store.get("math")["name"] == "Algebra"
+    assert store.get("essay")["status"] == "Done"
+
+
+def test_bulk_add_inverse_removes_every_task():
+    store = TaskStore(sample_tasks())
+    added = [make_task(f"bulk{number}", "2024-05-06 12:00") for number in range(300)]
+    inverse = store.apply_batch([("add", task["id"], task) for task in added])
+    assert len(store) == 305
+    assert len(store.filter_tasks("Today", "All", NOW)) == 302
+    store.apply_batch(inverse)
+    assert len(store) == 5
+    assert ids(store.filter_tasks("Today", "All", NOW)) == ["math", "dishes"]
+
+
+def test_apply_batch_checks_every_change_before_applying():
+    store = TaskStore(sample_tasks())
+    with pytest.raises(KeyError):
+        store.apply_batch([("update", "math", {"name": "Changed"}), ("remove", "ghost", None)])
+    assert store.get("math")["name"] == "Task math"
+
+
+# Storage
+
+
+def test_journal_replays_changes_over_the_snapshot(tmp_path):
+    path = str(tmp_path / "tasks.json")
+    storage = JournalStorage(path)
+    storage.save(sample_tasks())
+    store = load_store(storage)
+    store.update("math", {"name": "Algebra"})
+    store.remove("dishes")
+    store.add(make_task("new", "2024-05-07 09:00"))
+    storage.commit(store)
+    storage.close()
+    with open(f"{path}.journal", "a", encoding="utf-8") as file:
+        file.write('{"op": "remove", "id": "es')  # torn final append
+
+    reloaded = {task["id"]: task for task in JournalStorage(path).load()}
+    assert sorted(reloaded) == ["essay", "math", "new", "piano", "quiz"]
+    assert reloaded["math"]["name"] == "Algebra"
+
+
+def test_json_stream_resyncs_after_a_broken_record(tmp_path):
+    path = tmp_path / "tasks.json"
+    good = [make_task(f"t{number}", "2024-05-06 12:00", name="x" * 40) for number in range(6)]
+    text = json.dumps(good)
+    broken = text.replace('"id": "t2"', '"id": "t2" oops', 1)
+    path.write_text(broken, encoding="utf-8")
+
+    records = list(iter_json_array(str(path), chunk_size=16))
+    assert isinstance(records[2], BadRecord)
+    assert [record["id"] for record in records if isinstance(record, dict)] == [
+        "t0", "t1", "t3", "t4", "t5",
+    ]
+
+
+def test_json_stream_rejects_a_file_that_is_not_a_list(tmp_path):
+    path = tmp_path / "tasks.json"
+    path.write_text('{"id": "a"}', encoding="utf-8")
+    with pytest.raises(NotAList):
+        list(iter_json_array(str(path)))
+
+
+def test_sync_from_disk_merges_other_writers_and_keeps_local_edits(tmp_path):
+    path = str(tmp_path / "tasks.json")
+    storage = JsonStorage(path)
+    storage.save(sample_tasks())
+    store = load_store(storage)
+    store.update("math", {"name": "Local edit"})
+
+    on_disk = json.loads((tmp_path / "tasks.json").read_text(encoding="utf-8"))
+    on_disk = [task for task in on_disk if task["id"] != "piano"]
+    for task in on_disk:
+        if task["id"] in ("math", "essay"):
+            task["name"] = "Other program"
+    on_disk.append(make_task("theirs", "2024-05-06 13:00"))
+    JsonStorage(path).save(on_disk)
+
+    assert sorted(storage.sync_from_disk(store)) == ["essay", "piano", "theirs"]
+    assert store.get("math")["name"] == "Local edit"
+    assert store.get("essay")["name"] == "Other program"
+    assert "piano" not in store and "theirs" in store
+
+
+def test_bad_field_types_are_quarantined_not_fatal(tmp_path):
+    path = tmp_path / "tasks.json"
+    tasks = sample_tasks()
+    tasks[0]["remind"] = "soon"
+    tasks[1]["category"] = ["School"]
+    path.write_text(json.dumps(tasks), encoding="utf-8")
+
+    storage = JsonStorage(str(path))
+    store = load_store(storage)
+    assert storage.quarantined == 2
+    assert sorted(task.id for task in store) == ["essay", "piano", "quiz"]
+    reasons = [
+        json.loads(line)["reason"]
+        for line in (tmp_path / "tasks.json.quarantine").read_text().splitlines()
+    ]
+    assert reasons == ["remind is not a number", "category is not text"]
+
+
+def test_write_keeps_the_snapshot_and_newer_local_edits(tmp_path):
+    path = str(tmp_path / "tasks.json")
+    storage = JsonStorage(path)
+    storage.save(sample_tasks())
+    store = load_store(storage)
+    store.update("math", {"name": "Saved"})
+    snapshot = storage.snapshot(store)
+    # Edits made while the worker writes belong to the next write.
+    store.update("math", {"name": "Newer", "note": "added mid-write"})
+    store.update("essay", {"name": "Also newer"})
+    assert storage.write(snapshot)
+
+    written = {task["id"]: task for task in JsonStorage(path).load()}
+    assert written["math"]["name"] == "Saved" and "note" not in written["math"]
+    assert written["essay"]["name"] == "Task essay"
+    assert storage.is_local_change("math") and storage.is_local_change("essay")
+
+    # Another program rewrites the file: the newer local edit must survive.
+    JsonStorage(path).save(list(written.values()))
+    storage.sync_from_disk(store)
+    assert store.get("math")["name"] == "Newer"
+    assert store.get("essay")["name"] == "Also newer"
+
+
+def test_sql_ids_the_store_lacks_are_skipped(tmp_path):
+    path = str(tmp_path / "tasks.json")
+    storage = SqliteStorage(path)
+    storage.save(sample_tasks())
+    store = load_store(storage)
+    # Someone else adds a row, as interchange.py import does.
+    other = SqliteStorage(path)
+    other.save([*sample_tasks(), make_task("theirs", "2024-05-20 09:00", category="Activities")])
+    other.close()
+
+    task_ids = storage.filter_ids("All", "Activities", NOW)
+    assert task_ids == ["theirs", "piano"]
+    assert ids(store.get_known(task_ids)) == ["piano"]
+    storage.close()
+
+
+def test_saver_stays_pending_until_the_write_lands(tmp_path):
+    storage = JsonStorage(str(tmp_path / "tasks.json"))
+    storage.save(sample_tasks())
+    store = load_store(storage)
+    timers = []
+    saver = WriteBehindSaver(
+        storage, store, lambda ms, callback: timers.append(callback), lambda timer: None
+    )
+    assert not saver.pending
+    store.remove("math")
+    saver.mark_dirty()
+    assert saver.pending
+    assert saver.flush()
+    assert not saver.pending
+    assert "math" not in ids(JsonStorage(storage.path).load())
+
+
+# Import and export
+
+
+@pytest.mark.parametrize("suffix", [".csv", ".ics"])
+def test_export_then_import_round_trips(tmp_path, suffix):
+    tasks = [
+        *sample_tasks(),
+        make_task("reading", "2024-05-07 19:30", name="Read, then summarize", repeat="weekly"),
+    ]
+    path = str(tmp_path / f"tasks{suffix}")
+    assert export_tasks(path, tasks) == len(tasks)
+
+    result = import_tasks(path, workers=1, now=NOW)
+    assert result.skipped == 0 and result.duplicates == 0
+    fields = ("name", "due", "remind", "category", "status")
+    expected = sorted(tuple(task[field] for field in fields) for task in tasks)
+    assert sorted(tuple(task[field] for field in fields) for task in result.tasks) == expected
+    assert [task.get("repeat") for task in result.tasks if task["name"].startswith("Read")] == [
+        "weekly"
+    ]
+
+
+def test_import_drops_tasks_listed_twice_or_already_known(tmp_path):
+    path = tmp_path / "homework.csv"
+    path.write_text(
+        "Title,Due Date,Time\n"
+        "Math sheet,2024-05-06,15:00\n"
+        "math  SHEET,2024-05-06,15:00\n"
+        "Essay,2024-05-09,10:00\n"
+        "Broken,not a date,\n",
+        encoding="utf-8",
+    )
+    result = import_tasks(str(path), workers=1, now=NOW)
+    assert [task["name"] for task in result.tasks] == ["Math sheet", "Essay"]
+    assert result.duplicates == 1 and result.skipped == 1
+
+    result.discard_known([("essay", "2024-05-09 10:00")])
+    assert [task["name"] for task in result.tasks] == ["Math sheet"]
+    assert result.duplicates == 2
@@ -0,0 +1,75 @@
+"""Per-day buckets behind Today, This Week and the top three."""
+
+from datetime import date, datetime
+
+from task_store import TaskStore
+
+MONDAY = datetime(2024, 5, 6, 9, 0)
+
+
+def task(task_id, due, category="School", status="Open"):
+    return {
+        "id": task_id,
+        "name": task_id,
+        "due": due,
+        "remind": 10,
+        "category": category,
+        "status": status,
+        "notified": False,
+    }
+
+
+def make_store():
+    store = TaskStore()
+    store.replace_all(
+        [
+            task("late", "2024-05-06 18:00"),
+            task("early", "2024-05-06 08:00"),
+            task("noon", "2024-05-06 12:00", category="Home"),
+            task("night", "2024-05-06 21:00"),
+            task("done", "2024-05-06 07:00", status="Done"),
+            task("tue", "2024-05-07 10:00"),
+            task("next_mon", "2024-05-13 10:00"),
+            task("later", "2024-05-14 10:00"),
+            task("undated", "soon"),
+        ]
+    )
+    return store
+
+
+def ids(tasks):
+    return [task["id"] for task in tasks]
+
+
+def test_today_and_this_week_read_day_buckets_in_due_order():
+    store = make_store()
+    assert ids(store.filter_tasks("Today", "All", MONDAY)) == ["early", "noon", "late", "night"]
+    assert ids(store.filter_tasks("Today", "Home", MONDAY)) == ["noon"]
+    # This Week is today plus the next seven days.
+    assert ids(store.filter_tasks("This Week", "All", MONDAY))[-2:] == ["tue", "next_mon"]
+    assert ids(store.top_today(MONDAY)) == ["early", "noon", "late"]
+    assert store.count_open_by_day(date(2024, 5, 6), 8) == 6
+
+
+def test_buckets_are_keyed_by_date_so_the_next_day_needs_no_rebuild():
+    store = make_store()
+    tuesday = datetime(2024, 5, 7, 0, 0, 1)
+    assert ids(store.filter_tasks("Today", "All", tuesday)) == ["tue"]
+    assert ids(store.top_today(tuesday)) == ["tue"]
+
+
+def test_buckets_follow_edits_completions_and_removals():
+    store = make_store()
+    store.update("night", {"due": "2024-05-06 06:00"})
+    store.mark_done("early")
+    store.remove("noon")
+    store.add(task("lunch", "2024-05-06 12:30"))
+    store.update("tue", {"due": "2024-05-06 13:00", "category": "Home"})
+    assert ids(store.filter_tasks("Today", "All", MONDAY)) == ["night", "lunch", "tue", "late"]
+    assert store.open_counts_by_day(date(2024, 5, 6), 2) == {
+        date(2024, 5, 6): 4,
+        date(2024, 5, 7): 0,
+    }
+
+    store.update("done", {"status": "Open"})
+    assert ids(store.top_today(MONDAY)) == ["night", "done", "lunch"]
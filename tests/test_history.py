@@ -0,0 +1,79 @@
+"""UndoHistory over TaskStore.apply_batch inverses."""
+
+import pytest
+
+from history import UndoHistory
+from task_store import TaskStore
+
+
+def task(task_id, **fields):
+    return dict(
+        {
+            "id": task_id,
+            "name": task_id,
+            "due": "2024-05-06 15:00",
+            "remind": 10,
+            "category": "School",
+            "status": "Open",
+            "notified": False,
+        },
+        **fields,
+    )
+
+
+@pytest.fixture
+def store():
+    store = TaskStore()
+    store.replace_all([task("a"), task("b")])
+    return store
+
+
+def test_undo_and_redo_a_batch(store):
+    history = UndoHistory(store)
+    assert not history.can_undo() and not history.can_redo()
+
+    history.apply(
+        [("update", "a", {"name": "Math"}), ("remove", "b", None), ("add", "c", task("c"))]
+    )
+    assert history.can_undo() and not history.can_redo()
+    assert sorted(history.undo()) == ["a", "b", "c"]
+    assert store.get("a")["name"] == "a" and "b" in store and "c" not in store
+    assert history.can_redo() and not history.can_undo()
+
+    history.redo()
+    assert store.get("a")["name"] == "Math" and "b" not in store and "c" in store
+
+
+def test_undo_removes_keys_an_update_added(store):
+    history = UndoHistory(store)
+    history.apply([("update", "a", {"repeat": "weekly", "name": "Gym"})])
+    assert store.get("a")["repeat"] == "weekly"
+
+    history.undo()
+    assert "repeat" not in store.get("a") and store.get("a")["name"] == "a"
+    assert not store.has_recurring()
+
+    history.redo()
+    assert store.get("a")["repeat"] == "weekly" and store.get("a")["name"] == "Gym"
+
+
+def test_a_new_change_clears_redo(store):
+    history = UndoHistory(store)
+    history.apply([("update", "a", {"name": "one"})])
+    history.undo()
+    history.apply([("update", "b", {"name": "two"})])
+    assert not history.can_redo()
+
+
+def test_forget_drops_entries_for_outside_changes(store):
+    history = UndoHistory(store)
+    history.apply([("update", "a", {"name": "one"})])
+    history.apply([("update", "b", {"name": "two"})])
+    history.apply([("update", "b", {"name": "three"})])
+    history.undo()
+
+    history.forget(["a"])
+    assert history.undo() == ["b"]
+    assert not history.can_undo()
+    assert store.get("a")["name"] == "one" and store.get("b")["name"] == "b"
+    assert history.can_redo()
@@ -0,0 +1,102 @@
+"""Journal storage: replay, compaction and what a plain read leaves on disk."""
+
+import os
+
+from storage import JournalStorage, JsonStorage
+from task_store import TaskStore, with_defaults
+
+
+def make_task(task_id, **fields):
+    task = {
+        "id": task_id,
+        "name": f"Task {task_id}",
+        "due": "2024-05-06 15:00",
+        "remind": 10,
+        "category": "School",
+        "status": "Open",
+        "notified": False,
+    }
+    task.update(fields)
+    return task
+
+
+def open_store(storage):
+    store = TaskStore(with_defaults(task) for task in storage.load())
+    store.subscribe(storage.record)
+    return store
+
+
+def leave_unfinished_compaction(path):
+    storage = JournalStorage(path)
+    storage.save([make_task("a"), make_task("b")])
+    store = open_store(storage)
+    store.update("a", {"name": "Edited"})
+    storage.commit(store)
+    storage.close()
+    os.replace(storage.journal_path, storage.compacting_path)
+    return storage
+
+
+def names(path):
+    return {task["id"]: task["name"] for task in JournalStorage(path).load()}
+
+
+def test_reading_leaves_an_unfinished_compaction_alone(tmp_path):
+    path = str(tmp_path / "tasks.json")
+    storage = leave_unfinished_compaction(path)
+    before = os.stat(path).st_mtime_ns
+
+    assert names(path) == {"a": "Edited", "b": "Task b"}
+    assert os.stat(path).st_mtime_ns == before
+    assert os.path.exists(storage.compacting_path)
+
+
+def test_first_save_folds_an_unfinished_compaction(tmp_path):
+    path = str(tmp_path / "tasks.json")
+    leave_unfinished_compaction(path)
+    storage = JournalStorage(path)
+    store = open_store(storage)
+    store.update("b", {"name": "Also edited"})
+    storage.commit(store)
+    storage.wait_for_compaction()
+    storage.close()
+
+    assert not os.path.exists(storage.compacting_path)
+    assert not os.path.exists(storage.journal_path)
+    on_disk = {task["id"]: task["name"] for task in JsonStorage(path).load()}
+    assert on_disk == {"a": "Edited", "b": "Also edited"}
+
+
+def test_compaction_resumes_after_backing_off(tmp_path):
+    path = str(tmp_path / "tasks.json")
+    storage = JournalStorage(path, compact_bytes=1)
+    storage.save([make_task("a"), make_task("b")])
+    store = open_store(storage)
+    store.update("a", {"name": "Ours"})
+    # Another program rewrites the snapshot while ours is being written.
+    other = [make_task("a"), make_task("b", name="Theirs")]
+    storage.signature = None
+    storage.commit(store)
+    storage.wait_for_compaction()
+    assert os.path.exists(storage.compacting_path)
+
+    JsonStorage(path).save(other)
+    storage.sync_from_disk(store)
+    store.update("a", {"name": "Ours again"})
+    storage.commit(store)
+    storage.wait_for_compaction()
+    storage.close()
+
+    assert not os.path.exists(storage.compacting_path)
+    assert names(path) == {"a": "Ours again", "b": "Theirs"}
+
+
+def test_snapshots_are_written_like_json_storage(tmp_path):
+    journal_path = str(tmp_path / "journal.json")
+    json_path = str(tmp_path / "plain.json")
+    tasks = [make_task("a"), make_task("b")]
+    JournalStorage(journal_path).save(tasks)
+    JsonStorage(json_path).save(tasks)
+    with open(journal_path, encoding="utf-8") as journal, open(json_path, encoding="utf-8") as plain:
+        assert journal.read() == plain.read()
+    assert JournalStorage(journal_path).load() == tasks
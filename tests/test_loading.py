@@ -0,0 +1,70 @@
+"""Loading tasks.json: skipping broken records and setting them aside once."""
+
+import json
+
+from json_stream import BadRecord, iter_json_array
+from profiles import read_profile_today
+from storage import JsonStorage
+from datetime import date
+
+
+def read(tmp_path, text, chunk_size=4):
+    path = tmp_path / "tasks.json"
+    path.write_text(text, encoding="utf-8")
+    return [
+        f"bad: {record.raw}" if isinstance(record, BadRecord) else record["id"]
+        for record in iter_json_array(str(path), chunk_size=chunk_size)
+    ]
+
+
+def test_resync_ignores_objects_nested_in_a_broken_record(tmp_path):
+    text = '[{"id": "a"}, {"id": "b", "x": oops, "sub": [{"id": "n1"}, {"id": "n2"}]}, {"id": "c"}]'
+    for chunk_size in (4, 1 << 16):
+        assert read(tmp_path, text, chunk_size) == [
+            "a",
+            'bad: {"id": "b", "x": oops, "sub": [{"id": "n1"}, {"id": "n2"}]}',
+            "c",
+        ]
+
+
+def test_resync_ignores_brackets_and_commas_inside_strings(tmp_path):
+    text = r'[{"id": "a"}, {"id": "b", "n": "x, {\"id\": \"z\"} ]" oops}, {"id": "c"}]'
+    assert read(tmp_path, text)[::2] == ["a", "c"]
+
+
+def test_a_record_that_never_closes_ends_at_the_next_object(tmp_path):
+    text = '[{"id": "a"}, {"id": "b", "n": "x", {"id": "c"}, {"id": "d"}]'
+    assert read(tmp_path, text) == ["a", 'bad: {"id": "b", "n": "x"', "c", "d"]
+
+
+def write_tasks_with_a_bad_record(tmp_path):
+    path = tmp_path / "tasks.json"
+    tasks = [
+        {"id": "a", "name": "Math", "due": "2024-05-06 15:00", "remind": "soon"},
+        {"id": "b", "name": "Essay", "due": "2024-05-06 16:00", "remind": 10},
+    ]
+    path.write_text(json.dumps(tasks), encoding="utf-8")
+    return str(path)
+
+
+def test_bad_records_are_quarantined_once(tmp_path):
+    path = write_tasks_with_a_bad_record(tmp_path)
+    storage = JsonStorage(path)
+    assert [task["id"] for task in storage.load()] == ["b"]
+    assert storage.quarantined == 1
+
+    # The file was not rewritten; the next start finds nothing new.
+    assert [task["id"] for task in storage.load()] == ["b"]
+    assert storage.quarantined == 0
+    assert len((tmp_path / "tasks.json.quarantine").read_text().splitlines()) == 1
+
+
+def test_read_only_callers_do_not_quarantine(tmp_path):
+    path = write_tasks_with_a_bad_record(tmp_path)
+    entries = read_profile_today(JsonStorage(path), path, date(2024, 5, 6))
+    assert [entry["name"] for entry in entries] == ["Essay"]
+    assert not (tmp_path / "tasks.json.quarantine").exists()
+
+    storage = JsonStorage(path)
+    storage.load()
+    assert storage.quarantined == 1
@@ -0,0 +1,64 @@
+"""NotificationDispatcher batching and its fallback to the Tk thread."""
+
+import time
+
+from notifications import NotificationDispatcher, summarize
+
+
+class Backend:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.sent = []
+
+    def notify(self, title, message, timeout):
+        if self.fail:
+            raise OSError("no notification daemon")
+        self.sent.append((title, message))
+
+
+def make_dispatcher(backend):
+    scheduled = []
+    shown = []
+    dispatcher = NotificationDispatcher(
+        lambda ms, func: scheduled.append(func),
+        lambda title, message: shown.append((title, message)),
+        batch_seconds=0.05,
+    )
+    dispatcher._backend_loaded = True
+    dispatcher._backend = backend
+    return dispatcher, scheduled, shown
+
+
+def run_polls(dispatcher, scheduled, timeout=5):
+    # Stands in for the Tk loop: run each scheduled poll until it stops.
+    deadline = time.monotonic() + timeout
+    while scheduled and time.monotonic() < deadline:
+        scheduled.pop(0)()
+        time.sleep(0.01)
+    assert not scheduled
+
+
+def test_summary_names_the_first_few_reminders():
+    assert summarize([("Reminder", "Math")]) == ("Reminder", "Math")
+    title, message = summarize([("Reminder", name) for name in "abcde"])
+    assert title == "Planner Reminders"
+    assert message.splitlines() == ["a", "b", "c", "...and 2 more"]
+
+
+def test_a_burst_is_sent_as_one_notification():
+    backend = Backend()
+    dispatcher, scheduled, shown = make_dispatcher(backend)
+    for name in ("Math", "Piano", "Dishes"):
+        dispatcher.notify("Reminder", name)
+    run_polls(dispatcher, scheduled)
+    dispatcher.close()
+    assert backend.sent == [("Planner Reminders", "Math\nPiano\nDishes")]
+    assert shown == []
+
+
+def test_failed_sends_fall_back_to_the_tk_thread():
+    dispatcher, scheduled, shown = make_dispatcher(Backend(fail=True))
+    dispatcher.notify("Reminder", "Math")
+    run_polls(dispatcher, scheduled)
+    dispatcher.close()
+    assert shown == [("Reminder", "Math")]
@@ -0,0 +1,96 @@
+"""Profile registry, the warm-profile cache and the per-profile today index."""
+
+import json
+from datetime import date
+
+import pytest
+
+from profiles import (
+    DEFAULT_PROFILE,
+    ProfileCache,
+    ProfileRegistry,
+    read_profile_today,
+    read_today_index,
+    today_index_path,
+)
+from storage import JsonStorage
+
+MONDAY = date(2024, 5, 6)
+
+
+def test_registry_adds_profiles_and_remembers_the_active_one(tmp_path):
+    path = str(tmp_path / "profiles.json")
+    registry = ProfileRegistry(str(tmp_path / "tasks.json"), path)
+    assert registry.add("  Sam ") == "Sam"
+    registry.set_active("Sam")
+    for name in ("sam", "!!!"):
+        with pytest.raises(ValueError):
+            registry.add(name)
+
+    reopened = ProfileRegistry(str(tmp_path / "tasks.json"), path)
+    assert reopened.names == [DEFAULT_PROFILE, "Sam"] and reopened.active == "Sam"
+    assert reopened.shard_path(DEFAULT_PROFILE) == str(tmp_path / "tasks.json")
+    assert reopened.shard_path("Sam") == str(tmp_path / "tasks-sam.json")
+
+
+def test_cache_evicts_the_least_recently_parked(tmp_path):
+    class Parked:
+        def __init__(self, name):
+            self.name = name
+
+    cache = ProfileCache(size=2)
+    assert cache.put(Parked("a")) == [] and cache.put(Parked("b")) == []
+    cache.put(cache.pop("a"))
+    assert [profile.name for profile in cache.put(Parked("c"))] == ["b"]
+    assert "a" in cache and "c" in cache
+
+
+def write_shard(path, *tasks):
+    JsonStorage(str(path)).save(
+        [
+            dict(
+                {"id": task_id, "name": task_id, "remind": 10, "category": "School"},
+                due=due,
+                **fields,
+            )
+            for task_id, due, fields in tasks
+        ]
+    )
+
+
+def test_cold_profile_today_builds_and_then_reads_its_index(tmp_path):
+    shard = tmp_path / "tasks-sam.json"
+    write_shard(
+        shard,
+        ("math", "2024-05-06 15:00", {}),
+        ("quiz", "2024-05-06 08:00", {"status": "Done"}),
+        ("essay", "2024-05-09 10:00", {}),
+        ("gym", "2024-05-01 07:00", {"repeat": "daily"}),
+    )
+    storage = JsonStorage(str(shard))
+    entries = read_profile_today(storage, str(shard), MONDAY)
+    assert [entry["id"] for entry in entries] == ["gym@2024-05-06", "math"]
+
+    index_path = today_index_path(str(shard))
+    signature = storage.data_signature()
+    assert read_today_index(index_path, signature, MONDAY) == entries
+    thursday = read_today_index(index_path, signature, date(2024, 5, 9))
+    assert [entry["id"] for entry in thursday] == ["gym@2024-05-09", "essay"]
+    assert read_today_index(index_path, signature, date(2024, 6, 1)) is None
+
+
+def test_today_index_goes_stale_when_the_shard_changes(tmp_path):
+    shard = tmp_path / "tasks-sam.json"
+    write_shard(shard, ("math", "2024-05-06 15:00", {}))
+    storage = JsonStorage(str(shard))
+    read_profile_today(storage, str(shard), MONDAY)
+    old_signature = storage.data_signature()
+
+    write_shard(shard, ("math", "2024-05-06 15:00", {}), ("piano", "2024-05-06 16:00", {}))
+    index_path = today_index_path(str(shard))
+    assert storage.data_signature() != old_signature
+    assert read_today_index(index_path, storage.data_signature(), MONDAY) is None
+    entries = read_profile_today(storage, str(shard), MONDAY)
+    assert [entry["id"] for entry in entries] == ["math", "piano"]
+    with open(index_path, encoding="utf-8") as file:
+        assert json.load(file)["first_day"] == "2024-05-06"
@@ -0,0 +1,63 @@
+"""Profiler hooks: off by default, timed and histogrammed when enabled."""
+
+import json
+
+import pytest
+
+from profiling import HISTOGRAM_BOUNDS_MS, Profiler, Timing
+
+
+class Worker:
+    def run(self, value):
+        return value * 2
+
+    def fail(self):
+        raise RuntimeError("boom")
+
+
+def test_disabled_profiler_leaves_methods_alone(monkeypatch):
+    monkeypatch.delenv("PLANNER_PROFILE", raising=False)
+    profiler = Profiler.from_environment()
+    worker = Worker()
+    profiler.instrument(worker, ("run",))
+    assert not profiler.enabled and "run" not in vars(worker)
+
+
+def test_environment_switches_profiling_on(monkeypatch):
+    monkeypatch.setenv("PLANNER_PROFILE", "1")
+    assert Profiler.from_environment().output_path == "planner_profile.json"
+    monkeypatch.setenv("PLANNER_PROFILE", "out.json")
+    assert Profiler.from_environment().output_path == "out.json"
+    monkeypatch.setenv("PLANNER_PROFILE", "0")
+    assert not Profiler.from_environment().enabled
+
+
+def test_instrumented_calls_are_timed_even_when_they_raise(tmp_path):
+    path = tmp_path / "profile.json"
+    profiler = Profiler(str(path))
+    worker = Worker()
+    profiler.instrument(worker, ("run", "fail"), prefix="worker.")
+    profiler.instrument(worker, ("run",), prefix="worker.")
+    assert worker.run(21) == 42 and worker.run(1) == 2
+    with pytest.raises(RuntimeError):
+        worker.fail()
+
+    stats = profiler.snapshot()
+    assert stats["worker.run"]["count"] == 2 and stats["worker.fail"]["count"] == 1
+    assert "worker.run" in profiler.report()
+    profiler.dump()
+    with open(path, encoding="utf-8") as file:
+        assert json.load(file)["hooks"]["worker.run"]["count"] == 2
+
+
+def test_timing_percentiles_come_from_the_buckets():
+    timing = Timing()
+    for elapsed_ms in (0.05, 0.3, 0.3, 4, 3000):
+        timing.add(elapsed_ms)
+    assert timing.percentile(0.5) == 0.5
+    assert timing.percentile(0.8) == 5
+    assert timing.percentile(1.0) == 3000
+    stats = timing.to_dict()
+    assert stats["count"] == 5 and stats["max_ms"] == 3000
+    assert sum(stats["histogram"].values()) == 5
+    assert len(stats["histogram"]) == len(HISTOGRAM_BOUNDS_MS) + 1
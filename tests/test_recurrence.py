@@ -0,0 +1,75 @@
+"""Repeating tasks: the rules, occurrence ids, done days and reminders."""
+
+from datetime import date, datetime
+
+from recurrence import add_done_day, iter_days, split_occurrence_id
+from reminders import ReminderQueue
+from task_store import TaskStore
+
+MONDAY = date(2024, 5, 6)
+
+
+class FixedDate(date):
+    @classmethod
+    def today(cls):
+        return MONDAY
+
+
+def series(**fields):
+    task = {
+        "id": "gym",
+        "name": "Gym",
+        "due": "2024-05-06 07:00",
+        "remind": 10,
+        "category": "Activities",
+        "status": "Open",
+        "notified": False,
+        "repeat": "weekly",
+    }
+    task.update(fields)
+    return task
+
+
+def test_rules_expand_only_inside_the_window():
+    assert list(iter_days("weekly", MONDAY, date(2024, 5, 1), 19)) == [
+        date(2024, 5, 6),
+        date(2024, 5, 13),
+    ]
+    assert [day.day for day in iter_days("weekdays", MONDAY, date(2024, 5, 10), 4)] == [10, 13]
+    assert list(iter_days("daily", MONDAY, date(2024, 5, 1), 3)) == []
+
+
+def test_occurrence_ids_round_trip():
+    assert split_occurrence_id("gym@2024-05-13") == ("gym", date(2024, 5, 13))
+    assert split_occurrence_id("gym") is None
+    assert split_occurrence_id("gym@someday") is None
+
+
+def test_old_done_days_are_kept():
+    done_days = add_done_day(["2023-01-02"], date(2024, 5, 6))
+    assert done_days == ["2023-01-02", "2024-05-06"]
+
+
+def test_done_occurrences_stay_done_in_past_months():
+    store = TaskStore()
+    store.replace_all([series()])
+    store.mark_done("gym@2024-05-13")
+    store.mark_done("gym@2024-09-02")
+
+    # Months later, May still shows that week as done.
+    assert store.get("gym@2024-05-13")["status"] == "Done"
+    assert store.get("gym@2024-05-20")["status"] == "Open"
+    may = store.open_counts_by_day(date(2024, 5, 1), 31)
+    assert [day.day for day, count in may.items() if count] == [6, 20, 27]
+
+
+def test_mark_notified_moves_the_reminder_to_the_next_occurrence(monkeypatch):
+    store = TaskStore()
+    store.replace_all([series(repeat="daily")])
+    queue = ReminderQueue(store)
+    monkeypatch.setattr("reminders.date", FixedDate)
+    queue.rebuild()
+    assert queue.next_time() == datetime(2024, 5, 6, 6, 50)
+
+    store.mark_notified("gym@2024-05-06")
+    assert queue.next_time() == datetime(2024, 5, 7, 6, 50)
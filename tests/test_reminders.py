@@ -0,0 +1,64 @@
+"""ReminderQueue ordering and how it follows store changes."""
+
+from datetime import datetime
+
+from reminders import ReminderQueue
+from task_store import TaskStore
+
+
+def task(task_id, due, remind=10, **fields):
+    return dict(
+        {
+            "id": task_id,
+            "name": task_id,
+            "due": due,
+            "remind": remind,
+            "category": "School",
+            "status": "Open",
+            "notified": False,
+        },
+        **fields,
+    )
+
+
+def make_queue(*tasks):
+    store = TaskStore()
+    store.replace_all(list(tasks))
+    return store, ReminderQueue(store)
+
+
+def test_reminders_come_out_in_time_order():
+    store, queue = make_queue(
+        task("late", "2024-05-06 18:00"),
+        task("early", "2024-05-06 09:00", remind=30),
+        task("done", "2024-05-06 08:00", status="Done"),
+        task("told", "2024-05-06 08:00", notified=True),
+        task("undated", "someday"),
+    )
+    assert len(queue) == 2
+    assert queue.next_time() == datetime(2024, 5, 6, 8, 30)
+    assert queue.pop_due(datetime(2024, 5, 6, 8, 29)) == []
+    assert [t["id"] for t in queue.pop_due(datetime(2024, 5, 6, 23, 0))] == ["early", "late"]
+    assert queue.next_time() is None
+
+
+def test_queue_follows_store_changes():
+    store, queue = make_queue(task("a", "2024-05-06 09:00"), task("b", "2024-05-06 10:00"))
+
+    store.update("a", {"due": "2024-05-06 12:00"})
+    assert queue.next_time() == datetime(2024, 5, 6, 9, 50)
+    store.mark_done("b")
+    assert queue.next_time() == datetime(2024, 5, 6, 11, 50)
+    store.remove("a")
+    assert queue.next_time() is None and len(queue) == 0
+
+    store.add(task("c", "2024-05-07 09:00", remind=0))
+    assert queue.next_time() == datetime(2024, 5, 7, 9, 0)
+
+
+def test_stale_heap_entries_are_skipped():
+    store, queue = make_queue(task("a", "2024-05-06 09:00"))
+    for hour in (10, 11, 12):
+        store.update("a", {"due": f"2024-05-06 {hour}:00"})
+    due = queue.pop_due(datetime(2024, 5, 6, 23, 0))
+    assert [t["id"] for t in due] == ["a"]
@@ -0,0 +1,70 @@
+"""SearchIndex prefix queries and how they combine with the sidebar filters."""
+
+from datetime import datetime
+
+from search_index import SearchIndex, tokenize
+from task_store import TaskStore
+
+NOW = datetime(2024, 5, 6, 9, 0)
+
+
+def task(task_id, name, due="2024-05-06 15:00", category="School", status="Open"):
+    return {
+        "id": task_id,
+        "name": name,
+        "due": due,
+        "remind": 10,
+        "category": category,
+        "status": status,
+        "notified": False,
+    }
+
+
+def make_index():
+    store = TaskStore()
+    store.replace_all(
+        [
+            task("math", "Math homework p. 12"),
+            task("mathquiz", "Math quiz", due="2024-05-20 10:00"),
+            task("read", "Read chapter 12", category="Home"),
+            task("done", "Math review", status="Done"),
+        ]
+    )
+    return store, SearchIndex(store)
+
+
+def test_tokenize_lowercases_and_dedupes():
+    assert tokenize("Math, MATH and math-12") == ("math", "and", "12")
+    assert tokenize(None) == ()
+
+
+def test_every_term_matches_as_a_word_prefix():
+    store, index = make_index()
+    assert index.search("") is None
+    assert index.search("ma") == {"math", "mathquiz", "done"}
+    assert index.search("math 12") == {"math"}
+    assert index.search("12 rea") == {"read"}
+    assert index.search("zzz") == set()
+
+
+def ids(tasks):
+    return [task["id"] for task in tasks]
+
+
+def test_search_results_respect_filter_and_category():
+    store, index = make_index()
+    assert ids(index.filter_tasks("math", "Today", "All", NOW)) == ["math"]
+    assert sorted(ids(index.filter_tasks("math", "All", "All", NOW))) == ["math", "mathquiz"]
+    assert ids(index.filter_tasks("math", "Done", "All", NOW)) == ["done"]
+    assert ids(index.filter_tasks("12", "All", "Home", NOW)) == ["read"]
+
+
+def test_index_follows_renames_and_removals():
+    store, index = make_index()
+    store.update("read", {"name": "Piano practice"})
+    assert index.search("read") == set() and index.search("pia") == {"read"}
+    store.update("read", {"category": "Activities"})
+    assert index.search("pia") == {"read"}
+    store.remove("read")
+    assert index.search("pia") == set()
+    assert "piano" not in index._vocabulary
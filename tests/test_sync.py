@@ -0,0 +1,79 @@
+"""Merging tasks.json edits made by other programs (JsonStorage.sync_from_disk)."""
+
+import json
+
+from reminders import ReminderQueue
+from search_index import SearchIndex
+from storage import JsonStorage
+from task_store import TaskStore, with_defaults
+
+
+def make_task(task_id, **fields):
+    task = {
+        "id": task_id,
+        "name": f"Task {task_id}",
+        "due": "2024-05-06 15:00",
+        "remind": 10,
+        "category": "School",
+        "status": "Open",
+        "notified": False,
+    }
+    task.update(fields)
+    return task
+
+
+def open_store(tmp_path, tasks):
+    storage = JsonStorage(str(tmp_path / "tasks.json"))
+    storage.save(tasks)
+    store = TaskStore(with_defaults(task) for task in storage.load())
+    store.subscribe(storage.record)
+    return storage, store
+
+
+def write_outside(tmp_path, records):
+    (tmp_path / "tasks.json").write_text(json.dumps(records), encoding="utf-8")
+
+
+def test_bad_outside_records_are_quarantined_and_keep_the_local_task(tmp_path):
+    storage, store = open_store(tmp_path, [make_task("a"), make_task("b"), make_task("c")])
+    reminders = ReminderQueue(store)
+    search_index = SearchIndex(store)
+    write_outside(
+        tmp_path,
+        [
+            make_task("a", name="Task a", remind="soon"),
+            make_task("b", category=["School"]),
+            make_task("c", name="Renamed"),
+        ],
+    )
+
+    assert storage.sync_from_disk(store) == ["c"]
+    assert storage.quarantined == 2
+    assert store.get("a")["remind"] == 10 and store.get("b")["category"] == "School"
+    assert sorted(task.id for task in store.in_category("School")) == ["a", "b", "c"]
+    assert [task["id"] for task in search_index.filter_tasks("renamed")] == ["c"]
+    assert reminders.remind_time(store.get("a")) is not None
+    # The file was read once; the next check has nothing new to merge.
+    assert not storage.changed_on_disk()
+
+
+def test_non_object_records_are_skipped_not_fatal(tmp_path):
+    storage, store = open_store(tmp_path, [make_task("a"), make_task("b")])
+    write_outside(tmp_path, [make_task("a", name="Changed"), "junk", make_task("b")])
+
+    assert storage.sync_from_disk(store) == ["a"]
+    assert store.get("a")["name"] == "Changed"
+    assert storage.quarantined == 1
+
+
+def test_fields_removed_outside_are_removed_here(tmp_path):
+    storage, store = open_store(tmp_path, [make_task("a", repeat="weekly", note="old")])
+    write_outside(tmp_path, [make_task("a")])
+
+    assert storage.sync_from_disk(store) == ["a"]
+    task = store.get("a")
+    assert "repeat" not in task and "note" not in task
+    assert not store.has_recurring()
+    # Nothing left to differ, so the next outside write merges nothing.
+    write_outside(tmp_path, [make_task("a")])
+    assert storage.sync_from_disk(store) == []